@@ -12,7 +12,7 @@ class Base(DeclarativeBase):
 db = SQLAlchemy(model_class=Base)
 login_manager = LoginManager()
 
-def create_app():
+def create_app(test_config=None):
     app = Flask(__name__)
     app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key")
     app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
@@ -23,6 +23,17 @@ def create_app():
         "pool_recycle": 300,
         "pool_pre_ping": True,
     }
+    # Asignación de grupo en segundo plano al guardar el perfil (ver assignment_queue.py)
+    app.config["ASYNC_ASSIGNMENT"] = os.environ.get("ASYNC_ASSIGNMENT", "0") == "1"
+    # Parámetros de hash de contraseñas (formato de werkzeug, p. ej. "scrypt" o "pbkdf2:sha256:600000");
+    # los hashes antiguos se actualizan en el siguiente inicio de sesión
+    app.config["PASSWORD_HASH_METHOD"] = os.environ.get("PASSWORD_HASH_METHOD", "scrypt")
+    # Hilos de hash por worker web (cada worker tiene su propio pool)
+    app.config["PASSWORD_HASH_WORKERS"] = int(os.environ.get("PASSWORD_HASH_WORKERS", "2"))
+
+    # Configuración de pruebas (p. ej. SQLite en memoria)
+    if test_config:
+        app.config.update(test_config)
 
     # Inicializar extensiones
     db.init_app(app)
@@ -33,8 +44,9 @@ def create_app():
 
     @login_manager.user_loader
     def load_user(user_id):
-        from models import User
-        return User.query.get(int(user_id))
+        # Usuario y perfil en una consulta, con caché corto por usuario (ver user_cache.py)
+        from user_cache import load_user as load_cached_user
+        return load_cached_user(int(user_id))
 
     # Configurar el registro de logs
     try:
@@ -0,0 +1,55 @@
+import argparse
+import json
+import time
+from __init__ import create_app
+from clustering.evaluation import PROFILE_COLUMNS, AgreementEvaluator, rows_to_columns
+from clustering.model_registry import get_model_registry
+from utils import iter_profile_rows
+
+def build_agreement_report(chunk_size=50000, bins=100, output=None, curve_csv=None):
+    """Calcula el acuerdo automático vs manual sobre todos los perfiles."""
+    app = create_app()
+    with app.app_context():
+        assignment = get_model_registry().get()
+        if assignment is None:
+            print("No hay un modelo de clustering entrenado.")
+            return None
+
+        print(f"Evaluando acuerdo con el modelo {assignment.model_version}...")
+        start = time.perf_counter()
+        evaluator = AgreementEvaluator(assignment, bins=bins)
+        for rows in iter_profile_rows(PROFILE_COLUMNS, chunk_size):
+            evaluator.update(rows_to_columns(rows))
+            print(f"  {evaluator.total} perfiles evaluados")
+
+        report = evaluator.report()
+        report['model_version'] = assignment.model_version
+        elapsed = time.perf_counter() - start
+
+        print(f"Acuerdo global: {report['agreement'] or 0:.1%} sobre {report['total']} perfiles ({elapsed:.1f}s).")
+        for group, stats in report['per_group'].items():
+            rate = f"{stats['agreement']:.1%}" if stats['agreement'] is not None else '-'
+            print(f"  {group}: {rate} ({stats['profiles']} perfiles)")
+        for point in report['threshold_curve']:
+            if round(point['threshold'] * 100) % 10 == 0:
+                agreement = f"{point['agreement']:.1%}" if point['agreement'] is not None else '-'
+                print(f"  umbral {point['threshold']:.2f}: cobertura {point['coverage']:.1%}, acuerdo {agreement}")
+
+        if output:
+            with open(output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            print(f"Reporte guardado en {output}")
+        if curve_csv:
+            evaluator.write_curve_csv(curve_csv)
+            print(f"Curva de umbral guardada en {curve_csv}")
+        return report
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Reporte de acuerdo entre asignación automática y manual.')
+    parser.add_argument('--chunk-size', type=int, default=50000, help='Perfiles por bloque')
+    parser.add_argument('--bins', type=int, default=100, help='Casillas del histograma de confianza')
+    parser.add_argument('--output', default=None, help='Archivo JSON con el reporte completo')
+    parser.add_argument('--curve-csv', default=None, help='Exportar la curva acuerdo vs umbral a CSV')
+    args = parser.parse_args()
+
+    build_agreement_report(args.chunk_size, args.bins, args.output, args.curve_csv)
@@ -0,0 +1,64 @@
+"""
+Acceso cacheado a la configuración del algoritmo guardada en la base de datos
+"""
+import threading
+import time
+
+DEFAULT_CONFIG = {'n_clusters': 4, 'confidence_threshold': 0.7}
+
+# Segundos que un worker reutiliza la configuración antes de releerla; el
+# worker que la guarda la invalida de inmediato
+CACHE_TTL = 5.0
+
+_cached = (None, 0.0)
+_lock = threading.Lock()
+
+def get_algorithm_config():
+    """
+    Devuelve {'n_clusters', 'confidence_threshold'} desde un caché en memoria
+    """
+    global _cached
+    value, expires = _cached
+    if value is not None and time.monotonic() < expires:
+        return value
+
+    try:
+        from __init__ import db
+        from models import AlgorithmConfig
+        row = db.session.get(AlgorithmConfig, 1)
+    except Exception:
+        # Sin contexto de aplicación o sin tabla: usar lo último conocido
+        return value or dict(DEFAULT_CONFIG)
+
+    if row is None:
+        value = dict(DEFAULT_CONFIG)
+    else:
+        value = {'n_clusters': row.n_clusters, 'confidence_threshold': row.confidence_threshold}
+    _cached = (value, time.monotonic() + CACHE_TTL)
+    return value
+
+def invalidate_algorithm_config():
+    global _cached
+    _cached = (None, 0.0)
+
+def save_algorithm_config(n_clusters, confidence_threshold):
+    """
+    Guarda la configuración e invalida el caché. Devuelve la configuración
+    anterior para que el llamador decida si hay que reentrenar.
+    """
+    from __init__ import db
+    from models import AlgorithmConfig
+
+    with _lock:
+        row = db.session.get(AlgorithmConfig, 1)
+        if row is None:
+            previous = dict(DEFAULT_CONFIG)
+            row = AlgorithmConfig(id=1)
+            db.session.add(row)
+        else:
+            previous = {'n_clusters': row.n_clusters, 'confidence_threshold': row.confidence_threshold}
+        row.n_clusters = n_clusters
+        row.confidence_threshold = confidence_threshold
+        db.session.commit()
+        invalidate_algorithm_config()
+    return previous
@@ -1,15 +1,19 @@
 import logging
 import sys
 from __init__ import create_app, db
+from logging_config import queued
+
+# Configurar logging: la escritura a consola y archivo ocurre en el hilo del
+# QueueListener, no en el de la petición
+log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+stdout_handler = logging.StreamHandler(sys.stdout)
+stdout_handler.setFormatter(log_formatter)
+debug_file_handler = logging.FileHandler('edurecom.log')
+debug_file_handler.setFormatter(log_formatter)
 
-# Configurar logging
 logging.basicConfig(
     level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler('edurecom.log')
-    ]
+    handlers=[queued(stdout_handler, debug_file_handler)]
 )
 
 logger = logging.getLogger(__name__)
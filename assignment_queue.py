@@ -0,0 +1,231 @@
+"""
+Asignación de grupos fuera del camino de la petición.
+
+El perfil se guarda de inmediato con el grupo de las reglas manuales y la
+asignación por modelo se encola. Un grupo acotado de hilos agrupa las
+solicitudes que llegan dentro de una ventana de pocos milisegundos en una
+sola predicción por lotes y escribe el grupo definitivo en la base de datos.
+"""
+import logging
+import queue
+import threading
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+from clustering.evaluation import PROFILE_COLUMNS
+from clustering.events import log_event
+
+_STOP = object()
+
+
+class AssignmentRequest:
+    """
+    Solicitud encolada: copia de las respuestas del perfil (sin sesión ORM)
+    y el grupo provisional con que se guardó
+    """
+
+    __slots__ = ('profile_id', 'profile', 'provisional', 'enqueued_at')
+
+    def __init__(self, profile_id, profile, provisional):
+        self.profile_id = profile_id
+        self.profile = profile
+        self.provisional = provisional
+        self.enqueued_at = time.monotonic()
+
+
+class AssignmentBatcher:
+    """
+    Cola acotada consumida por `workers` hilos. Cada hilo toma la primera
+    solicitud disponible, espera hasta `batch_window` segundos (o hasta
+    `max_batch` solicitudes) y llama a `predict(perfiles)` una sola vez; el
+    resultado se entrega a `write(filas)` como dicts con profile_id,
+    provisional y group.
+
+    Si la cola está llena `submit` devuelve False, y las solicitudes que
+    superan `timeout` segundos desde que se encolaron, esperando en la cola
+    o en la predicción, se descartan antes de escribir: en ambos casos el
+    perfil conserva el grupo manual. La escritura, una vez iniciada, no se
+    corta; solo toca perfiles que siguen con el grupo provisional, así que
+    una escritura lenta nunca pisa una edición posterior.
+    """
+
+    def __init__(self, predict, write, max_queue=1000, max_batch=256, batch_window=0.005,
+                 timeout=2.0, workers=1):
+        self.predict = predict
+        self.write = write
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.timeout = timeout
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._threads = [
+            threading.Thread(target=self._run, name=f'assignment-{i}', daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    @property
+    def depth(self):
+        return self._queue.qsize()
+
+    def submit(self, profile_id, profile, provisional):
+        """
+        Encola la asignación del perfil. Devuelve False si la cola está llena.
+        """
+        try:
+            self._queue.put_nowait(AssignmentRequest(profile_id, profile, provisional))
+            return True
+        except queue.Full:
+            log_event('assignment.queue_full', logging.WARNING, profile_id=profile_id, depth=self.depth)
+            return False
+
+    def stop(self):
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+
+    def _collect(self, first):
+        """
+        Junta las solicitudes que llegan dentro de la ventana de agrupación
+        """
+        batch = [first]
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                # Devolver la señal para que este hilo termine tras el lote
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    def _fresh(self, batch):
+        """
+        Solicitudes dentro de su plazo; las vencidas se descartan
+        """
+        now = time.monotonic()
+        fresh = [r for r in batch if now - r.enqueued_at <= self.timeout]
+        if len(fresh) < len(batch):
+            log_event('assignment.timeout', logging.WARNING, dropped=len(batch) - len(fresh))
+        return fresh
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch = self._collect(first)
+
+            fresh = self._fresh(batch)
+            if not fresh:
+                continue
+
+            try:
+                result = self.predict([r.profile for r in fresh])
+                groups = dict(zip(fresh, result['groups']))
+                # Una predicción lenta también consume el plazo de cada solicitud
+                rows = [
+                    {'profile_id': r.profile_id, 'provisional': r.provisional, 'group': groups[r]}
+                    for r in self._fresh(fresh)
+                ]
+                if rows:
+                    self.write(rows)
+                log_event('assignment.batch', batch=len(rows), auto=int((~result['fallback']).sum()))
+            except Exception as e:
+                log_event('assignment.batch_error', logging.ERROR, error=e, batch=len(fresh))
+
+
+def profile_snapshot(profile):
+    """
+    Copia las respuestas usadas por el modelo para no compartir el objeto
+    ORM entre hilos
+    """
+    return SimpleNamespace(**{col: getattr(profile, col, None) for col in PROFILE_COLUMNS})
+
+
+def _predict_groups(app, profiles):
+    # Dentro del contexto para leer el umbral configurado
+    from utils import assign_groups
+    with app.app_context():
+        return assign_groups(profiles)
+
+
+def _write_groups(app, rows):
+    """
+    Escribe el grupo definitivo solo si el perfil sigue con el grupo
+    provisional con que se encoló (no pisa una edición más reciente) y
+    mueve los conteos por grupo del dashboard en la misma transacción
+    """
+    from sqlalchemy import bindparam, update
+    from __init__ import db
+    from models import UserProfile
+    from stats_snapshot import record_group_change
+    from user_cache import invalidate_users
+
+    changed = [row for row in rows if row['group'] != row['provisional']]
+    if not changed:
+        return
+    statement = (
+        update(UserProfile)
+        .where(UserProfile.id == bindparam('profile_id'))
+        .where(UserProfile.assigned_group == bindparam('provisional'))
+        .values(assigned_group=bindparam('group'))
+    )
+    with app.app_context():
+        try:
+            # Perfiles que siguen con el grupo provisional, bloqueados hasta el
+            # commit: solo esos se actualizan y se cuentan en las estadísticas
+            current = {
+                profile_id: (group, user_id) for profile_id, group, user_id in db.session.execute(
+                    db.select(UserProfile.id, UserProfile.assigned_group, UserProfile.user_id)
+                    .where(UserProfile.id.in_([row['profile_id'] for row in changed]))
+                    .with_for_update()
+                )
+            }
+            applied = [row for row in changed
+                       if current.get(row['profile_id'], (None,))[0] == row['provisional']]
+            if applied:
+                # executemany de Core: sin sincronizar objetos de la sesión
+                db.session.connection().execute(statement, applied)
+                moves = Counter((row['provisional'], row['group']) for row in applied)
+                for (old_group, new_group), count in moves.items():
+                    record_group_change(old_group, new_group, count)
+                # Los perfiles en caché de estos usuarios tienen el grupo provisional
+                invalidate_users(current[row['profile_id']][1] for row in applied)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        finally:
+            db.session.remove()
+
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+
+def get_assignment_batcher(app):
+    """
+    Obtiene (o inicia) el agrupador del proceso, configurado desde app.config
+    """
+    global _batcher
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                config = app.config
+                _batcher = AssignmentBatcher(
+                    predict=lambda profiles: _predict_groups(app, profiles),
+                    write=lambda rows: _write_groups(app, rows),
+                    max_queue=config.get('ASSIGNMENT_QUEUE_SIZE', 1000),
+                    max_batch=config.get('ASSIGNMENT_MAX_BATCH', 256),
+                    batch_window=config.get('ASSIGNMENT_BATCH_WINDOW_MS', 5) / 1000,
+                    timeout=config.get('ASSIGNMENT_TIMEOUT', 2.0),
+                    workers=config.get('ASSIGNMENT_WORKERS', 1),
+                )
+    return _batcher
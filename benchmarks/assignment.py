@@ -0,0 +1,229 @@
+"""
+Micro-benchmarks del camino de asignación de grupos.
+
+Uso (desde la raíz del repositorio):
+
+    python -m benchmarks.assignment --output bench.json
+    python -m benchmarks.assignment --baseline bench.json --threshold 15
+
+Genera perfiles sintéticos, mide cada camino con distintos tamaños de lote
+y guarda throughput, latencias p50/p99 y memoria pico en JSON. Con
+--baseline compara contra una corrida anterior y termina con código 1 si
+algún camino pierde más del porcentaje indicado de throughput.
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+import numpy as np
+
+from clustering.auto_assignment import AutoAssignment
+from clustering.encoder import NUMERIC_FEATURES
+from utils import _manual_assign_group
+
+DEFAULT_SIZES = [1, 10, 100, 1000, 10000, 100000]
+
+ROLES = ['profesor', 'director', 'asistente']
+SCHOOL_TYPES = ['rural', 'urbana', 'cientifico-humanista', 'tecnico-profesional']
+DEPENDENCIES = ['municipal', 'particular-subvencionada', 'particular-pagada']
+AGE_RANGES = ['20-30', '31-40', '41-50', '51+']
+FORMATS = ['en-linea', 'talleres', 'autoaprendizaje']
+
+
+def synthetic_profiles(n, seed=0):
+    """
+    Genera objetos con los mismos atributos que UserProfile
+    """
+    rng = np.random.default_rng(seed)
+    skills = rng.integers(1, 6, size=(n, len(NUMERIC_FEATURES)))
+    flags = rng.integers(0, 2, size=(n, 3)).astype(bool)
+    choice = lambda values: [values[i] for i in rng.integers(0, len(values), size=n)]
+    roles, schools, deps, ages, formats = (choice(ROLES), choice(SCHOOL_TYPES), choice(DEPENDENCIES),
+                                           choice(AGE_RANGES), choice(FORMATS))
+    profiles = []
+    for i in range(n):
+        profile = SimpleNamespace(**{col: int(skills[i, j]) for j, col in enumerate(NUMERIC_FEATURES)})
+        profile.interest_digital_literacy = bool(flags[i, 0])
+        profile.interest_educational_innovation = bool(flags[i, 1])
+        profile.interest_leadership = bool(flags[i, 2])
+        profile.role = roles[i]
+        profile.school_type = schools[i]
+        profile.dependency = deps[i]
+        profile.age_range = ages[i]
+        profile.learning_format = formats[i]
+        profiles.append(profile)
+    return profiles
+
+
+def build_assignment(model_path=None, n_clusters=4):
+    """
+    Carga el modelo indicado o entrena uno sintético en memoria
+    """
+    if model_path:
+        assignment = AutoAssignment(model_path=model_path)
+        if not assignment.load_model():
+            raise SystemExit(f"No se encontró el modelo en {model_path}")
+        return assignment
+
+    from clustering.training import IncrementalTrainer
+    profiles = synthetic_profiles(5000, seed=42)
+    chunks = lambda: (profiles[i:i + 1000] for i in range(0, len(profiles), 1000))
+    engine = IncrementalTrainer(chunks, n_clusters=n_clusters).train()
+    assignment = AutoAssignment(model_path=None)
+    assignment.scaler = engine.scaler
+    assignment.clustering_model = engine.kmeans
+    assignment.feature_engineer = engine.feature_engineer
+    assignment.cluster_mapping = engine.cluster_mapping
+    assignment.is_trained = True
+    assignment._prepare_centroids()
+    assignment.encoder = None
+    return assignment
+
+
+def benchmark_paths(assignment):
+    """
+    Caminos medidos: (nombre, función sobre un lote, es_por_perfil)
+    """
+    def per_profile(fn):
+        return lambda profiles: [fn(p) for p in profiles]
+
+    return [
+        ('manual_assign_group', per_profile(_manual_assign_group), True),
+        ('auto_assign_group', per_profile(assignment.assign_group), True),
+        ('get_assignment_confidence', per_profile(assignment.get_assignment_confidence), True),
+        ('prepare_user_profile', per_profile(assignment.prepare_user_profile), True),
+        ('predict_with_confidence', per_profile(assignment.predict_with_confidence), True),
+        ('assign_groups_batch', lambda profiles: assignment.assign_groups(profiles, confidence_threshold=0.7), False),
+    ]
+
+
+def measure(fn, profiles, per_profile, repeats):
+    """
+    Mide un camino sobre un lote y devuelve throughput, p50/p99 y memoria pico
+    """
+    latencies = []
+    elapsed_total = 0.0
+    for _ in range(repeats):
+        if per_profile:
+            start = time.perf_counter()
+            for profile in profiles:
+                t0 = time.perf_counter()
+                fn([profile])
+                latencies.append(time.perf_counter() - t0)
+            elapsed_total += time.perf_counter() - start
+        else:
+            t0 = time.perf_counter()
+            fn(profiles)
+            elapsed = time.perf_counter() - t0
+            latencies.append(elapsed)
+            elapsed_total += elapsed
+
+    # Memoria pico en una corrida aparte: tracemalloc distorsiona los tiempos
+    tracemalloc.start()
+    fn(profiles)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        'throughput': len(profiles) * repeats / elapsed_total if elapsed_total else float('inf'),
+        'p50_ms': float(np.percentile(latencies_ms, 50)),
+        'p99_ms': float(np.percentile(latencies_ms, 99)),
+        'peak_kb': peak / 1024,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True).strip()
+    except Exception:
+        return None
+
+
+def run(sizes, max_per_profile, repeats, model_path=None, paths=None):
+    assignment = build_assignment(model_path)
+    # Calentamiento: codificador, caches de sklearn, etc.
+    warmup = synthetic_profiles(10, seed=1)
+    for _, fn, _ in benchmark_paths(assignment):
+        fn(warmup)
+
+    results = []
+    for size in sizes:
+        profiles = synthetic_profiles(size, seed=size)
+        for name, fn, per_profile in benchmark_paths(assignment):
+            if paths and name not in paths:
+                continue
+            if per_profile and size > max_per_profile:
+                continue
+            stats = measure(fn, profiles, per_profile, repeats if size <= 1000 else 1)
+            results.append({'path': name, 'batch_size': size, **stats})
+            print(f"{name:<28} n={size:<7} {stats['throughput']:>12.0f} perfiles/s  "
+                  f"p50={stats['p50_ms']:.3f}ms  p99={stats['p99_ms']:.3f}ms  pico={stats['peak_kb']:.0f}KB")
+
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'timestamp': time.time(),
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, threshold):
+    """
+    Devuelve las regresiones de throughput mayores a `threshold` por ciento
+    """
+    previous = {(r['path'], r['batch_size']): r for r in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        before = previous.get((result['path'], result['batch_size']))
+        if not before or not before['throughput']:
+            continue
+        change = (result['throughput'] - before['throughput']) / before['throughput'] * 100
+        if change < -threshold:
+            regressions.append((result['path'], result['batch_size'], change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks de asignación de grupos.')
+    parser.add_argument('--sizes', type=int, nargs='*', default=DEFAULT_SIZES, help='Tamaños de lote')
+    parser.add_argument('--max-per-profile', type=int, default=10000,
+                        help='Tamaño máximo para los caminos que procesan perfil a perfil')
+    parser.add_argument('--repeats', type=int, default=3, help='Repeticiones para lotes pequeños')
+    parser.add_argument('--paths', nargs='*', default=None, help='Limitar a estos caminos')
+    parser.add_argument('--model-path', default=None, help='Modelo real en lugar de uno sintético')
+    parser.add_argument('--output', default=None, help='Archivo JSON de resultados')
+    parser.add_argument('--baseline', default=None, help='Resultados previos para comparar')
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help='Porcentaje de pérdida de throughput considerado regresión')
+    args = parser.parse_args(argv)
+
+    report = run(args.sizes, args.max_per_profile, args.repeats, args.model_path, args.paths)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Resultados guardados en {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        for path, size, change in regressions:
+            print(f"REGRESIÓN {path} n={size}: {change:.1f}% de throughput")
+        if regressions:
+            return 1
+        print(f"Sin regresiones mayores a {args.threshold}% respecto de {args.baseline}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""
+Benchmark de inicios de sesión por segundo con el hash de contraseñas en
+línea (como antes, en los hilos de la petición) y en el pool de hilos acotado.
+
+Uso (desde la raíz del repositorio):
+
+    python -m benchmarks.password_hashing --clients 16 --logins 200
+    python -m benchmarks.password_hashing --method pbkdf2:sha256:600000 --output hash.json
+
+Cada "cliente" es un hilo que verifica contraseñas en bucle, como un worker
+con hilos atendiendo /login. Se informa logins/s totales y por núcleo.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from password_hashing import PasswordHasher, PasswordHashingBusy
+
+
+def run_clients(verify, pwhash, clients, logins):
+    """
+    Ejecuta `logins` verificaciones repartidas entre `clients` hilos y
+    devuelve (segundos, rechazos por saturación)
+    """
+    rejected = []
+
+    def login(_):
+        try:
+            assert verify(pwhash, 'contraseña-de-prueba')
+        except PasswordHashingBusy:
+            rejected.append(1)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(login, range(logins)))
+    return time.perf_counter() - start, len(rejected)
+
+
+def run(method, clients, logins, workers):
+    pwhash = generate_password_hash('contraseña-de-prueba', method)
+    cores = os.cpu_count() or 1
+    results = []
+
+    elapsed, _ = run_clients(check_password_hash, pwhash, clients, logins)
+    results.append({'mode': 'inline', 'workers': 0, 'logins_per_s': logins / elapsed, 'rejected': 0})
+
+    # Cola suficiente para medir throughput sin rechazos
+    hasher = PasswordHasher(method=method, workers=workers, max_pending=clients, timeout=600)
+    hasher.verify(pwhash, 'contraseña-de-prueba')  # arranque de los hilos
+    elapsed, rejected = run_clients(lambda h, p: hasher.verify(h, p)[0], pwhash, clients, logins)
+    hasher.shutdown()
+    results.append({'mode': 'thread_pool', 'workers': hasher.workers,
+                    'logins_per_s': (logins - rejected) / elapsed, 'rejected': rejected})
+
+    for result in results:
+        result['logins_per_s_per_core'] = result['logins_per_s'] / cores
+        print(f"{result['mode']:<13} workers={result['workers']:<3} {result['logins_per_s']:>8.1f} logins/s  "
+              f"{result['logins_per_s_per_core']:>7.1f} por núcleo  rechazados={result['rejected']}")
+
+    return {
+        'meta': {'method': method, 'clients': clients, 'logins': logins, 'cores': cores,
+                 'python': platform.python_version(), 'timestamp': time.time()},
+        'results': results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark del hash de contraseñas en /login.')
+    parser.add_argument('--method', default='scrypt', help='Parámetros de hash de werkzeug')
+    parser.add_argument('--clients', type=int, default=16, help='Peticiones concurrentes')
+    parser.add_argument('--logins', type=int, default=200, help='Inicios de sesión por modo')
+    parser.add_argument('--workers', type=int, default=None, help='Hilos del pool (por defecto, DEFAULT_WORKERS)')
+    parser.add_argument('--output', default=None, help='Archivo JSON de resultados')
+    args = parser.parse_args(argv)
+
+    report = run(args.method, args.clients, args.logins, args.workers)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Resultados guardados en {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
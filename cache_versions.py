@@ -0,0 +1,83 @@
+"""
+Versiones de datos en la base de datos para invalidar cachés en memoria
+entre procesos (workers de gunicorn, scripts de carga)
+"""
+import threading
+import time
+from sqlalchemy import delete, update
+from __init__ import db
+from models import CacheVersion
+
+def get_version(name):
+    """
+    Lee la versión actual (una consulta por clave primaria)
+    """
+    return db.session.execute(
+        db.select(CacheVersion.version).where(CacheVersion.name == name)
+    ).scalar() or 0
+
+def bump_version(name):
+    """
+    Incrementa la versión dentro de la transacción actual; el llamador hace
+    commit junto con el cambio de datos
+    """
+    result = db.session.execute(
+        update(CacheVersion).where(CacheVersion.name == name).values(version=CacheVersion.version + 1)
+    )
+    if result.rowcount == 0:
+        db.session.add(CacheVersion(name=name, version=1))
+
+def set_version(name, value):
+    """
+    Fija la versión a un valor explícito (p. ej. una marca de agua)
+    """
+    result = db.session.execute(
+        update(CacheVersion).where(CacheVersion.name == name).values(version=value)
+    )
+    if result.rowcount == 0:
+        db.session.add(CacheVersion(name=name, version=value))
+
+def delete_version(name):
+    """
+    Elimina la fila (p. ej. una marca de agua que ya no se usa); get_version vuelve a 0
+    """
+    db.session.execute(delete(CacheVersion).where(CacheVersion.name == name))
+
+
+class VersionWatch:
+    """
+    Versión de un caché en memoria leída de la base de datos como máximo una
+    vez cada `check_interval` segundos. Por defecto es la fila `name` de
+    CacheVersion; `read` permite vigilar otro valor creciente.
+    """
+
+    def __init__(self, name, check_interval=2.0, read=None):
+        self.name = name
+        self.check_interval = check_interval
+        self.read = read or (lambda: get_version(name))
+        self.version = None
+        # -inf y no 0.0: monotonic() puede ser menor que el intervalo poco después del arranque
+        self._last_check = float('-inf')
+        self._lock = threading.Lock()
+
+    def poll(self):
+        """
+        Devuelve (versión, versión_anterior); son distintas solo en la
+        llamada que detecta el cambio. Si la lectura falla, el error se
+        propaga y no se reintenta hasta el próximo intervalo.
+        """
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return self.version, self.version
+        with self._lock:
+            if now - self._last_check < self.check_interval:
+                return self.version, self.version
+            self._last_check = now
+            previous, self.version = self.version, self.read()
+            return self.version, previous
+
+    def expire(self):
+        """
+        Fuerza la lectura en la próxima llamada (tras un cambio en este worker)
+        """
+        self._last_check = float('-inf')
@@ -0,0 +1,233 @@
+"""
+Ingesta de clics en cursos con buffer en memoria.
+
+track_course_view solo encola el clic y redirige. Un hilo vacía el buffer
+cada `max_events` clics o `flush_interval` segundos: inserta todas las filas
+de CourseView en un solo INSERT y suma los contadores con un UPDATE atómico
+por curso (views_count = views_count + n), sin leer el valor en Python.
+
+Si un lote falla, sus clics se escriben de a uno para aislar las filas
+inválidas (un curso borrado, por ejemplo): esas se descartan y se registran
+en el log, y el resto se reintenta con espera creciente un máximo de
+`max_attempts` veces.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from sqlalchemy.exc import DataError, IntegrityError
+
+logger = logging.getLogger(__name__)
+
+
+class ClickBuffer:
+    """
+    Buffer de clics (course_id, user_id, viewed_at). Los clics repetidos de
+    un mismo usuario sobre el mismo curso dentro de `dedupe_window` segundos
+    se descartan. Si la base de datos falla, los clics se reintentan en los
+    siguientes vaciados mientras no se supere `max_pending`; un clic que
+    falla `max_attempts` veces, o cuya fila es inválida (`permanent_errors`),
+    se descarta.
+    """
+
+    def __init__(self, flush, max_events=500, flush_interval=0.2, dedupe_window=10.0, max_pending=100000,
+                 max_attempts=10, max_backoff=30.0, permanent_errors=(IntegrityError, DataError)):
+        self.flush = flush
+        self.max_events = max_events
+        self.flush_interval = flush_interval
+        self.dedupe_window = dedupe_window
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self.max_backoff = max_backoff
+        self.permanent_errors = permanent_errors
+        self._events = []
+        self._recent = {}
+        self._attempts = {}
+        self._failures = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name='click-buffer', daemon=True)
+        self._thread.start()
+
+    def record(self, course_id, user_id):
+        """
+        Encola un clic. Devuelve False si se descartó por repetido o por
+        buffer lleno.
+        """
+        now = time.monotonic()
+        key = (user_id, course_id)
+        with self._lock:
+            last = self._recent.get(key)
+            if last is not None and now - last < self.dedupe_window:
+                return False
+            if len(self._events) >= self.max_pending:
+                logger.warning("Buffer de clics lleno; se descarta el clic en el curso %s", course_id)
+                return False
+            self._recent[key] = now
+            self._events.append((course_id, user_id, datetime.utcnow()))
+            full = len(self._events) >= self.max_events
+        # Mientras los vaciados fallan se respeta la espera creciente
+        if full and not self._failures:
+            self._wake.set()
+        return True
+
+    def _prune_recent(self, now):
+        cutoff = now - self.dedupe_window
+        self._recent = {key: seen for key, seen in self._recent.items() if seen >= cutoff}
+
+    def flush_now(self):
+        """
+        Vacía el buffer en el hilo actual
+        """
+        with self._lock:
+            events, self._events = self._events, []
+            self._prune_recent(time.monotonic())
+        if not events:
+            return 0
+        if len(events) == 1:
+            written, failed = self._flush_rows(events)
+        else:
+            try:
+                self.flush(events)
+                written, failed = events, []
+            except Exception:
+                logger.exception("Error guardando %d clics; se escriben de a uno", len(events))
+                written, failed = self._flush_rows(events)
+        for event in written:
+            self._attempts.pop(event, None)
+        if failed:
+            self._requeue(failed)
+        self._failures = self._failures + 1 if failed else 0
+        return len(written)
+
+    def _flush_rows(self, events):
+        """
+        Escribe los clics de a uno. Los inválidos se descartan; si el primero
+        falla por otro motivo la base sigue sin responder y el resto se
+        devuelve sin intentarlo. Devuelve (escritos, fallidos).
+        """
+        written, failed = [], []
+        for i, event in enumerate(events):
+            try:
+                self.flush([event])
+            except self.permanent_errors:
+                logger.exception("Clic inválido descartado: curso %s, usuario %s", event[0], event[1])
+                self._attempts.pop(event, None)
+                continue
+            except Exception:
+                failed.append(event)
+                if not written:
+                    logger.exception("Error guardando clics; %d se reintentarán", len(events) - i)
+                    failed.extend(events[i + 1:])
+                    break
+                continue
+            written.append(event)
+        return written, failed
+
+    def _requeue(self, events):
+        retry = []
+        for event in events:
+            attempts = self._attempts.get(event, 0) + 1
+            if attempts >= self.max_attempts:
+                logger.error("Clic descartado tras %d intentos: curso %s, usuario %s", attempts, event[0], event[1])
+                self._attempts.pop(event, None)
+            else:
+                self._attempts[event] = attempts
+                retry.append(event)
+        with self._lock:
+            # Los clics fallidos vuelven al inicio, respetando el límite
+            room = max(self.max_pending - len(self._events), 0)
+            dropped = retry[:-room] if room else retry
+            retry = retry[-room:] if room else []
+            self._events[:0] = retry
+        for event in dropped:
+            self._attempts.pop(event, None)
+
+    def _run(self):
+        while not self._stopped:
+            # Espera creciente mientras los vaciados fallan
+            wait = min(self.flush_interval * 2 ** self._failures, self.max_backoff)
+            self._wake.wait(wait)
+            self._wake.clear()
+            self.flush_now()
+
+    def stop(self):
+        self._stopped = True
+        self._wake.set()
+        self._thread.join()
+        self.flush_now()
+
+
+def write_clicks(events):
+    """
+    Guarda un lote de clics: un INSERT de CourseView, un UPDATE atómico por
+    curso, los deltas de la instantánea del dashboard y los sketches de
+    visitantes únicos, en una transacción
+    """
+    from sqlalchemy import bindparam, insert, update
+    from __init__ import db
+    from models import Course, CourseView
+    from course_coviews import forget_viewed
+    from stats_snapshot import record_group_views
+    from viewer_sketches import record_viewers
+
+    per_course = Counter(course_id for course_id, _, _ in events)
+    try:
+        db.session.execute(insert(CourseView), [
+            {'course_id': course_id, 'user_id': user_id, 'viewed_at': viewed_at}
+            for course_id, user_id, viewed_at in events
+        ])
+        db.session.connection().execute(
+            update(Course)
+            .where(Course.id == bindparam('course'))
+            .values(views_count=Course.views_count + bindparam('clicks')),
+            # En orden de id: los lotes concurrentes bloquean las filas en el mismo orden
+            [{'course': course_id, 'clicks': clicks} for course_id, clicks in sorted(per_course.items())]
+        )
+        groups = dict(db.session.execute(db.select(Course.id, Course.group).where(Course.id.in_(per_course))).all())
+        record_viewers(events, groups)
+        views_by_group = Counter()
+        for course_id, clicks in per_course.items():
+            views_by_group[groups.get(course_id)] += clicks
+        # Deltas del dashboard al final: los bloqueos de sus filas duran lo mínimo
+        record_group_views(views_by_group)
+        db.session.commit()
+        # Las recomendaciones de estos usuarios vuelven a leer sus cursos vistos
+        forget_viewed({user_id for _, user_id, _ in events})
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        db.session.remove()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def _flush_in_context(app, events):
+    with app.app_context():
+        write_clicks(events)
+
+
+def get_click_buffer(app):
+    """
+    Obtiene (o inicia) el buffer de clics del proceso, configurado desde app.config
+    """
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                config = app.config
+                _buffer = ClickBuffer(
+                    flush=lambda events: _flush_in_context(app, events),
+                    max_events=config.get('CLICK_FLUSH_EVENTS', 500),
+                    flush_interval=config.get('CLICK_FLUSH_MS', 200) / 1000,
+                    dedupe_window=config.get('CLICK_DEDUPE_SECONDS', 10.0),
+                )
+                # Vaciar lo pendiente al terminar el proceso
+                atexit.register(_buffer.stop)
+    return _buffer
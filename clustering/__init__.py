@@ -1,9 +1,17 @@
 # Modulo para el clustering de los usuarios de EduRecom
 
 from .auto_assignment import AutoAssignment
+from .encoder import ProfileEncoder
 from .feature_engineering import FeatureEngineer
+from .model_registry import ModelRegistry, get_model_registry
+
+# clustering.training importa sklearn.cluster y se importa solo desde los
+# scripts de entrenamiento
 
 __all__ = [
     'AutoAssignment',
-    'FeatureEngineer'
+    'FeatureEngineer',
+    'ProfileEncoder',
+    'ModelRegistry',
+    'get_model_registry'
 ]
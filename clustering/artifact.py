@@ -0,0 +1,179 @@
+"""
+Formato de artefacto mapeable en memoria para el modelo de clustering.
+
+Un bundle es un directorio con un `manifest.json` y arreglos `.npy`
+(centroides, media y escala del scaler). Los `.npy` se abren con mmap, de
+modo que los workers de gunicorn comparten las mismas páginas físicas, y la
+predicción se hace con NumPy puro, sin importar sklearn.
+"""
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+from .feature_engineering import FeatureEngineer
+
+BUNDLE_FORMAT = 'edurecom-kmeans-npy'
+MANIFEST_NAME = 'manifest.json'
+
+
+class NumpyKMeans:
+    """
+    Predictor K-Means de solo lectura sobre centroides mapeados en memoria
+    """
+
+    def __init__(self, cluster_centers):
+        self.cluster_centers_ = cluster_centers
+        self.n_clusters = cluster_centers.shape[0]
+        self._center_sq_norms = np.einsum('ij,ij->i', cluster_centers, cluster_centers)
+
+    def transform(self, X):
+        """
+        Distancias euclidianas de cada fila de X a cada centroide (N x k)
+        """
+        X = np.asarray(X, dtype=self.cluster_centers_.dtype)
+        sq = np.einsum('ij,ij->i', X, X)[:, None] - 2.0 * (X @ self.cluster_centers_.T) + self._center_sq_norms
+        np.maximum(sq, 0.0, out=sq)
+        return np.sqrt(sq)
+
+    def predict(self, X):
+        return np.argmin(self.transform(X), axis=1)
+
+
+class NumpyScaler:
+    """
+    Equivalente de solo lectura a un StandardScaler ajustado
+    """
+
+    def __init__(self, mean, scale):
+        self.mean_ = mean
+        self.scale_ = scale
+
+    def transform(self, X):
+        return (np.asarray(X, dtype=float) - self.mean_) / self.scale_
+
+
+def _write_array(directory, name, version, array):
+    """
+    Escribe el arreglo con un nombre versionado. La versión es un hash del
+    contenido: si el archivo ya existe no se toca, porque los workers pueden
+    tenerlo mapeado y reescribirlo en su lugar les mostraría un arreglo a
+    medias (SIGBUS). Los archivos nuevos se escriben en un temporal y se
+    renombran.
+    """
+    filename = f'{name}-{version}.npy'
+    path = os.path.join(directory, filename)
+    if os.path.exists(path):
+        return filename
+    tmp_path = f'{path}.tmp-{os.getpid()}'
+    with open(tmp_path, 'wb') as f:
+        np.save(f, np.ascontiguousarray(array))
+    os.replace(tmp_path, path)
+    return filename
+
+
+def save_bundle(assignment, directory):
+    """
+    Exporta un AutoAssignment entrenado como bundle .npy + manifest.
+
+    Los arreglos se escriben con nombres versionados y el manifest se
+    reemplaza de forma atómica al final. Se conservan los archivos de la
+    versión anterior, que un worker puede estar abriendo justo ahora; los
+    de versiones más antiguas se eliminan en esta exportación.
+    """
+    if not assignment.is_trained or assignment.clustering_model is None:
+        raise ValueError("El modelo no está entrenado")
+
+    feature_engineer = assignment.feature_engineer
+    scaler = getattr(feature_engineer, 'scaler', None)
+    if scaler is None:
+        scaler = assignment.scaler
+    if scaler is None or not hasattr(scaler, 'mean_'):
+        raise ValueError("El modelo no tiene un scaler ajustado")
+
+    os.makedirs(directory, exist_ok=True)
+    centers = np.asarray(assignment.clustering_model.cluster_centers_, dtype=np.float32)
+    mean = np.asarray(scaler.mean_, dtype=np.float64)
+    scale = np.asarray(scaler.scale_, dtype=np.float64)
+
+    digest = hashlib.sha256()
+    for array in (centers, mean, scale):
+        digest.update(array.tobytes())
+    version = digest.hexdigest()[:12]
+
+    files = {
+        'centroids': _write_array(directory, 'centroids', version, centers),
+        'scaler_mean': _write_array(directory, 'scaler_mean', version, mean),
+        'scaler_scale': _write_array(directory, 'scaler_scale', version, scale),
+    }
+    manifest = {
+        'format': BUNDLE_FORMAT,
+        'version': version,
+        'created_at': time.time(),
+        'n_clusters': int(centers.shape[0]),
+        'n_features': int(centers.shape[1]),
+        'categories': getattr(feature_engineer, 'categories', None) or {},
+        'cluster_mapping': {str(k): v for k, v in (assignment.cluster_mapping or {}).items()},
+        'files': files,
+    }
+
+    manifest_path = os.path.join(directory, MANIFEST_NAME)
+    keep = set(files.values())
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            keep.update(json.load(f).get('files', {}).values())
+    except (OSError, ValueError):
+        pass
+
+    tmp_path = f'{manifest_path}.tmp-{os.getpid()}'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+    for name in os.listdir(directory):
+        if name.endswith('.npy') and name not in keep:
+            os.remove(os.path.join(directory, name))
+    return manifest
+
+
+def is_bundle(path):
+    """
+    Indica si la ruta apunta a un bundle (directorio o manifest.json)
+    """
+    if not path:
+        return False
+    return os.path.isdir(path) or os.path.basename(path) == MANIFEST_NAME
+
+
+def manifest_path(path):
+    return os.path.join(path, MANIFEST_NAME) if os.path.isdir(path) else path
+
+
+def load_bundle(path):
+    """
+    Abre un bundle con mmap y devuelve los mismos campos que el pickle de
+    AutoAssignment.save_model
+    """
+    manifest_file = manifest_path(path)
+    directory = os.path.dirname(manifest_file)
+    with open(manifest_file, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('format') != BUNDLE_FORMAT:
+        raise ValueError(f"Formato de bundle desconocido: {manifest.get('format')}")
+
+    files = manifest['files']
+    centers = np.load(os.path.join(directory, files['centroids']), mmap_mode='r')
+    mean = np.load(os.path.join(directory, files['scaler_mean']), mmap_mode='r')
+    scale = np.load(os.path.join(directory, files['scaler_scale']), mmap_mode='r')
+
+    scaler = NumpyScaler(mean, scale)
+    return {
+        'clustering_model': NumpyKMeans(centers),
+        'scaler': scaler,
+        'feature_engineer': FeatureEngineer(scaler=scaler, categories=manifest.get('categories')),
+        'cluster_mapping': {int(k): v for k, v in manifest.get('cluster_mapping', {}).items()},
+        'is_trained': True,
+        'version': manifest.get('version'),
+    }
@@ -1,8 +1,14 @@
+import logging
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import StandardScaler
 import joblib
 import os
+from .artifact import is_bundle, load_bundle
+from .events import log_event
+from .encoder import NUMERIC_FEATURES, BOOLEAN_FEATURES, ProfileEncoder
+from .lookup import AssignmentLookup
+
+REQUIRED_SKILLS = ['digital_tools_skill', 'advanced_tic_skill', 'digital_citizenship_skill', 'teaching_tech_skill']
 
 class AutoAssignment:
     """
@@ -12,10 +18,17 @@ class AutoAssignment:
     def __init__(self, model_path='clustering_model.pkl'):
         self.model_path = model_path
         self.clustering_model = None
-        self.scaler = StandardScaler()
+        # El scaler se crea al entrenar o cargar; sklearn se importa solo si
+        # hace falta, para que los bundles .npy no lo requieran
+        self.scaler = None
         self.feature_engineer = None
         self.cluster_mapping = None
         self.is_trained = False
+        self.model_version = None
+        self.centroid_norms = None
+        self.max_centroid_norm = None
+        self.encoder = None
+        self.lookup = None
         
     def train_model(self, clustering_engine, feature_engineer, cluster_mapping):
         """
@@ -25,11 +38,13 @@ class AutoAssignment:
         self.feature_engineer = feature_engineer
         self.cluster_mapping = cluster_mapping
         self.is_trained = True
+        self._prepare_centroids()
+        self.encoder = ProfileEncoder.from_assignment(self)
         
         # Guardar modelo
         self.save_model()
         
-        print("✅ Modelo de asignación automática entrenado y guardado")
+        log_event('model.trained', logging.INFO, clusters=len(self.cluster_mapping or {}))
         
     def save_model(self):
         """
@@ -43,35 +58,76 @@ class AutoAssignment:
             'is_trained': self.is_trained
         }
         
-        joblib.dump(model_data, self.model_path)
-        print(f"💾 Modelo guardado en: {self.model_path}")
+        # Escribir a un archivo temporal y renombrar, para que los procesos
+        # que recargan el modelo nunca lean un artefacto a medio escribir
+        tmp_path = f"{self.model_path}.tmp-{os.getpid()}"
+        joblib.dump(model_data, tmp_path)
+        os.replace(tmp_path, self.model_path)
+        log_event('model.saved', logging.INFO, path=self.model_path)
         
     def load_model(self):
         """
         Carga el modelo entrenado
         """
         if os.path.exists(self.model_path):
-            model_data = joblib.load(self.model_path)
+            if is_bundle(self.model_path):
+                # Bundle .npy mapeado en memoria (compartido entre workers)
+                model_data = load_bundle(self.model_path)
+            else:
+                model_data = joblib.load(self.model_path)
             
             self.clustering_model = model_data['clustering_model']
             self.scaler = model_data['scaler']
             self.feature_engineer = model_data['feature_engineer']
             self.cluster_mapping = model_data['cluster_mapping']
             self.is_trained = model_data['is_trained']
+            self._prepare_centroids()
+            self.encoder = ProfileEncoder.from_assignment(self)
             
-            print(f"📂 Modelo cargado desde: {self.model_path}")
+            log_event('model.loaded', logging.INFO, path=self.model_path)
             return True
         else:
-            print(f"❌ No se encontró el modelo en: {self.model_path}")
+            log_event('model.not_found', logging.WARNING, path=self.model_path)
             return False
     
+    def _prepare_centroids(self):
+        """
+        Precalcula las normas de los centroides usadas para la confianza
+        """
+        if self.clustering_model is None:
+            self.centroid_norms = None
+            self.max_centroid_norm = None
+            return
+        centers = np.asarray(self.clustering_model.cluster_centers_, dtype=float)
+        self.centroid_norms = np.linalg.norm(centers, axis=1)
+        self.max_centroid_norm = float(np.max(self.centroid_norms))
+    
+    def _score_distances(self, distances):
+        """
+        A partir de la matriz de distancias (N x k) obtiene el cluster más
+        cercano, la confianza y el margen frente al segundo centroide, ambos
+        normalizados por la norma máxima de los centroides
+        """
+        distances = np.atleast_2d(distances)
+        n = distances.shape[0]
+        clusters = np.argmin(distances, axis=1)
+        nearest = distances[np.arange(n), clusters]
+        if distances.shape[1] > 1:
+            second = np.partition(distances, 1, axis=1)[:, 1]
+        else:
+            second = nearest
+        max_distance = self.max_centroid_norm or 1.0
+        confidences = np.clip(1 - nearest / max_distance, 0.0, 1.0)
+        margins = (second - nearest) / max_distance
+        return clusters, confidences, margins
+    
     def prepare_user_profile(self, user_profile):
         """
         Prepara el perfil del usuario para clustering
         """
         try:
             if not user_profile:
-                print("❌ Error: Perfil de usuario es None")
+                log_event('assignment.profile_missing', logging.WARNING, path='prepare')
                 return None
             
             # Crear DataFrame con el perfil del usuario, manejando valores None
@@ -93,15 +149,14 @@ class AutoAssignment:
             }
             
             df = pd.DataFrame(profile_data)
-            print(f"📊 Perfil preparado: {df.shape}")
+            log_event('assignment.profile_prepared', shape=df.shape)
             
             # Aplicar preprocesamiento
             if self.feature_engineer:
                 try:
                     df_processed = self.feature_engineer.create_clustering_features(df)
-                    print("✅ Características de clustering creadas")
                 except Exception as e:
-                    print(f"❌ Error creando características: {e}")
+                    log_event('assignment.features_fallback', logging.WARNING, error=e)
                     # Fallback a preprocesamiento básico
                     df_processed = self._basic_preprocessing(df)
             else:
@@ -111,7 +166,7 @@ class AutoAssignment:
             return df_processed
             
         except Exception as e:
-            print(f"❌ Error en prepare_user_profile: {e}")
+            log_event('assignment.prepare_error', logging.ERROR, error=e)
             return None
     
     def _basic_preprocessing(self, df):
@@ -119,27 +174,30 @@ class AutoAssignment:
         Preprocesamiento básico cuando no hay feature engineer
         """
         try:
-            numeric_cols = ['digital_tools_skill', 'advanced_tic_skill', 'digital_citizenship_skill', 
-                           'teaching_tech_skill', 'leadership_support', 'resource_support']
-            boolean_cols = ['interest_digital_literacy', 'interest_educational_innovation', 'interest_leadership']
+            numeric_cols = list(NUMERIC_FEATURES)
+            boolean_cols = list(BOOLEAN_FEATURES)
             
             # Convertir booleanos a numéricos
             for col in boolean_cols:
                 if col in df.columns:
                     df[col] = df[col].astype(int)
             
-            # Normalizar variables numéricas
+            # Normalizar variables numéricas con el scaler del modelo si está
+            # ajustado; si no, con uno desechable para no mutar el compartido
             if numeric_cols:
-                df[numeric_cols] = self.scaler.fit_transform(df[numeric_cols])
+                if hasattr(self.scaler, 'mean_'):
+                    df[numeric_cols] = self.scaler.transform(df[numeric_cols])
+                else:
+                    from sklearn.preprocessing import StandardScaler
+                    df[numeric_cols] = StandardScaler().fit_transform(df[numeric_cols])
                 df_processed = df[numeric_cols + boolean_cols]
             else:
                 df_processed = df
             
-            print("✅ Preprocesamiento básico completado")
             return df_processed
             
         except Exception as e:
-            print(f"❌ Error en preprocesamiento básico: {e}")
+            log_event('assignment.preprocessing_error', logging.ERROR, error=e)
             return df
     
     def assign_group(self, user_profile):
@@ -148,49 +206,92 @@ class AutoAssignment:
         """
         try:
             if not user_profile:
-                print("❌ Error: Perfil de usuario es None")
+                log_event('assignment.profile_missing', logging.WARNING)
                 return self._manual_assignment(user_profile)
             
             if not self.is_trained:
                 if not self.load_model():
-                    print("❌ No se pudo cargar el modelo. Usando asignación manual.")
+                    log_event('assignment.model_unavailable', logging.WARNING)
                     return self._manual_assignment(user_profile)
             
             # Preparar perfil del usuario
             try:
                 profile_df = self.prepare_user_profile(user_profile)
                 if profile_df is None or profile_df.empty:
-                    print("❌ Error al preparar perfil del usuario")
+                    log_event('assignment.prepare_error', logging.ERROR)
                     return self._manual_assignment(user_profile)
             except Exception as e:
-                print(f"❌ Error preparando perfil: {e}")
+                log_event('assignment.prepare_error', logging.ERROR, error=e)
                 return self._manual_assignment(user_profile)
             
             # Predecir cluster
             try:
                 cluster_prediction = self.clustering_model.predict(profile_df)
                 cluster_id = cluster_prediction[0]
-                print(f"🔍 Cluster predicho: {cluster_id}")
+                log_event('assignment.cluster_predicted', cluster=cluster_id)
             except Exception as e:
-                print(f"❌ Error prediciendo cluster: {e}")
+                log_event('assignment.predict_error', logging.ERROR, error=e)
                 return self._manual_assignment(user_profile)
             
             # Mapear cluster a grupo de formación
             if self.cluster_mapping and cluster_id in self.cluster_mapping:
                 assigned_group = self.cluster_mapping[cluster_id]
-                print(f"🤖 Asignación automática: Cluster {cluster_id} → {assigned_group}")
+                log_event('assignment.auto', logging.INFO, cluster=cluster_id, group=assigned_group)
             else:
                 # Fallback a asignación manual
-                print(f"⚠️  Cluster {cluster_id} no encontrado en mapeo, usando manual")
+                log_event('assignment.unmapped_cluster', logging.WARNING, cluster=cluster_id)
                 assigned_group = self._manual_assignment(user_profile)
             
             return assigned_group
             
         except Exception as e:
-            print(f"❌ Error general en asignación automática: {e}")
-            print("🔄 Usando asignación manual como fallback")
+            log_event('assignment.auto_error', logging.ERROR, error=e)
             return self._manual_assignment(user_profile)
     
+    def predict_with_confidence(self, user_profile):
+        """
+        Predice cluster, grupo, confianza y margen con una sola codificación
+        del perfil y un único cálculo de distancias a todos los centroides.
+        
+        Devuelve (cluster_id, grupo, confianza, margen). El grupo es None
+        cuando el cluster no está en el mapeo o la predicción falla.
+        """
+        if not self.is_trained and not self.load_model():
+            return None, None, 0.0, 0.0
+        
+        if not user_profile:
+            return None, None, 0.0, 0.0
+        
+        # Con tabla precompilada la predicción es un índice y una lectura
+        if self.lookup is not None:
+            return self.lookup.predict(user_profile)
+        return self._predict_direct(user_profile)
+    
+    def _predict_direct(self, user_profile):
+        """
+        Predicción sin tabla: codifica el perfil y calcula las distancias
+        """
+        # Codificación directa a una fila float32, sin construir un DataFrame
+        row = self._get_encoder().encode(user_profile)
+        clusters, confidences, margins = self._score_distances(self.clustering_model.transform(row))
+        cluster_id = int(clusters[0])
+        group = (self.cluster_mapping or {}).get(cluster_id)
+        log_event('assignment.cluster_predicted', cluster=cluster_id)
+        return cluster_id, group, float(confidences[0]), float(margins[0])
+    
+    def enable_lookup_table(self, memory_budget_bytes=64 * 1024 * 1024, lru_size=50000):
+        """
+        Precompila la asignación para todo el espacio discreto de perfiles
+        (o, si no cabe en el presupuesto, activa un memo LRU)
+        """
+        if not self.is_trained:
+            return None
+        self.lookup = AssignmentLookup(self, memory_budget_bytes=memory_budget_bytes, lru_size=lru_size)
+        mode = "tabla" if self.lookup.is_table else "memo LRU"
+        log_event('model.lookup_ready', logging.INFO, mode=mode, combinations=self.lookup.size,
+                  megabytes=round(self.lookup.memory_bytes / 1024 / 1024, 1))
+        return self.lookup
+    
     def _manual_assignment(self, user_profile):
         """
         Asignación manual basada en el algoritmo original
@@ -241,24 +342,74 @@ class AutoAssignment:
         try:
             profile_df = self.prepare_user_profile(user_profile)
             
-            # Calcular distancia al centroide más cercano
-            cluster_prediction = self.clustering_model.predict(profile_df)
-            cluster_id = cluster_prediction[0]
-            
-            # Distancia al centroide
-            centroid = self.clustering_model.cluster_centers_[cluster_id]
-            distance = np.linalg.norm(profile_df.values[0] - centroid)
-            
-            # Convertir distancia a confianza (menor distancia = mayor confianza)
-            max_distance = np.max([np.linalg.norm(centroid) for centroid in self.clustering_model.cluster_centers_])
-            confidence = 1 - (distance / max_distance)
-            
-            return max(0.0, min(1.0, confidence))
+            # Distancia al centroide más cercano, convertida a confianza
+            # (menor distancia = mayor confianza)
+            _, confidences, _ = self._score_distances(self.clustering_model.transform(profile_df))
+            return float(confidences[0])
             
         except Exception as e:
-            print(f"❌ Error calculando confianza: {e}")
+            log_event('assignment.confidence_error', logging.ERROR, error=e)
             return 0.5  # Confianza media por defecto
     
+    def _get_encoder(self):
+        """
+        Devuelve el codificador compacto, creándolo si el modelo no lo trae
+        """
+        if self.encoder is None:
+            self.encoder = ProfileEncoder.from_assignment(self)
+        return self.encoder
+    
+    def assign_groups(self, user_profiles, confidence_threshold=None):
+        """
+        Asigna grupos a varios perfiles con una sola llamada al modelo.
+        
+        Devuelve un diccionario de arreglos alineados con la entrada:
+        'groups', 'clusters', 'confidences', 'margins' y 'fallback' (True cuando se usó
+        la asignación manual). Si se indica `confidence_threshold`, las filas
+        con confianza menor o igual usan la asignación manual, igual que
+        utils.assign_group.
+        """
+        user_profiles = list(user_profiles)
+        n = len(user_profiles)
+        groups = np.empty(n, dtype=object)
+        clusters = np.full(n, -1, dtype=int)
+        confidences = np.zeros(n, dtype=float)
+        margins = np.zeros(n, dtype=float)
+        fallback = np.ones(n, dtype=bool)
+        
+        if n == 0:
+            return {'groups': groups, 'clusters': clusters, 'confidences': confidences,
+                    'margins': margins, 'fallback': fallback}
+        
+        if self.is_trained or self.load_model():
+            try:
+                distances = self.clustering_model.transform(self._get_encoder().encode_batch(user_profiles))
+                clusters, confidences, margins = self._score_distances(distances)
+                
+                mapping = self.cluster_mapping or {}
+                for i, cluster_id in enumerate(clusters):
+                    group = mapping.get(cluster_id)
+                    if group is not None:
+                        groups[i] = group
+                        fallback[i] = False
+            except Exception as e:
+                log_event('assignment.batch_error', logging.ERROR, error=e, size=n)
+                fallback[:] = True
+        
+        # Perfiles ausentes o incompletos siempre van por la asignación manual
+        for i, user_profile in enumerate(user_profiles):
+            if user_profile is None or any(getattr(user_profile, f, None) is None for f in REQUIRED_SKILLS):
+                fallback[i] = True
+        if confidence_threshold is not None:
+            fallback |= confidences <= confidence_threshold
+        
+        for i in np.flatnonzero(fallback):
+            user_profile = user_profiles[i]
+            groups[i] = self._manual_assignment(user_profile) if user_profile is not None else "Alfabetización Digital Básica"
+        
+        return {'groups': groups, 'clusters': clusters, 'confidences': confidences,
+                'margins': margins, 'fallback': fallback}
+    
     def compare_assignments(self, user_profile):
         """
         Compara asignación automática vs manual
@@ -274,11 +425,8 @@ class AutoAssignment:
             'agreement': auto_group == manual_group
         }
         
-        print(f"📊 Comparación de asignaciones:")
-        print(f"   Automática: {auto_group}")
-        print(f"   Manual: {manual_group}")
-        print(f"   Confianza: {confidence:.2f}")
-        print(f"   Acuerdo: {'✅' if comparison['agreement'] else '❌'}")
+        log_event('assignment.comparison', logging.INFO, auto=auto_group, manual=manual_group,
+                  confidence=round(confidence, 3), agreement=comparison['agreement'])
         
         return comparison
     
@@ -292,6 +440,7 @@ class AutoAssignment:
         info = {
             "status": "Entrenado",
             "model_path": self.model_path,
+            "model_version": self.model_version,
             "n_clusters": self.clustering_model.n_clusters if self.clustering_model else None,
             "cluster_mapping": self.cluster_mapping
         }
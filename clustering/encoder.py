@@ -0,0 +1,156 @@
+"""
+Codificador compacto de perfiles para el camino crítico de asignación
+"""
+import threading
+
+import numpy as np
+
+NUMERIC_FEATURES = ['digital_tools_skill', 'advanced_tic_skill', 'digital_citizenship_skill',
+                    'teaching_tech_skill', 'leadership_support', 'resource_support']
+BOOLEAN_FEATURES = ['interest_digital_literacy', 'interest_educational_innovation', 'interest_leadership']
+
+# Variables categóricas y su valor por defecto (igual que prepare_user_profile)
+CATEGORICAL_DEFAULTS = {
+    'role': 'profesor',
+    'school_type': 'urbana',
+    'dependency': 'municipal',
+    'age_range': '31-40',
+    'learning_format': 'en-linea',
+}
+CATEGORICAL_FEATURES = list(CATEGORICAL_DEFAULTS)
+
+NUMERIC_DEFAULT = 3
+
+
+def scaler_statistics(scaler):
+    """
+    Extrae media y escala de un StandardScaler ajustado, o (None, None)
+    si el scaler no fue ajustado
+    """
+    if scaler is None or not hasattr(scaler, 'mean_'):
+        return None, None
+    n = len(NUMERIC_FEATURES)
+    mean = scaler.mean_ if scaler.mean_ is not None else np.zeros(n)
+    scale = scaler.scale_ if scaler.scale_ is not None else np.ones(n)
+    return np.asarray(mean, dtype=np.float32), np.asarray(scale, dtype=np.float32)
+
+
+class ProfileEncoder:
+    """
+    Escribe un perfil directamente en una fila float32 con layout fijo:
+    habilidades normalizadas, intereses (0/1) y, si el artefacto del modelo
+    las declara, columnas one-hot para las variables categóricas.
+    """
+
+    def __init__(self, mean=None, scale=None, categories=None):
+        self.mean = None if mean is None else np.asarray(mean, dtype=np.float32)
+        self.scale = None if scale is None else np.asarray(scale, dtype=np.float32)
+        self.categories = {col: list(values) for col, values in (categories or {}).items()
+                           if col in CATEGORICAL_DEFAULTS}
+
+        self.feature_names = list(NUMERIC_FEATURES) + list(BOOLEAN_FEATURES)
+        # Tablas de búsqueda one-hot: columna -> {valor: índice en la fila}
+        self.one_hot = {}
+        for col in CATEGORICAL_FEATURES:
+            if col not in self.categories:
+                continue
+            table = {}
+            for value in self.categories[col]:
+                table[value] = len(self.feature_names)
+                self.feature_names.append(f'{col}_{value}')
+            self.one_hot[col] = table
+        self.n_features = len(self.feature_names)
+        self._buffers = threading.local()
+
+    @classmethod
+    def from_assignment(cls, auto_assignment):
+        """
+        Construye el codificador a partir del scaler y el FeatureEngineer
+        guardados en el artefacto del modelo
+        """
+        feature_engineer = auto_assignment.feature_engineer
+        scaler = getattr(feature_engineer, 'scaler', None)
+        if scaler is None:
+            scaler = auto_assignment.scaler
+        mean, scale = scaler_statistics(scaler)
+        categories = getattr(feature_engineer, 'categories', None)
+        return cls(mean=mean, scale=scale, categories=categories)
+
+    def _row_buffer(self):
+        row = getattr(self._buffers, 'row', None)
+        if row is None:
+            row = np.empty((1, self.n_features), dtype=np.float32)
+            self._buffers.row = row
+        return row
+
+    def encode_into(self, user_profile, out):
+        """
+        Escribe el perfil en `out` (arreglo float32 de largo n_features)
+        """
+        out[:] = 0.0
+        n_numeric = len(NUMERIC_FEATURES)
+        if self.mean is not None:
+            for j, col in enumerate(NUMERIC_FEATURES):
+                value = getattr(user_profile, col, None) or NUMERIC_DEFAULT
+                out[j] = (value - self.mean[j]) / self.scale[j]
+        # Sin scaler ajustado el camino con DataFrame estandariza cada fila
+        # sobre sí misma, por lo que las habilidades quedan en 0
+
+        for j, col in enumerate(BOOLEAN_FEATURES):
+            if getattr(user_profile, col, False):
+                out[n_numeric + j] = 1.0
+
+        for col, table in self.one_hot.items():
+            value = getattr(user_profile, col, None) or CATEGORICAL_DEFAULTS[col]
+            index = table.get(value)
+            if index is not None:
+                out[index] = 1.0
+        return out
+
+    def encode(self, user_profile, out=None):
+        """
+        Codifica un perfil en una matriz (1 x n_features). Sin `out` se reutiliza
+        un búfer preasignado por hilo, que se sobrescribe en la siguiente llamada.
+        """
+        if out is None:
+            out = self._row_buffer()
+        self.encode_into(user_profile, out[0])
+        return out
+
+    def encode_batch(self, user_profiles, out=None):
+        """
+        Codifica N perfiles en una matriz (N x n_features)
+        """
+        user_profiles = list(user_profiles)
+        if out is None:
+            out = np.empty((len(user_profiles), self.n_features), dtype=np.float32)
+        for i, user_profile in enumerate(user_profiles):
+            if user_profile is None:
+                out[i] = 0.0
+                continue
+            self.encode_into(user_profile, out[i])
+        return out
+
+    def encode_columns(self, columns):
+        """
+        Codifica columnas completas (dict nombre -> arreglo) sin recorrer los
+        perfiles uno a uno. Las habilidades ausentes (NaN o 0) toman el valor
+        por defecto, igual que en encode_into.
+        """
+        n = len(columns[NUMERIC_FEATURES[0]])
+        out = np.zeros((n, self.n_features), dtype=np.float32)
+        n_numeric = len(NUMERIC_FEATURES)
+        if self.mean is not None:
+            for j, col in enumerate(NUMERIC_FEATURES):
+                values = np.asarray(columns[col], dtype=np.float32)
+                values = np.where(np.isnan(values) | (values == 0), NUMERIC_DEFAULT, values).astype(np.float32)
+                out[:, j] = (values - self.mean[j]) / self.scale[j]
+        for j, col in enumerate(BOOLEAN_FEATURES):
+            out[:, n_numeric + j] = np.asarray(columns[col], dtype=bool)
+        for col, table in self.one_hot.items():
+            values = np.asarray(columns[col], dtype=object)
+            missing = np.array([not value for value in values], dtype=bool)
+            values = np.where(missing, CATEGORICAL_DEFAULTS[col], values)
+            for value, index in table.items():
+                out[:, index] = values == value
+        return out
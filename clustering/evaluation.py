@@ -0,0 +1,173 @@
+"""
+Evaluación por lotes del acuerdo entre la asignación automática y la manual
+"""
+import csv
+
+import numpy as np
+
+from .encoder import BOOLEAN_FEATURES, CATEGORICAL_FEATURES, NUMERIC_FEATURES
+
+# Grupos que puede producir la asignación manual, en el orden de sus reglas
+MANUAL_GROUPS = [
+    "Alfabetización Digital Básica",
+    "Fortalecimiento Institucional",
+    "Innovación Educativa",
+    "Habilidades Digitales Avanzadas",
+]
+UNMAPPED = "Sin mapeo"
+
+PROFILE_COLUMNS = NUMERIC_FEATURES + BOOLEAN_FEATURES + CATEGORICAL_FEATURES
+DIGITAL_SKILLS = NUMERIC_FEATURES[:4]
+SUPPORT_SKILLS = NUMERIC_FEATURES[4:]
+
+
+def _mean_or_default(matrix, default=3.0):
+    """
+    Promedio por fila ignorando NaN; las filas sin valores válidos toman el
+    valor por defecto (igual que _manual_assign_group)
+    """
+    valid = ~np.isnan(matrix)
+    counts = valid.sum(axis=1)
+    sums = np.where(valid, matrix, 0.0).sum(axis=1)
+    return np.where(counts > 0, sums / np.maximum(counts, 1), default)
+
+
+def manual_group_codes(columns):
+    """
+    Reglas de _manual_assign_group como máscaras NumPy. Devuelve el índice
+    en MANUAL_GROUPS de cada perfil.
+    """
+    digital = _mean_or_default(np.column_stack([np.asarray(columns[c], dtype=float) for c in DIGITAL_SKILLS]))
+    support = _mean_or_default(np.column_stack([np.asarray(columns[c], dtype=float) for c in SUPPORT_SKILLS]))
+    leadership = np.asarray(columns['interest_leadership'], dtype=bool)
+    innovation = np.asarray(columns['interest_educational_innovation'], dtype=bool)
+
+    basic = digital < 3
+    institutional = ~basic & ((support < 3) | leadership)
+    innovative = ~basic & ~institutional & innovation
+
+    codes = np.full(len(digital), 3, dtype=np.int64)
+    codes[innovative] = 2
+    codes[institutional] = 1
+    codes[basic] = 0
+    return codes
+
+
+def rows_to_columns(rows):
+    """
+    Convierte filas (tuplas con nombre o perfiles) en arreglos por columna;
+    los None de las habilidades quedan como NaN
+    """
+    if rows and hasattr(rows[0], '_fields'):
+        # Filas de SQLAlchemy: una sola transposición en C
+        transposed = dict(zip(rows[0]._fields, zip(*rows)))
+        get = transposed.__getitem__
+    else:
+        get = lambda col: [getattr(r, col) for r in rows]
+
+    columns = {}
+    for col in NUMERIC_FEATURES:
+        columns[col] = np.array(get(col), dtype=float)
+    for col in BOOLEAN_FEATURES:
+        columns[col] = np.array([bool(v) for v in get(col)], dtype=bool)
+    for col in CATEGORICAL_FEATURES:
+        columns[col] = np.array(get(col), dtype=object)
+    return columns
+
+
+class AgreementEvaluator:
+    """
+    Acumula, bloque a bloque, la matriz de confusión automática vs manual,
+    el acuerdo por grupo, el histograma de confianza y la curva de acuerdo
+    en función del umbral. Toda la aritmética es vectorizada por bloque.
+    """
+
+    def __init__(self, assignment, bins=100):
+        self.assignment = assignment
+        self.encoder = assignment._get_encoder()
+        self.bins = bins
+
+        mapped = sorted(set((assignment.cluster_mapping or {}).values()) - set(MANUAL_GROUPS))
+        self.labels = MANUAL_GROUPS + mapped + [UNMAPPED]
+        label_index = {label: i for i, label in enumerate(self.labels)}
+        # cluster -> índice de etiqueta automática
+        self.cluster_labels = np.full(assignment.clustering_model.n_clusters, label_index[UNMAPPED], dtype=np.int64)
+        for cluster_id, group in (assignment.cluster_mapping or {}).items():
+            self.cluster_labels[int(cluster_id)] = label_index[group]
+
+        n_labels = len(self.labels)
+        self.confusion = np.zeros((n_labels, n_labels), dtype=np.int64)
+        # Casilla k: confianza en (k-1)/bins, k/bins]; la casilla 0 es confianza 0
+        self.confidence_counts = np.zeros(bins + 1, dtype=np.int64)
+        self.agreement_counts = np.zeros(bins + 1, dtype=np.int64)
+        self.total = 0
+
+    def update(self, columns):
+        """
+        Procesa un bloque de perfiles dado como columnas (ver rows_to_columns)
+        """
+        n = len(columns[NUMERIC_FEATURES[0]])
+        if n == 0:
+            return
+        distances = self.assignment.clustering_model.transform(self.encoder.encode_columns(columns))
+        clusters, confidences, _ = self.assignment._score_distances(distances)
+        auto = self.cluster_labels[clusters]
+        manual = manual_group_codes(columns)
+        agree = auto == manual
+
+        np.add.at(self.confusion, (auto, manual), 1)
+        slots = np.clip(np.ceil(confidences * self.bins).astype(np.int64), 0, self.bins)
+        self.confidence_counts += np.bincount(slots, minlength=self.bins + 1)
+        self.agreement_counts += np.bincount(slots, weights=agree, minlength=self.bins + 1).astype(np.int64)
+        self.total += n
+
+    def threshold_curve(self):
+        """
+        Para cada umbral t de la grilla: fracción de perfiles con confianza > t
+        (cobertura automática) y acuerdo con la regla manual entre ellos
+        """
+        # Conteos de las casillas por encima de cada umbral i/bins
+        covered = np.cumsum(self.confidence_counts[::-1])[::-1]
+        agreeing = np.cumsum(self.agreement_counts[::-1])[::-1]
+        curve = []
+        for i in range(self.bins):
+            n_covered = int(covered[i + 1])
+            curve.append({
+                'threshold': round(i / self.bins, 6),
+                'coverage': n_covered / self.total if self.total else 0.0,
+                'agreement': int(agreeing[i + 1]) / n_covered if n_covered else None,
+            })
+        return curve
+
+    def report(self):
+        """
+        Resume los acumulados en un diccionario exportable a JSON
+        """
+        per_group = {}
+        for j, label in enumerate(MANUAL_GROUPS):
+            n_manual = int(self.confusion[:, j].sum())
+            per_group[label] = {
+                'profiles': n_manual,
+                'agreement': int(self.confusion[j, j]) / n_manual if n_manual else None,
+            }
+        agreed = int(self.agreement_counts.sum())
+        return {
+            'total': self.total,
+            'agreement': agreed / self.total if self.total else None,
+            'labels': self.labels,
+            # Filas: grupo automático; columnas: grupo manual
+            'confusion_matrix': self.confusion.tolist(),
+            'per_group': per_group,
+            'confidence_histogram': {
+                'edges': [round(i / self.bins, 6) for i in range(self.bins + 1)],
+                'counts': self.confidence_counts.tolist(),
+                'agreeing': self.agreement_counts.tolist(),
+            },
+            'threshold_curve': self.threshold_curve(),
+        }
+
+    def write_curve_csv(self, path):
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=['threshold', 'coverage', 'agreement'])
+            writer.writeheader()
+            writer.writerows(self.threshold_curve())
@@ -0,0 +1,58 @@
+"""
+Eventos de log estructurados y muestreados para el camino de asignación
+"""
+import logging
+import random
+
+logger = logging.getLogger('clustering')
+
+# Tasa de muestreo por evento (1.0 = todos). Los eventos que ocurren en cada
+# guardado de perfil se muestrean por defecto; los errores nunca.
+DEFAULT_SAMPLE_RATES = {
+    'assignment.auto': 0.1,
+    'assignment.manual': 0.1,
+    'assignment.low_confidence': 0.1,
+    'assignment.cluster_predicted': 0.01,
+    'assignment.profile_prepared': 0.01,
+    'assignment.manual_averages': 0.01,
+}
+
+_sample_rates = dict(DEFAULT_SAMPLE_RATES)
+
+
+def set_sample_rates(rates):
+    """
+    Actualiza las tasas de muestreo por evento (p. ej. desde app.config)
+    """
+    _sample_rates.update({event: float(rate) for event, rate in (rates or {}).items()})
+
+
+class EventFields:
+    """
+    Campos del evento; se formatean como `clave=valor` solo si algún
+    handler llega a emitir el registro
+    """
+
+    __slots__ = ('fields',)
+
+    def __init__(self, fields):
+        self.fields = fields
+
+    def __str__(self):
+        return ' '.join(f'{key}={value}' for key, value in self.fields.items())
+
+
+def log_event(event, level=logging.DEBUG, **fields):
+    """
+    Emite un evento estructurado en el logger `clustering`.
+
+    No hace trabajo si el nivel está deshabilitado o si el evento queda
+    fuera de la muestra; el mensaje se formatea de forma perezosa.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    rate = _sample_rates.get(event, 1.0) if level < logging.WARNING else 1.0
+    if rate < 1.0 and random.random() >= rate:
+        return
+    logger.log(level, '%s %s', event, EventFields(fields),
+               extra={'event': event, 'event_fields': fields})
@@ -1,20 +1,29 @@
 """
 Feature Engineering para el sistema de clustering
 """
+import logging
 import pandas as pd
 import numpy as np
+from .encoder import CATEGORICAL_FEATURES
+from .events import log_event
 
 class FeatureEngineer:
     """
     Clase para ingeniería de características del perfil de usuario
     """
     
-    def __init__(self):
+    def __init__(self, scaler=None, categories=None):
         self.feature_names = [
             'digital_tools_skill', 'advanced_tic_skill', 'digital_citizenship_skill', 
             'teaching_tech_skill', 'leadership_support', 'resource_support'
         ]
-    
+        self.boolean_names = [
+            'interest_digital_literacy', 'interest_educational_innovation', 'interest_leadership'
+        ]
+        # Scaler ajustado durante el entrenamiento y categorías one-hot por columna
+        self.scaler = scaler
+        self.categories = categories or {}
+
     def engineer_features(self, df):
         """
         Aplica ingeniería de características básica
@@ -35,5 +44,30 @@ class FeatureEngineer:
             return df_engineered
             
         except Exception as e:
-            print(f"Error en feature engineering: {e}")
+            log_event('features.engineering_error', logging.ERROR, error=e)
             return df
+
+    def create_clustering_features(self, df):
+        """
+        Construye las características de clustering con el scaler ajustado en
+        el entrenamiento (mismo layout que ProfileEncoder)
+        """
+        scaler = getattr(self, 'scaler', None)
+        if scaler is None or not hasattr(scaler, 'mean_'):
+            raise ValueError("El FeatureEngineer no tiene un scaler ajustado")
+
+        df_engineered = self.engineer_features(df)
+        features = pd.DataFrame(
+            scaler.transform(df_engineered[self.feature_names].to_numpy(dtype=float)),
+            columns=self.feature_names,
+            index=df.index
+        )
+        for col in self.boolean_names:
+            features[col] = df_engineered[col].fillna(False).astype(bool).astype(int)
+        # Mismo orden de columnas one-hot que ProfileEncoder
+        categories = getattr(self, 'categories', {})
+        for col in CATEGORICAL_FEATURES:
+            for value in categories.get(col, []):
+                features[f'{col}_{value}'] = (df_engineered[col] == value).astype(int)
+
+        return features
@@ -0,0 +1,136 @@
+"""
+Tabla de asignación precompilada sobre el espacio discreto de perfiles
+"""
+from functools import lru_cache
+from types import SimpleNamespace
+
+import numpy as np
+
+from .encoder import BOOLEAN_FEATURES, CATEGORICAL_DEFAULTS, NUMERIC_DEFAULT, NUMERIC_FEATURES
+
+SKILL_LEVELS = 5
+# cluster (int16) + confianza (float32) + margen (float32)
+BYTES_PER_ENTRY = 10
+BUILD_BLOCK = 65536
+
+
+class AssignmentLookup:
+    """
+    Enumera una sola vez todas las combinaciones posibles de entrada
+    (seis habilidades 1-5, tres intereses y las categóricas que use el
+    modelo), las pasa por el predictor por lotes y guarda cluster, confianza
+    y margen en arreglos indexados por un entero de base mixta.
+
+    Si el espacio no cabe en `memory_budget_bytes`, se usa en su lugar un
+    memo LRU indexado por la tupla codificada del perfil.
+    """
+
+    def __init__(self, assignment, memory_budget_bytes=64 * 1024 * 1024, lru_size=50000):
+        self.assignment = assignment
+        self.encoder = assignment._get_encoder()
+
+        # Variables categóricas que afectan al modelo: (columna, {valor: código})
+        self.categorical = [
+            (col, {value: code for code, value in enumerate(self.encoder.categories[col])})
+            for col in self.encoder.one_hot
+        ]
+        # El último código de cada categórica representa "valor desconocido"
+        self.dims = ([SKILL_LEVELS] * len(NUMERIC_FEATURES)
+                     + [2] * len(BOOLEAN_FEATURES)
+                     + [len(codes) + 1 for _, codes in self.categorical])
+        self.size = int(np.prod(self.dims, dtype=np.int64))
+        self.strides = [int(s) for s in np.cumprod([1] + self.dims[::-1][:-1])[::-1]]
+        self.memory_bytes = self.size * BYTES_PER_ENTRY
+
+        self.clusters = None
+        self.confidences = None
+        self.margins = None
+        self.is_table = self.memory_bytes <= memory_budget_bytes
+        if self.is_table:
+            self._build_table()
+        else:
+            self._memo = lru_cache(maxsize=lru_size)(self._predict_key)
+
+    def _codes(self, user_profile):
+        """
+        Codifica el perfil como tupla de enteros, o None si algún valor cae
+        fuera del espacio enumerado
+        """
+        codes = []
+        for col in NUMERIC_FEATURES:
+            value = getattr(user_profile, col, None) or NUMERIC_DEFAULT
+            if value not in (1, 2, 3, 4, 5):
+                return None
+            codes.append(int(value) - 1)
+        for col in BOOLEAN_FEATURES:
+            codes.append(1 if getattr(user_profile, col, False) else 0)
+        for col, table in self.categorical:
+            value = getattr(user_profile, col, None) or CATEGORICAL_DEFAULTS[col]
+            codes.append(table.get(value, len(table)))
+        return tuple(codes)
+
+    def _features_for_codes(self, codes):
+        """
+        Construye la matriz de características para un bloque de códigos
+        (mismo resultado que ProfileEncoder sobre los perfiles equivalentes)
+        """
+        n = len(codes[0])
+        features = np.zeros((n, self.encoder.n_features), dtype=np.float32)
+        n_numeric = len(NUMERIC_FEATURES)
+        if self.encoder.mean is not None:
+            for j in range(n_numeric):
+                values = (codes[j] + 1).astype(np.float32)
+                features[:, j] = (values - self.encoder.mean[j]) / self.encoder.scale[j]
+        for j in range(len(BOOLEAN_FEATURES)):
+            features[:, n_numeric + j] = codes[n_numeric + j]
+        offset = n_numeric + len(BOOLEAN_FEATURES)
+        for k, (col, table) in enumerate(self.categorical):
+            column_codes = codes[offset + k]
+            for value, code in table.items():
+                features[:, self.encoder.one_hot[col][value]] = column_codes == code
+        return features
+
+    def _build_table(self):
+        self.clusters = np.empty(self.size, dtype=np.int16)
+        self.confidences = np.empty(self.size, dtype=np.float32)
+        self.margins = np.empty(self.size, dtype=np.float32)
+
+        model = self.assignment.clustering_model
+        for start in range(0, self.size, BUILD_BLOCK):
+            stop = min(start + BUILD_BLOCK, self.size)
+            codes = np.unravel_index(np.arange(start, stop), self.dims)
+            distances = model.transform(self._features_for_codes(codes))
+            clusters, confidences, margins = self.assignment._score_distances(distances)
+            self.clusters[start:stop] = clusters
+            self.confidences[start:stop] = confidences
+            self.margins[start:stop] = margins
+
+    def _predict_key(self, codes):
+        profile = SimpleNamespace()
+        for j, col in enumerate(NUMERIC_FEATURES):
+            setattr(profile, col, codes[j] + 1)
+        for j, col in enumerate(BOOLEAN_FEATURES):
+            setattr(profile, col, bool(codes[len(NUMERIC_FEATURES) + j]))
+        offset = len(NUMERIC_FEATURES) + len(BOOLEAN_FEATURES)
+        for k, (col, table) in enumerate(self.categorical):
+            values = self.encoder.categories[col]
+            code = codes[offset + k]
+            # Un valor desconocido no activa ninguna columna one-hot
+            setattr(profile, col, values[code] if code < len(values) else f'__{col}_desconocido__')
+        return self.assignment._predict_direct(profile)
+
+    def predict(self, user_profile):
+        """
+        Devuelve (cluster_id, grupo, confianza, margen) igual que
+        AutoAssignment.predict_with_confidence
+        """
+        codes = self._codes(user_profile)
+        if codes is None:
+            return self.assignment._predict_direct(user_profile)
+        if not self.is_table:
+            return self._memo(codes)
+
+        index = sum(code * stride for code, stride in zip(codes, self.strides))
+        cluster_id = int(self.clusters[index])
+        group = (self.assignment.cluster_mapping or {}).get(cluster_id)
+        return cluster_id, group, float(self.confidences[index]), float(self.margins[index])
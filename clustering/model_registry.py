@@ -0,0 +1,162 @@
+"""
+Registro de modelos de clustering compartido por todo el proceso
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+
+from .artifact import manifest_path
+from .auto_assignment import AutoAssignment
+from .events import log_event
+
+
+class LoadedModel:
+    """
+    Instantánea inmutable de un modelo cargado desde disco
+    """
+
+    def __init__(self, assignment, version, mtime, size, loaded_at):
+        self.assignment = assignment
+        self.version = version
+        self.mtime = mtime
+        self.size = size
+        self.loaded_at = loaded_at
+
+
+class ModelRegistry:
+    """
+    Mantiene una única instancia de AutoAssignment por proceso.
+
+    El artefacto se carga una sola vez y se recarga en caliente cuando cambia
+    su mtime/tamaño y además su hash de contenido. Los lectores nunca toman
+    el lock: leen la referencia a la instantánea actual, que se reemplaza de
+    forma atómica cuando termina una recarga.
+    """
+
+    def __init__(self, model_path='clustering_model.pkl', check_interval=2.0, lookup_budget_bytes=None):
+        self.model_path = model_path
+        self.check_interval = check_interval
+        # Si se indica, cada modelo cargado precompila su tabla de asignación
+        self.lookup_budget_bytes = lookup_budget_bytes
+        self._current = None
+        self._last_check = 0.0
+        self._reload_lock = threading.Lock()
+
+    @staticmethod
+    def _file_digest(path):
+        """
+        Calcula el hash SHA-256 del artefacto leyendo en bloques
+        """
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _artifact_file(self):
+        """
+        Archivo que identifica la versión: el pickle o el manifest del bundle
+        """
+        return manifest_path(self.model_path)
+
+    def _stat(self):
+        try:
+            stat = os.stat(self._artifact_file())
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self, stat):
+        """
+        Carga el artefacto y devuelve una nueva instantánea (o la actual si
+        el contenido no cambió)
+        """
+        mtime, size = stat
+        version = self._file_digest(self._artifact_file())[:12]
+        current = self._current
+        if current is not None and current.version == version:
+            # Solo cambió el mtime (p. ej. un `touch`): no hace falta deserializar
+            return LoadedModel(current.assignment, version, mtime, size, current.loaded_at)
+
+        assignment = AutoAssignment(model_path=self.model_path)
+        if not assignment.load_model():
+            return current
+        assignment.model_version = version
+        if self.lookup_budget_bytes:
+            assignment.enable_lookup_table(memory_budget_bytes=self.lookup_budget_bytes)
+        log_event('model.activated', logging.INFO, version=version, path=self.model_path)
+        return LoadedModel(assignment, version, mtime, size, time.time())
+
+    def _refresh(self, blocking):
+        if not self._reload_lock.acquire(blocking=blocking):
+            # Otro hilo está recargando: se sigue sirviendo la instantánea actual
+            return
+        try:
+            self._last_check = time.monotonic()
+            stat = self._stat()
+            if stat is None:
+                return
+            current = self._current
+            if current is not None and (current.mtime, current.size) == stat:
+                return
+            # Intercambio atómico: los lectores ven la instantánea vieja o la nueva
+            self._current = self._load(stat)
+        except Exception as e:
+            log_event('model.reload_error', logging.ERROR, error=e, path=self.model_path)
+        finally:
+            self._reload_lock.release()
+
+    def snapshot(self):
+        """
+        Devuelve la instantánea vigente, revisando el artefacto como máximo
+        una vez cada `check_interval` segundos
+        """
+        current = self._current
+        if current is None:
+            self._refresh(blocking=True)
+        elif time.monotonic() - self._last_check >= self.check_interval:
+            self._refresh(blocking=False)
+        return self._current
+
+    def get(self):
+        """
+        Devuelve el AutoAssignment vigente o None si no hay modelo entrenado
+        """
+        current = self.snapshot()
+        return current.assignment if current else None
+
+    @property
+    def version(self):
+        current = self._current
+        return current.version if current else None
+
+    def reload(self):
+        """
+        Fuerza una revisión inmediata del artefacto
+        """
+        self._refresh(blocking=True)
+        return self._current
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry(model_path=None):
+    """
+    Obtiene el registro de modelos del proceso actual. La ruta puede ser un
+    pickle de joblib o un bundle .npy (ver clustering.artifact) y se toma de
+    CLUSTERING_MODEL_PATH si no se indica. CLUSTERING_LOOKUP_BUDGET_MB activa
+    la tabla de asignación precompilada con ese presupuesto de memoria.
+    """
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                model_path = model_path or os.environ.get('CLUSTERING_MODEL_PATH', 'clustering_model.pkl')
+                budget_mb = float(os.environ.get('CLUSTERING_LOOKUP_BUDGET_MB', 0) or 0)
+                _registry = ModelRegistry(model_path=model_path,
+                                          lookup_budget_bytes=int(budget_mb * 1024 * 1024))
+    return _registry
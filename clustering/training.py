@@ -0,0 +1,139 @@
+"""
+Entrenamiento incremental del modelo de clustering
+"""
+from collections import Counter
+
+import numpy as np
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.preprocessing import StandardScaler
+
+from .auto_assignment import AutoAssignment
+from .encoder import CATEGORICAL_DEFAULTS, NUMERIC_FEATURES, ProfileEncoder
+from .feature_engineering import FeatureEngineer
+
+
+class ClusteringEngine:
+    """
+    Resultado del entrenamiento con la interfaz que espera
+    AutoAssignment.train_model (atributo `kmeans`)
+    """
+
+    def __init__(self, kmeans, scaler, feature_engineer, cluster_mapping, n_samples):
+        self.kmeans = kmeans
+        self.scaler = scaler
+        self.feature_engineer = feature_engineer
+        self.cluster_mapping = cluster_mapping
+        self.n_samples = n_samples
+
+
+class IncrementalTrainer:
+    """
+    Ajusta scaler y MiniBatchKMeans recorriendo los perfiles por bloques.
+
+    `chunk_source` es un callable que devuelve un iterable nuevo de bloques
+    de perfiles en cada llamada (se hacen varias pasadas). La memoria queda
+    acotada por el tamaño del bloque y no por el total de perfiles.
+    """
+
+    def __init__(self, chunk_source, n_clusters=4, categorical_columns=(), epochs=1,
+                 random_state=42, progress=None):
+        self.chunk_source = chunk_source
+        self.n_clusters = n_clusters
+        self.categorical_columns = [c for c in categorical_columns if c in CATEGORICAL_DEFAULTS]
+        self.epochs = epochs
+        self.random_state = random_state
+        # Callback opcional progress(etapa, perfiles_procesados)
+        self.progress = progress or (lambda stage, processed: None)
+
+    def _fit_scaler(self):
+        """
+        Primera pasada: ajusta el scaler y recoge las categorías observadas
+        """
+        raw_encoder = ProfileEncoder(mean=np.zeros(len(NUMERIC_FEATURES)), scale=np.ones(len(NUMERIC_FEATURES)))
+        scaler = StandardScaler()
+        seen = {col: set() for col in self.categorical_columns}
+        n_samples = 0
+
+        for chunk in self.chunk_source():
+            raw = raw_encoder.encode_batch(chunk)
+            scaler.partial_fit(raw[:, :len(NUMERIC_FEATURES)].astype(float))
+            for profile in chunk:
+                for col, values in seen.items():
+                    values.add(getattr(profile, col, None) or CATEGORICAL_DEFAULTS[col])
+            n_samples += len(chunk)
+            self.progress('scaler', n_samples)
+
+        categories = {col: sorted(values) for col, values in seen.items()}
+        return scaler, categories, n_samples
+
+    def _fit_kmeans(self, encoder):
+        """
+        Segunda pasada: ajusta MiniBatchKMeans con partial_fit por bloque
+        """
+        kmeans = MiniBatchKMeans(n_clusters=self.n_clusters, random_state=self.random_state)
+        pending = None
+        processed = 0
+
+        for epoch in range(self.epochs):
+            for chunk in self.chunk_source():
+                features = encoder.encode_batch(chunk)
+                processed += len(chunk)
+                # partial_fit necesita al menos n_clusters filas en la primera llamada
+                if pending is not None:
+                    features = np.vstack([pending, features])
+                    pending = None
+                if not hasattr(kmeans, 'cluster_centers_') and len(features) < self.n_clusters:
+                    pending = features
+                    continue
+                kmeans.partial_fit(features)
+                self.progress('kmeans', processed)
+
+        if not hasattr(kmeans, 'cluster_centers_'):
+            raise ValueError(f"Se necesitan al menos {self.n_clusters} perfiles para entrenar")
+        return kmeans
+
+    def _derive_mapping(self, kmeans, encoder):
+        """
+        Tercera pasada: cada cluster se asocia al grupo manual más frecuente
+        entre sus miembros
+        """
+        rules = AutoAssignment(model_path=None)
+        votes = [Counter() for _ in range(self.n_clusters)]
+        processed = 0
+
+        for chunk in self.chunk_source():
+            clusters = kmeans.predict(encoder.encode_batch(chunk))
+            for cluster_id, profile in zip(clusters, chunk):
+                votes[cluster_id][rules._manual_assignment(profile)] += 1
+            processed += len(chunk)
+            self.progress('mapping', processed)
+
+        return {cluster_id: counter.most_common(1)[0][0]
+                for cluster_id, counter in enumerate(votes) if counter}
+
+    def train(self):
+        """
+        Ejecuta las tres pasadas y devuelve un ClusteringEngine
+        """
+        scaler, categories, n_samples = self._fit_scaler()
+        if n_samples < self.n_clusters:
+            raise ValueError(f"Se necesitan al menos {self.n_clusters} perfiles para entrenar")
+
+        mean, scale = scaler.mean_, scaler.scale_
+        encoder = ProfileEncoder(mean=mean, scale=scale, categories=categories)
+        kmeans = self._fit_kmeans(encoder)
+        cluster_mapping = self._derive_mapping(kmeans, encoder)
+
+        feature_engineer = FeatureEngineer(scaler=scaler, categories=categories)
+        return ClusteringEngine(kmeans, scaler, feature_engineer, cluster_mapping, n_samples)
+
+
+def train_and_save(chunk_source, model_path='clustering_model.pkl', **trainer_options):
+    """
+    Entrena el modelo por bloques y lo guarda con AutoAssignment.train_model
+    """
+    engine = IncrementalTrainer(chunk_source, **trainer_options).train()
+    assignment = AutoAssignment(model_path=model_path)
+    assignment.scaler = engine.scaler
+    assignment.train_model(engine, engine.feature_engineer, engine.cluster_mapping)
+    return assignment, engine
@@ -0,0 +1,117 @@
+"""
+Caché en memoria de las listas de cursos por grupo.
+
+Cada entrada queda sellada con la versión del catálogo (fila 'catalog' de
+CacheVersion). Las rutas de administración y load_courses.py incrementan la
+versión al modificar cursos; cada worker la revisa como máximo una vez cada
+CHECK_INTERVAL segundos, así que las lecturas no consultan la base de datos
+una vez caliente el caché.
+"""
+import time
+from collections import namedtuple
+from __init__ import db
+from models import Course
+from cache_versions import VersionWatch, bump_version
+from course_ranking import CourseIndex
+
+CATALOG = 'catalog'
+CHECK_INTERVAL = 2.0
+FALLBACK_LIMIT = 10
+# Segundos entre refrescos de views_count para la popularidad del ranking
+VIEWS_REFRESH_INTERVAL = 60.0
+
+# Copia inmutable de un curso: se comparte entre hilos sin sesión ORM
+CachedCourse = namedtuple('CachedCourse', ['id', 'title', 'description', 'link', 'group', 'duration', 'format'])
+
+_watch = VersionWatch(CATALOG, CHECK_INTERVAL)
+_entries = {}
+
+def _current_version():
+    global _entries
+    version, previous = _watch.poll()
+    if version != previous:
+        # Se reemplaza el diccionario completo: los lectores nunca ven uno a medias
+        _entries = {}
+    return version
+
+def _snapshot(courses):
+    return tuple(CachedCourse(c.id, c.title, c.description, c.link, c.group, c.duration, c.format)
+                 for c in courses)
+
+def _cached(key, load, build=_snapshot):
+    version = _current_version()
+    entries = _entries
+    hit = entries.get(key)
+    if hit is not None and hit[0] == version:
+        return hit[1]
+    value = build(load())
+    entries[key] = (version, value)
+    return value
+
+def get_courses_for_group(group):
+    """
+    Cursos del grupo como tupla de CachedCourse
+    """
+    return _cached(group, lambda: Course.query.filter_by(group=group).all())
+
+def get_fallback_courses():
+    """
+    Cursos mostrados cuando el grupo no tiene cursos
+    """
+    return _cached(None, lambda: Course.query.limit(FALLBACK_LIMIT).all())
+
+def get_catalog():
+    """
+    Todos los cursos del catálogo (base del índice de ranking)
+    """
+    return _cached('__catalog__', lambda: Course.query.order_by(Course.id).all())
+
+def get_course(course_id):
+    """
+    Un curso del catálogo en caché, o None si no existe
+    """
+    by_id = _cached('__by_id__', get_catalog, build=lambda courses: {course.id: course for course in courses})
+    return by_id.get(course_id)
+
+_index = CourseIndex()
+_index_state = {'version': None, 'views_at': 0.0}
+
+def _ranking_index():
+    """
+    Índice TF-IDF sincronizado con la versión del catálogo. Ante un cambio
+    de versión solo se retokenizan los cursos nuevos o modificados.
+    """
+    version = _current_version()
+    if _index_state['version'] != version:
+        _index.sync(get_catalog())
+        _index_state['version'] = version
+        _index_state['views_at'] = 0.0
+    now = time.monotonic()
+    if now - _index_state['views_at'] >= VIEWS_REFRESH_INTERVAL:
+        _index_state['views_at'] = now
+        _index.update_views(db.session.execute(db.select(Course.id, Course.views_count)).all())
+    return _index
+
+def get_ranked_courses_for_group(profile, group, k=None):
+    """
+    Cursos del grupo ordenados por relevancia para el perfil (ver course_ranking)
+    """
+    courses = get_courses_for_group(group)
+    if not courses:
+        return courses
+    by_id = {course.id: course for course in courses}
+    ranked = [by_id[course_id] for course_id in _ranking_index().rank(profile, group, k) if course_id in by_id]
+    if k is None:
+        # Cursos que el índice aún no conoce van al final
+        seen = {course.id for course in ranked}
+        ranked += [course for course in courses if course.id not in seen]
+    return ranked
+
+def invalidate_catalog():
+    """
+    Marca el catálogo como modificado en la transacción actual (el llamador
+    hace commit). Este worker revisa la versión en su próxima lectura; los
+    demás lo notan en su próxima revisión.
+    """
+    bump_version(CATALOG)
+    _watch.expire()
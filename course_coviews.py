@@ -0,0 +1,298 @@
+"""
+Filtrado colaborativo ítem a ítem: "los docentes que abrieron este curso
+también abrieron".
+
+La matriz de co-visualizaciones curso×curso vive en CourseCoView y se
+actualiza solo con las filas de CourseView posteriores a la marca de agua
+guardada en CacheVersion ('coview'). Cada worker guarda la matriz en
+memoria; cuando la marca de agua avanza lee solo las filas modificadas
+desde entonces y recalcula los N vecinos de los cursos afectados.
+
+Los ids de lotes de clics concurrentes se confirman desordenados: una fila
+con id menor que la marca de agua que se confirma tarde nunca se contaría.
+Por eso solo se consumen filas insertadas hace más de SAFETY_LAG segundos,
+deteniéndose en la primera más reciente.
+"""
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import func
+from __init__ import db
+from models import CourseView, CourseCoView
+from cache_versions import VersionWatch, get_version, set_version
+from utils import upsert_increments
+from course_cache import get_catalog, get_ranked_courses_for_group
+
+WATERMARK = 'coview'
+TOP_N = 10
+CHECK_INTERVAL = 30.0
+# Cursos vistos por usuario: se descartan al guardar sus clics en este worker
+VIEWED_TTL = 120.0
+MAX_VIEWED_USERS = 10000
+# Segundos tras el INSERT en que una visita se considera confirmada junto con
+# todas las de id menor (mucho más que lo que dura la transacción de un lote)
+SAFETY_LAG = 60.0
+
+
+def settled_rows(rows):
+    """
+    Prefijo de `rows` (ordenadas por id, con created_at) insertado hace más
+    de SAFETY_LAG segundos; las filas anteriores a la columna no la tienen
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=SAFETY_LAG)
+    for i, row in enumerate(rows):
+        if row.created_at is not None and row.created_at >= cutoff:
+            return rows[:i]
+    return rows
+
+
+def update_coviews(batch_size=10000):
+    """
+    Procesa las visualizaciones nuevas desde la marca de agua. Cada par
+    (usuario, curso) cuenta una sola vez: un curso nuevo para un usuario
+    suma 1 a su diagonal y a la co-visualización con cada curso que ese
+    usuario ya había abierto. Devuelve la cantidad de filas procesadas.
+    """
+    processed = 0
+    while True:
+        watermark = get_version(WATERMARK)
+        fetched = db.session.execute(
+            db.select(CourseView.id, CourseView.user_id, CourseView.course_id, CourseView.created_at)
+            .where(CourseView.id > watermark)
+            .order_by(CourseView.id)
+            .limit(batch_size)
+        ).all()
+        rows = settled_rows(fetched)
+        if not rows:
+            break
+
+        # Cursos que ya había abierto cada usuario del lote (búsqueda por usuario, no un recorrido completo)
+        seen = defaultdict(set)
+        users = {row.user_id for row in rows}
+        for user_id, course_id in db.session.execute(
+            db.select(CourseView.user_id, CourseView.course_id)
+            .where(CourseView.user_id.in_(users), CourseView.id <= watermark)
+            .distinct()
+        ):
+            seen[user_id].add(course_id)
+
+        increments = Counter()
+        for row in rows:
+            courses = seen[row.user_id]
+            if row.course_id in courses:
+                continue
+            increments[(row.course_id, row.course_id)] += 1
+            for other in courses:
+                increments[(row.course_id, other)] += 1
+                increments[(other, row.course_id)] += 1
+            courses.add(row.course_id)
+
+        try:
+            upsert_increments(CourseCoView, ['course_id', 'other_course_id'], 'count', [
+                {'course_id': a, 'other_course_id': b, 'count': n, 'watermark': rows[-1].id}
+                for (a, b), n in increments.items()
+            ], replace_columns=['watermark'])
+            # Contadores y marca de agua en la misma transacción
+            set_version(WATERMARK, rows[-1].id)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        processed += len(rows)
+        if len(fetched) < batch_size or len(rows) < len(fetched):
+            break
+    return processed
+
+
+def _rank_neighbours(course_id, items, users, n):
+    """
+    Los N cursos más similares a `course_id` a partir de sus conteos
+    {otro: co-visualizaciones} y los usuarios distintos por curso
+    """
+    others = np.fromiter(items.keys(), dtype=np.int64, count=len(items))
+    counts = np.fromiter(items.values(), dtype=np.float64, count=len(items))
+    positive = counts > 0
+    others, counts = others[positive], counts[positive]
+    if len(others) == 0:
+        return ()
+    norms = np.sqrt(users.get(course_id, 1) * np.array([users.get(int(o), 1) for o in others], dtype=np.float64))
+    scores = counts / np.maximum(norms, 1.0)
+    k = min(n, len(others))
+    top = np.argpartition(-scores, k - 1)[:k] if k < len(others) else np.arange(len(others))
+    top = top[np.lexsort((others[top], -scores[top]))]
+    return tuple((int(others[i]), float(scores[i])) for i in top)
+
+
+def top_neighbours(triples, n=TOP_N):
+    """
+    Calcula los N vecinos de cada curso a partir de tripletas
+    (curso, otro, conteo). La similitud es el coseno entre conjuntos de
+    usuarios: co(a, b) / sqrt(usuarios(a) * usuarios(b)).
+    """
+    users = {}
+    pairs = defaultdict(dict)
+    for course_id, other_id, count in triples:
+        if course_id == other_id:
+            users[course_id] = count
+        else:
+            pairs[course_id][other_id] = count
+
+    neighbours = {}
+    for course_id, items in pairs.items():
+        ranked = _rank_neighbours(course_id, items, users, n)
+        if ranked:
+            neighbours[course_id] = ranked
+    return neighbours
+
+
+class CoViewNeighbours:
+    """
+    Vecinos precalculados por curso. La matriz de conteos queda en memoria;
+    cuando avanza la marca de agua (revisada como máximo una vez cada
+    CHECK_INTERVAL segundos) solo se leen las filas modificadas y se
+    recalculan los cursos afectados.
+    """
+
+    def __init__(self, n=TOP_N, check_interval=CHECK_INTERVAL):
+        self.n = n
+        self._watch = VersionWatch(WATERMARK, check_interval)
+        self._pairs = defaultdict(dict)
+        self._users = {}
+        self._neighbours = {}
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        watermark, previous = self._watch.poll()
+        if watermark == previous:
+            return
+        statement = db.select(CourseCoView.course_id, CourseCoView.other_course_id, CourseCoView.count)
+        if previous is not None:
+            # Filas tocadas por update_coviews desde la última lectura
+            statement = statement.where(CourseCoView.watermark > previous)
+        with self._lock:
+            self._apply(db.session.execute(statement).all())
+
+    def _apply(self, triples):
+        pairs, users = self._pairs, self._users
+        changed_pairs, changed_users = set(), set()
+        for course_id, other_id, count in triples:
+            if course_id == other_id:
+                users[course_id] = count
+                changed_users.add(course_id)
+            else:
+                pairs[course_id][other_id] = count
+                changed_pairs.add(course_id)
+        # Si cambian los usuarios de un curso cambia su similitud con todos sus pares
+        affected = changed_pairs | changed_users
+        for course_id in changed_users:
+            affected.update(pairs.get(course_id, ()))
+
+        neighbours = dict(self._neighbours)
+        for course_id in affected:
+            ranked = _rank_neighbours(course_id, pairs[course_id], users, self.n) if course_id in pairs else ()
+            if ranked:
+                neighbours[course_id] = ranked
+            else:
+                neighbours.pop(course_id, None)
+        # Intercambio atómico: los lectores ven los vecinos viejos o los nuevos
+        self._neighbours = neighbours
+
+    def get(self, course_id):
+        """
+        [(curso_vecino, similitud), ...] ordenados por similitud
+        """
+        self._refresh()
+        return self._neighbours.get(course_id, ())
+
+    def for_courses(self, course_ids, exclude=()):
+        """
+        Vecinos de un conjunto de cursos, sumando la similitud de cada uno
+        """
+        self._refresh()
+        neighbours = self._neighbours
+        scores = Counter()
+        for course_id in course_ids:
+            for other, score in neighbours.get(course_id, ()):
+                scores[other] += score
+        excluded = set(course_ids) | set(exclude)
+        return [other for other, _ in sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+                if other not in excluded]
+
+
+_neighbours = CoViewNeighbours()
+
+
+def get_coview_neighbours():
+    return _neighbours
+
+
+_viewed = {}
+
+
+def user_viewed_courses(user_id):
+    """
+    Cursos distintos que abrió el usuario, del más reciente al más antiguo.
+    Se cachean VIEWED_TTL segundos; forget_viewed los descarta cuando se
+    guardan clics nuevos del usuario en este worker.
+    """
+    now = time.monotonic()
+    hit = _viewed.get(user_id)
+    if hit is not None and hit[0] > now:
+        return hit[1]
+    viewed = tuple(course_id for course_id, in db.session.execute(
+        db.select(CourseView.course_id)
+        .where(CourseView.user_id == user_id)
+        .group_by(CourseView.course_id)
+        .order_by(func.max(CourseView.id).desc())
+    ))
+    if len(_viewed) >= MAX_VIEWED_USERS:
+        # Se descarta la entrada más antigua (orden de inserción)
+        _viewed.pop(next(iter(_viewed)), None)
+    _viewed[user_id] = (now + VIEWED_TTL, viewed)
+    return viewed
+
+
+def forget_viewed(user_ids):
+    for user_id in user_ids:
+        _viewed.pop(user_id, None)
+
+
+def blend(group_courses, neighbour_courses, every=3, limit=None):
+    """
+    Intercala los vecinos por co-visualización entre los cursos del grupo:
+    un vecino cada `every` posiciones, sin repetir cursos
+    """
+    result, used = [], set()
+    neighbours = iter(neighbour_courses)
+    for course in group_courses:
+        if course.id not in used:
+            result.append(course)
+            used.add(course.id)
+        if len(result) % every == every - 1:
+            for neighbour in neighbours:
+                if neighbour.id not in used:
+                    result.append(neighbour)
+                    used.add(neighbour.id)
+                    break
+    for neighbour in neighbours:
+        if neighbour.id not in used:
+            result.append(neighbour)
+            used.add(neighbour.id)
+    return result[:limit] if limit else result
+
+
+def get_blended_courses(user_id, profile, group):
+    """
+    Lista por usuario: cursos del grupo ordenados por el ranking, con los
+    vecinos por co-visualización de los cursos que el usuario ya abrió
+    """
+    group_courses = get_ranked_courses_for_group(profile, group)
+    viewed = user_viewed_courses(user_id)
+    if not viewed:
+        return group_courses
+    catalog = {course.id: course for course in get_catalog()}
+    neighbour_ids = _neighbours.for_courses(viewed)
+    return blend(group_courses, [catalog[i] for i in neighbour_ids if i in catalog])
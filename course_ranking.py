@@ -0,0 +1,248 @@
+"""
+Ranking de cursos dentro de un grupo con un índice TF-IDF disperso.
+
+Los documentos guardan solo su frecuencia de términos normalizada; el IDF
+se aplica del lado de la consulta. Así agregar, editar o quitar un curso
+solo toca su propia fila y las frecuencias de documento, sin recalcular el
+resto del índice.
+"""
+import hashlib
+import re
+import threading
+import unicodedata
+
+import numpy as np
+from scipy import sparse
+
+# Palabras vacías frecuentes en los títulos y descripciones del catálogo
+STOPWORDS = frozenset("""
+    a al como con de del el en entre es esta este la las lo los mas o para por que se sin su sus
+    un una uno y e u ya les tu son ser sobre cada otros otras todo todos
+""".split())
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+# Términos asociados a cada interés marcado en el perfil
+INTEREST_TERMS = {
+    'interest_digital_literacy': 'alfabetizacion digital competencias digitales herramientas basicas',
+    'interest_educational_innovation': 'innovacion educativa metodologias estrategias aprendizaje proyectos',
+    'interest_leadership': 'liderazgo gestion directivos institucional comunidad',
+}
+
+# Términos asociados a cada habilidad; pesan más cuanto más baja es la habilidad
+SKILL_TERMS = {
+    'digital_tools_skill': 'herramientas digitales ofimatica tecnologia basica',
+    'advanced_tic_skill': 'tic avanzadas programacion plataformas datos',
+    'digital_citizenship_skill': 'ciudadania digital seguridad etica convivencia',
+    'teaching_tech_skill': 'tecnologia aula didactica ensenanza recursos digitales',
+    'leadership_support': 'liderazgo gestion apoyo directivo',
+    'resource_support': 'recursos educativos materiales plataformas',
+}
+WEAK_SKILL = 2
+
+POPULARITY_WEIGHT = 0.2
+FORMAT_BONUS = 0.1
+
+
+def tokenize(text):
+    """
+    Minúsculas sin tildes, tokens alfanuméricos de 3+ caracteres sin palabras vacías
+    """
+    text = unicodedata.normalize('NFKD', (text or '').lower())
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return [t for t in TOKEN_RE.findall(text) if len(t) > 2 and t not in STOPWORDS]
+
+
+def profile_query_terms(profile):
+    """
+    Pesos de términos de la consulta derivada del perfil: intereses marcados
+    y habilidades débiles
+    """
+    weights = {}
+    for field, phrase in INTEREST_TERMS.items():
+        if getattr(profile, field, False):
+            for term in tokenize(phrase):
+                weights[term] = weights.get(term, 0.0) + 1.0
+    for field, phrase in SKILL_TERMS.items():
+        level = getattr(profile, field, None)
+        if level is not None and level <= WEAK_SKILL:
+            for term in tokenize(phrase):
+                weights[term] = weights.get(term, 0.0) + (WEAK_SKILL + 1 - level) / WEAK_SKILL
+    return weights
+
+
+def _fingerprint(course):
+    return hashlib.sha1(f'{course.title}\x00{course.description}'.encode('utf-8')).hexdigest()
+
+
+class CourseIndex:
+    """
+    Índice de términos sobre título y descripción de los cursos con
+    actualización incremental (upsert/remove/sync)
+    """
+
+    def __init__(self, popularity_weight=POPULARITY_WEIGHT, format_bonus=FORMAT_BONUS):
+        self.popularity_weight = popularity_weight
+        self.format_bonus = format_bonus
+        self.vocabulary = {}
+        self.df = np.zeros(0, dtype=np.int64)
+        # Una fila por curso: (columnas, pesos) de su vector de términos
+        self._terms = {}
+        self._fingerprints = {}
+        self._meta = {}
+        self._views = {}
+        self._arrays = None
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._terms)
+
+    def _column(self, term):
+        column = self.vocabulary.get(term)
+        if column is None:
+            column = self.vocabulary[term] = len(self.vocabulary)
+            if column >= len(self.df):
+                self.df = np.concatenate([self.df, np.zeros(max(64, len(self.df)), dtype=np.int64)])
+        return column
+
+    def _document_vector(self, course):
+        counts = {}
+        title_terms = tokenize(course.title)
+        # El título pesa el doble que la descripción
+        for term in title_terms + title_terms + tokenize(course.description):
+            column = self._column(term)
+            counts[column] = counts.get(column, 0) + 1
+        columns = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        weights = 1.0 + np.log(np.fromiter(counts.values(), dtype=np.float64, count=len(counts)))
+        norm = np.linalg.norm(weights)
+        return columns, (weights / norm if norm else weights)
+
+    def upsert(self, course):
+        """
+        Agrega o actualiza un curso; solo se vuelve a tokenizar si cambió su texto
+        """
+        with self._lock:
+            self._upsert(course)
+
+    def _upsert(self, course):
+        course_id = course.id
+        self._meta[course_id] = (course.group, course.format)
+        views = getattr(course, 'views_count', None)
+        if views is not None:
+            self._views[course_id] = views
+        fingerprint = _fingerprint(course)
+        if self._fingerprints.get(course_id) == fingerprint:
+            self._arrays = None
+            return
+        self._drop_terms(course_id)
+        columns, weights = self._document_vector(course)
+        self.df[columns] += 1
+        self._terms[course_id] = (columns, weights)
+        self._fingerprints[course_id] = fingerprint
+        self._arrays = None
+
+    def _drop_terms(self, course_id):
+        previous = self._terms.pop(course_id, None)
+        if previous is not None:
+            self.df[previous[0]] -= 1
+
+    def remove(self, course_id):
+        with self._lock:
+            self._remove(course_id)
+
+    def _remove(self, course_id):
+        self._drop_terms(course_id)
+        self._fingerprints.pop(course_id, None)
+        self._meta.pop(course_id, None)
+        self._views.pop(course_id, None)
+        self._arrays = None
+
+    def sync(self, courses):
+        """
+        Deja el índice igual al catálogo dado, tocando solo los cursos nuevos,
+        modificados o eliminados
+        """
+        with self._lock:
+            present = set()
+            for course in courses:
+                present.add(course.id)
+                self._upsert(course)
+            for course_id in list(self._terms.keys() - present):
+                self._remove(course_id)
+
+    def update_views(self, pairs):
+        """
+        Actualiza los contadores de visualizaciones con pares (id, vistas)
+        """
+        with self._lock:
+            for course_id, views in pairs:
+                if course_id in self._terms:
+                    self._views[course_id] = views or 0
+            self._arrays = None
+
+    def _build_arrays(self):
+        """
+        Arma la matriz CSR a partir de las filas ya calculadas (sin tokenizar).
+        El resultado es una instantánea inmutable que se usa fuera del lock.
+        """
+        with self._lock:
+            if self._arrays is None:
+                self._arrays = self._snapshot_arrays()
+            return self._arrays
+
+    def _snapshot_arrays(self):
+        ids = np.fromiter(self._terms.keys(), dtype=np.int64, count=len(self._terms))
+        indptr = np.zeros(len(ids) + 1, dtype=np.int64)
+        columns, weights = [], []
+        for i, course_id in enumerate(ids):
+            cols, w = self._terms[int(course_id)]
+            columns.append(cols)
+            weights.append(w)
+            indptr[i + 1] = indptr[i] + len(cols)
+        matrix = sparse.csr_matrix(
+            (np.concatenate(weights) if weights else np.zeros(0),
+             np.concatenate(columns) if columns else np.zeros(0, dtype=np.int64),
+             indptr),
+            shape=(len(ids), max(len(self.vocabulary), 1)))
+        groups = np.array([self._meta[int(i)][0] for i in ids], dtype=object)
+        formats = np.array([self._meta[int(i)][1] for i in ids], dtype=object)
+        views = np.array([self._views.get(int(i), 0) for i in ids], dtype=np.float64)
+        df = self.df[:len(self.vocabulary)]
+        idf = np.log((1.0 + len(ids)) / (1.0 + df)) + 1.0
+        return ids, matrix, idf, groups, formats, views
+
+    def rank(self, profile, group, k=None):
+        """
+        Devuelve los ids de los cursos del grupo ordenados por relevancia
+        para el perfil, combinada con la popularidad y el formato preferido
+        """
+        ids, matrix, idf, groups, formats, views = self._arrays or self._build_arrays()
+        candidates = np.flatnonzero(groups == group)
+        if len(candidates) == 0:
+            return []
+
+        query = np.zeros(matrix.shape[1])
+        for term, weight in profile_query_terms(profile).items():
+            column = self.vocabulary.get(term)
+            if column is not None and column < len(idf):
+                query[column] = weight * idf[column]
+
+        text = matrix[candidates] @ query
+        if text.max() > 0:
+            text = text / text.max()
+        popularity = np.log1p(views[candidates])
+        if popularity.max() > 0:
+            popularity = popularity / popularity.max()
+        scores = (1.0 - self.popularity_weight) * text + self.popularity_weight * popularity
+        learning_format = getattr(profile, 'learning_format', None)
+        if learning_format:
+            scores = scores + self.format_bonus * (formats[candidates] == learning_format)
+
+        k = len(candidates) if k is None else min(k, len(candidates))
+        if k < len(candidates):
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(candidates))
+        # Orden estable por puntaje y luego por id para resultados reproducibles
+        order = top[np.lexsort((ids[candidates[top]], -scores[top]))]
+        return [int(i) for i in ids[candidates[order]]]
@@ -0,0 +1,29 @@
+import argparse
+from clustering.auto_assignment import AutoAssignment
+from clustering.artifact import save_bundle
+
+def export_model_bundle(model_path, bundle_dir):
+    """Convierte un modelo joblib en un bundle .npy mapeable en memoria."""
+    assignment = AutoAssignment(model_path=model_path)
+    if not assignment.load_model():
+        print(f"No se encontró el modelo en {model_path}.")
+        return None
+
+    try:
+        manifest = save_bundle(assignment, bundle_dir)
+    except Exception as e:
+        print(f"Error exportando el bundle: {e}")
+        return None
+
+    print(f"Bundle versión {manifest['version']} exportado en {bundle_dir} "
+          f"({manifest['n_clusters']} clusters, {manifest['n_features']} características).")
+    print(f"Para usarlo: CLUSTERING_MODEL_PATH={bundle_dir}")
+    return manifest
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Exportar el modelo de clustering como bundle .npy.')
+    parser.add_argument('bundle_dir', type=str, help='Directorio de destino del bundle')
+    parser.add_argument('--model-path', default='clustering_model.pkl', help='Modelo joblib de origen')
+    args = parser.parse_args()
+
+    export_model_bundle(args.model_path, args.bundle_dir)
@@ -1,6 +1,6 @@
 from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, SelectField, RadioField, BooleanField, SubmitField, IntegerField, FloatField, TextAreaField
-from wtforms.validators import DataRequired, Email, Length, EqualTo, URL, Optional
+from wtforms.validators import DataRequired, Email, Length, EqualTo, URL, Optional, NumberRange, InputRequired
 
 class RegistrationForm(FlaskForm):
     username = StringField('Nombre de usuario', validators=[
@@ -139,8 +139,8 @@ class ProfileForm(FlaskForm):
     submit = SubmitField('Obtener recomendaciones')
 
 class AdminConfigForm(FlaskForm):
-    n_clusters = IntegerField('Número de clusters (K-Means)', validators=[DataRequired()])
-    confidence_threshold = FloatField('Umbral de confianza para asignación automática (0-1)', validators=[DataRequired()])
+    n_clusters = IntegerField('Número de clusters (K-Means)', validators=[DataRequired(), NumberRange(min=2, max=20)])
+    confidence_threshold = FloatField('Umbral de confianza para asignación automática (0-1)', validators=[InputRequired(), NumberRange(min=0, max=1)])
     submit = SubmitField('Guardar configuración')
 
 class CourseForm(FlaskForm):
@@ -0,0 +1,212 @@
+"""
+Alta masiva de docentes desde un CSV o JSONL (usuario, email, contraseña y
+respuestas del perfil).
+
+El archivo se recorre por lotes de `chunk_size` filas. En cada lote las
+contraseñas se hashean en un pool de hilos, los grupos se asignan con
+una sola llamada al modelo, y usuarios y perfiles se insertan en bloque en
+una transacción. La cantidad de filas procesadas se guarda como marca de
+agua en CacheVersion dentro de esa misma transacción, así que una
+importación interrumpida se retoma desde el último lote confirmado. La marca
+de agua depende de la ruta, el tamaño y la fecha de modificación del
+archivo (un archivo nuevo con el mismo nombre empieza desde cero) y se
+elimina al terminar la importación.
+
+Uso:
+
+    python import_teachers.py docentes.csv
+    python import_teachers.py docentes.jsonl --chunk-size 1000 --workers 8
+"""
+import argparse
+import csv
+import hashlib
+import itertools
+import os
+import time
+from collections import Counter
+from types import SimpleNamespace
+from sqlalchemy import insert
+from __init__ import create_app, db
+from models import User, UserProfile
+from cache_versions import delete_version, get_version, set_version
+from load_courses import iter_json_records
+from password_hashing import PasswordHasher
+from profile_form_schema import NUMERIC_FIELDS, SELECT_DEFAULTS
+from stats_snapshot import record_group_change, record_user_registered
+from utils import assign_groups
+
+CHUNK_SIZE = 500
+BOOLEAN_FIELDS = ('interest_digital_literacy', 'interest_educational_innovation', 'interest_leadership')
+TRUE_VALUES = {'1', 'true', 'si', 'sí', 'x', 'yes'}
+
+
+def iter_teacher_records(path):
+    """
+    Filas del archivo como diccionarios: CSV con encabezado, o arreglo JSON / JSONL
+    """
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if path.lower().endswith('.csv'):
+            yield from csv.DictReader(f)
+        else:
+            yield from iter_json_records(f)
+
+
+def _boolean(value):
+    if isinstance(value, bool):
+        return value
+    return str(value or '').strip().lower() in TRUE_VALUES
+
+
+def teacher_values(record):
+    """
+    (columnas de User con la contraseña en claro, columnas de UserProfile),
+    o None si falta el usuario, el email o la contraseña, o si una
+    habilidad no es numérica
+    """
+    username = (record.get('username') or '').strip()
+    email = (record.get('email') or '').strip().lower()
+    password = record.get('password') or ''
+    if not (username and email and password):
+        return None
+
+    profile = {}
+    for field in NUMERIC_FIELDS:
+        value = record.get(field)
+        try:
+            profile[field] = int(value) if value not in (None, '') else 3
+        except (TypeError, ValueError):
+            return None
+    for field, default in SELECT_DEFAULTS.items():
+        profile[field] = (record.get(field) or '').strip() or default
+    # Una nómina no puede crear administradores
+    if profile['role'] == 'admin':
+        profile['role'] = SELECT_DEFAULTS['role']
+    for field in BOOLEAN_FIELDS:
+        profile[field] = _boolean(record.get(field))
+    return {'username': username, 'email': email, 'password': password}, profile
+
+
+def _existing(column, values):
+    return set(db.session.execute(db.select(column).where(column.in_(values))).scalars())
+
+
+def _import_chunk(records, hasher, seen, counts):
+    """
+    Inserta un lote; las filas inválidas o con usuario/email ya existente se omiten
+    """
+    teachers = []
+    for record in records:
+        values = teacher_values(record)
+        if values is None or values[0]['username'] in seen or values[0]['email'] in seen:
+            counts['skipped'] += 1
+            continue
+        seen.update((values[0]['username'], values[0]['email']))
+        teachers.append(values)
+    if not teachers:
+        return
+
+    # Una consulta por columna para todo el lote
+    taken_usernames = _existing(User.username, [user['username'] for user, _ in teachers])
+    taken_emails = _existing(User.email, [user['email'] for user, _ in teachers])
+    fresh = [(user, profile) for user, profile in teachers
+             if user['username'] not in taken_usernames and user['email'] not in taken_emails]
+    counts['skipped'] += len(teachers) - len(fresh)
+    if not fresh:
+        return
+
+    groups = assign_groups([SimpleNamespace(**profile) for _, profile in fresh])['groups']
+    hashes = hasher.hash_many([user['password'] for user, _ in fresh])
+
+    db.session.execute(insert(User), [
+        {'username': user['username'], 'email': user['email'], 'password_hash': pwhash}
+        for (user, _), pwhash in zip(fresh, hashes)
+    ])
+    # Sin RETURNING en MySQL: los ids se leen por nombre de usuario
+    user_ids = dict(db.session.execute(
+        db.select(User.username, User.id).where(User.username.in_([user['username'] for user, _ in fresh]))
+    ).all())
+    db.session.execute(insert(UserProfile), [
+        {**profile, 'user_id': user_ids[user['username']], 'assigned_group': group}
+        for (user, profile), group in zip(fresh, groups)
+    ])
+
+    record_user_registered(len(fresh))
+    for group, n in Counter(groups).items():
+        record_group_change(None, group, n)
+    counts['imported'] += len(fresh)
+
+
+def import_teachers(records, hasher, checkpoint, chunk_size=CHUNK_SIZE):
+    """
+    Importa las filas a partir de la marca de agua `checkpoint`, con un
+    commit por lote; al terminar la marca de agua se elimina. Devuelve los
+    conteos de esta ejecución.
+    """
+    done = get_version(checkpoint)
+    counts = Counter(imported=0, skipped=0, resumed_at=done)
+    records = itertools.islice(records, done, None)
+    seen = set()
+    while True:
+        chunk = list(itertools.islice(records, chunk_size))
+        if not chunk:
+            break
+        try:
+            _import_chunk(chunk, hasher, seen, counts)
+            done += len(chunk)
+            # Filas y marca de agua en la misma transacción
+            set_version(checkpoint, done)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        db.session.expunge_all()
+        print(f"  {done} filas procesadas, {counts['imported']} docentes importados")
+    delete_version(checkpoint)
+    db.session.commit()
+    return counts
+
+
+def checkpoint_name(path):
+    """
+    Marca de agua por versión del archivo (ruta absoluta, tamaño y fecha de
+    modificación), dentro del largo de CacheVersion.name
+    """
+    stat = os.stat(path)
+    key = f'{os.path.abspath(path)}\x00{stat.st_size}\x00{stat.st_mtime_ns}'
+    return 'import:' + hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def import_teachers_from_file(path, chunk_size=CHUNK_SIZE, workers=None, restart=False):
+    """Importa docentes desde un archivo CSV o JSONL."""
+    app = create_app()
+    with app.app_context():
+        checkpoint = checkpoint_name(path)
+        if restart:
+            delete_version(checkpoint)
+            db.session.commit()
+        if workers is None:
+            workers = app.config['PASSWORD_HASH_WORKERS']
+        hasher = PasswordHasher(method=app.config['PASSWORD_HASH_METHOD'], workers=workers)
+        start = time.perf_counter()
+        try:
+            counts = import_teachers(iter_teacher_records(path), hasher, checkpoint, chunk_size=chunk_size)
+        except Exception as e:
+            print(f"Error importando docentes: {e}")
+            print("Vuelve a ejecutar el comando para retomar desde el último lote guardado.")
+            return
+        finally:
+            hasher.shutdown()
+        elapsed = time.perf_counter() - start
+        if counts['resumed_at']:
+            print(f"Importación retomada desde la fila {counts['resumed_at']}.")
+        print(f"Importación completada en {elapsed:.1f}s: {counts['imported']} docentes nuevos, "
+              f"{counts['skipped']} filas omitidas.")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Importar docentes desde un archivo CSV o JSONL.')
+    parser.add_argument('path', help='Archivo CSV con encabezado, o arreglo JSON / JSONL')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Filas por lote')
+    parser.add_argument('--workers', type=int, default=None, help='Hilos para el hash de contraseñas (por defecto, PASSWORD_HASH_WORKERS)')
+    parser.add_argument('--restart', action='store_true', help='Ignorar la marca de agua y empezar desde el inicio')
+    args = parser.parse_args()
+    import_teachers_from_file(args.path, chunk_size=args.chunk_size, workers=args.workers, restart=args.restart)
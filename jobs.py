@@ -0,0 +1,177 @@
+"""
+Trabajos en segundo plano: reentrenamiento del modelo de clustering
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy import update
+from __init__ import db
+from models import TrainingJob, UserProfile
+
+logger = logging.getLogger(__name__)
+
+# Un único hilo: los reentrenamientos se ejecutan de a uno
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='retraining')
+
+PROGRESS_INTERVAL = 1.0
+# Un trabajo sin latido en JOB_LEASE segundos se considera huérfano (worker caído)
+HEARTBEAT_INTERVAL = 30.0
+JOB_LEASE = 10 * 60
+
+# Tareas de mantenimiento cortas, separadas para no esperar a un reentrenamiento
+_maintenance = ThreadPoolExecutor(max_workers=1, thread_name_prefix='maintenance')
+_pending_maintenance = set()
+
+def _update_job(job_id, **values):
+    """
+    Actualiza el trabajo en su propia transacción, sin tocar la sesión que
+    está recorriendo los perfiles
+    """
+    with db.engine.begin() as conn:
+        conn.execute(update(TrainingJob).where(TrainingJob.id == job_id).values(**values))
+
+def _claim_job(job_id):
+    """
+    Pasa el trabajo de pendiente a en curso; False si ya no estaba pendiente
+    (p. ej. se dio por huérfano mientras esperaba)
+    """
+    with db.engine.begin() as conn:
+        result = conn.execute(
+            update(TrainingJob)
+            .where(TrainingJob.id == job_id, TrainingJob.status == 'pending')
+            .values(status='running', heartbeat_at=datetime.utcnow())
+        )
+    return result.rowcount == 1
+
+def _heartbeat(app, job_id, stop):
+    with app.app_context():
+        while not stop.wait(HEARTBEAT_INTERVAL):
+            try:
+                _update_job(job_id, heartbeat_at=datetime.utcnow())
+            except Exception:
+                logger.exception("No se pudo registrar el latido del reentrenamiento %s", job_id)
+
+def expire_stale_jobs():
+    """
+    Marca como fallidos los trabajos cuyo proceso dejó de dar latidos. Uno
+    pendiente solo caduca si no hay otro en curso delante de él.
+    """
+    now = datetime.utcnow()
+    cutoff = now - timedelta(seconds=JOB_LEASE)
+    lost = dict(status='failed', message='El proceso que ejecutaba el trabajo se detuvo', finished_at=now)
+    db.session.execute(
+        update(TrainingJob)
+        .where(TrainingJob.status == 'running', TrainingJob.heartbeat_at < cutoff)
+        .values(**lost)
+    )
+    if TrainingJob.query.filter_by(status='running').first() is None:
+        db.session.execute(
+            update(TrainingJob)
+            .where(TrainingJob.status == 'pending', TrainingJob.heartbeat_at < cutoff)
+            .values(**lost)
+        )
+
+def enqueue_retraining(app, n_clusters):
+    """
+    Encola un reentrenamiento con `n_clusters`. Si ya hay uno pendiente
+    (aún no iniciado) se actualiza su K en lugar de apilar otro; uno en curso
+    no se interrumpe. Los trabajos huérfanos se descartan antes. Devuelve
+    (trabajo, creado).
+    """
+    expire_stale_jobs()
+    pending = TrainingJob.query.filter_by(status='pending').first()
+    if pending:
+        pending.n_clusters = n_clusters
+        db.session.commit()
+        return pending, False
+
+    job = TrainingJob(n_clusters=n_clusters, status='pending')
+    db.session.add(job)
+    db.session.commit()
+    _executor.submit(_run_retraining, app, job.id)
+    return job, True
+
+def _run_retraining(app, job_id, chunk_size=5000):
+    """
+    Entrena el nuevo modelo y lo publica de forma atómica: el artefacto se
+    escribe a un temporal y se renombra, y el registro del proceso recarga
+    la nueva versión (los demás workers la detectan por mtime/hash)
+    """
+    from clustering.artifact import is_bundle, manifest_path, save_bundle
+    from clustering.model_registry import get_model_registry
+    from clustering.training import train_and_save
+    from utils import iter_profile_chunks
+
+    with app.app_context():
+        last_report = [0.0]
+
+        def progress(stage, processed):
+            now = time.monotonic()
+            if now - last_report[0] >= PROGRESS_INTERVAL:
+                last_report[0] = now
+                _update_job(job_id, stage=stage, processed=processed, heartbeat_at=datetime.utcnow())
+
+        if not _claim_job(job_id):
+            logger.warning("Reentrenamiento %s descartado: ya no estaba pendiente", job_id)
+            return
+        stop = threading.Event()
+        threading.Thread(target=_heartbeat, args=(app, job_id, stop), daemon=True).start()
+        try:
+            # K se lee al iniciar: pudo cambiar mientras el trabajo esperaba
+            n_clusters = db.session.get(TrainingJob, job_id).n_clusters
+            total = db.session.query(UserProfile).count()
+            _update_job(job_id, stage='scaler', total=total, processed=0)
+
+            registry = get_model_registry()
+            target = registry.model_path
+            pickle_path = target
+            if is_bundle(target):
+                pickle_path = os.path.join(os.path.dirname(manifest_path(target)), 'clustering_model.pkl')
+
+            assignment, engine = train_and_save(
+                lambda: iter_profile_chunks(chunk_size),
+                model_path=pickle_path,
+                n_clusters=n_clusters,
+                progress=progress
+            )
+            if is_bundle(target):
+                save_bundle(assignment, target)
+
+            registry.reload()
+            _update_job(job_id, status='done', stage='done', processed=engine.n_samples,
+                        model_version=registry.version, finished_at=datetime.utcnow())
+            logger.info("Reentrenamiento %s completado (modelo %s)", job_id, registry.version)
+        except Exception as e:
+            db.session.rollback()
+            logger.exception("Error en el reentrenamiento %s", job_id)
+            _update_job(job_id, status='failed', message=str(e), finished_at=datetime.utcnow())
+        finally:
+            stop.set()
+            db.session.remove()
+
+def schedule_stats_reconcile(app):
+    """
+    Encola la reconciliación de las estadísticas del dashboard si no hay
+    una ya pendiente en este proceso
+    """
+    if 'stats' in _pending_maintenance:
+        return False
+    _pending_maintenance.add('stats')
+    _maintenance.submit(_run_stats_reconcile, app)
+    return True
+
+def _run_stats_reconcile(app):
+    from stats_snapshot import reconcile_stats
+
+    with app.app_context():
+        try:
+            reconcile_stats()
+        except Exception:
+            db.session.rollback()
+            logger.exception("Error reconciliando las estadísticas del dashboard")
+        finally:
+            db.session.remove()
+            _pending_maintenance.discard('stats')
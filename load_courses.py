@@ -1,47 +1,178 @@
+"""
+Carga masiva del catálogo de cursos desde un arreglo JSON o un archivo JSONL.
+
+El archivo se lee por bloques y los cursos se escriben en lotes: un INSERT
+para los nuevos y un UPDATE por clave primaria para los modificados, con un
+commit por lote. Los cursos existentes se identifican por título con una
+sola consulta inicial.
+
+Uso:
+
+    python load_courses.py
+    python load_courses.py catalogo_nacional.jsonl --chunk-size 5000
+"""
+import argparse
+import hashlib
+import itertools
 import json
+import re
+import time
+from collections import Counter
+from sqlalchemy import insert, update
 from __init__ import create_app, db
 from models import Course
+from course_cache import invalidate_catalog
+
+COURSES_PATH = 'MDS/cursos.json'
+CHUNK_SIZE = 1000
+READ_SIZE = 1 << 16
+FIELDS = ('title', 'description', 'link', 'group')
+# Columnas que el catálogo puede omitir: si la entrada no las trae se
+# conserva el valor actual (p. ej. uno cargado por un administrador)
+OPTIONAL_FIELDS = ('duration', 'format')
+
+# Separadores entre elementos de un arreglo JSON
+_SEPARATORS = re.compile(r'[\s,]*')
+
+
+def iter_json_records(f, read_size=READ_SIZE):
+    """
+    Objetos de un arreglo JSON o de un archivo JSONL, leídos por bloques: la
+    memoria no crece con el tamaño del archivo
+    """
+    buffer = data = f.read(read_size)
+    while data and not buffer.strip():
+        data = f.read(read_size)
+        buffer += data
+    if buffer.lstrip()[:1] != '[':
+        # JSONL: se completa la última línea del primer bloque y se sigue línea a línea
+        for line in itertools.chain((buffer + f.readline()).splitlines(), f):
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+        return
+
+    decoder = json.JSONDecoder()
+    pos = buffer.index('[') + 1
+    eof = False
+    while True:
+        pos = _SEPARATORS.match(buffer, pos).end()
+        if pos < len(buffer) and buffer[pos] == ']':
+            return
+        try:
+            record, end = decoder.raw_decode(buffer, pos)
+            # Un valor que termina justo al final del bloque podría seguir en el siguiente
+            if end < len(buffer) or eof:
+                yield record
+                pos = end
+                continue
+        except json.JSONDecodeError:
+            if eof:
+                raise
+        data = f.read(read_size)
+        eof = not data
+        buffer, pos = buffer[pos:] + data, 0
+
 
-def load_courses_from_json():
-    """Carga los cursos desde un archivo JSON a la base de datos."""
+def course_values(course_info):
+    """
+    Columnas de Course a partir de una entrada del catálogo (claves en
+    español o inglés); None si faltan datos esenciales. Las columnas
+    opcionales se incluyen solo si la entrada las trae.
+    """
+    values = {
+        'title': course_info.get('titulo', course_info.get('title')),
+        'description': course_info.get('descripcion', course_info.get('description')),
+        'link': course_info.get('enlace', course_info.get('link')),
+        'group': course_info.get('grupo_formacion', course_info.get('group')),
+    }
+    if not all(values[field] for field in FIELDS):
+        return None
+    for field in OPTIONAL_FIELDS:
+        if field in course_info:
+            values[field] = course_info[field]
+    return values
+
+
+def _fingerprint(values):
+    return hashlib.sha1('\x00'.join(str(values[field] or '') for field in FIELDS).encode('utf-8')).digest()
+
+
+def _write_chunk(inserts, updates):
+    try:
+        if inserts:
+            db.session.execute(insert(Course), inserts)
+        if updates:
+            # UPDATE por clave primaria en lote (executemany)
+            db.session.execute(update(Course), updates)
+        # Los workers en ejecución recargan sus listas de cursos
+        invalidate_catalog()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def upsert_courses(records, chunk_size=CHUNK_SIZE):
+    """
+    Inserta los cursos nuevos y actualiza los que cambiaron, en lotes de
+    `chunk_size` filas. Las entradas sin datos esenciales, sin cambios o con
+    un título repetido en el archivo se omiten. Devuelve los conteos.
+    """
+    existing = {
+        row.title: (row.id, _fingerprint(row._mapping), tuple(getattr(row, field) for field in OPTIONAL_FIELDS))
+        for row in db.session.execute(
+            db.select(Course.id, *[getattr(Course, field) for field in FIELDS + OPTIONAL_FIELDS]))
+    }
+    counts = Counter(inserted=0, updated=0, skipped=0)
+    seen = set()
+    inserts, updates = [], []
+    for course_info in records:
+        values = course_values(course_info)
+        if values is None or values['title'] in seen:
+            counts['skipped'] += 1
+            continue
+        seen.add(values['title'])
+        current = existing.pop(values['title'], None)
+        if current is None:
+            # Filas nuevas con todas las columnas: un solo INSERT por lote
+            inserts.append({**dict.fromkeys(OPTIONAL_FIELDS), **values})
+        elif current[1] != _fingerprint(values) or any(
+                field in values and values[field] != value for field, value in zip(OPTIONAL_FIELDS, current[2])):
+            updates.append({'id': current[0], **values})
+        else:
+            counts['skipped'] += 1
+            continue
+        if len(inserts) + len(updates) >= chunk_size:
+            _write_chunk(inserts, updates)
+            counts['inserted'] += len(inserts)
+            counts['updated'] += len(updates)
+            inserts, updates = [], []
+    if inserts or updates:
+        _write_chunk(inserts, updates)
+        counts['inserted'] += len(inserts)
+        counts['updated'] += len(updates)
+    return counts
+
+
+def load_courses_from_json(path=COURSES_PATH, chunk_size=CHUNK_SIZE):
+    """Carga los cursos desde un archivo JSON o JSONL a la base de datos."""
     app = create_app()
     with app.app_context():
+        start = time.perf_counter()
         try:
-            with open('MDS/cursos.json', 'r', encoding='utf-8') as f:
-                courses_data = json.load(f)
-            
-            for course_info in courses_data:
-                # Mapeo flexible de claves JSON a los atributos del modelo Course
-                title = course_info.get('titulo', course_info.get('title'))
-                description = course_info.get('descripcion', course_info.get('description'))
-                link = course_info.get('enlace', course_info.get('link'))
-                group = course_info.get('grupo_formacion', course_info.get('group'))
-                duration = course_info.get('duration')
-                course_format = course_info.get('format')
-
-                # Validar que los campos esenciales no sean nulos
-                if not all([title, description, link, group]):
-                    print(f"Omitiendo curso por falta de datos esenciales: {course_info}")
-                    continue
-
-                # Crear instancia del curso si no existe
-                if not Course.query.filter_by(title=title).first():
-                    new_course = Course(
-                        title=title,
-                        description=description,
-                        link=link,
-                        group=group,
-                        duration=duration,
-                        format=course_format
-                    )
-                    db.session.add(new_course)
-            
-            db.session.commit()
-            print("Cursos cargados exitosamente.")
-
+            with open(path, 'r', encoding='utf-8') as f:
+                counts = upsert_courses(iter_json_records(f), chunk_size=chunk_size)
         except Exception as e:
-            db.session.rollback()
             print(f"Error al cargar los cursos: {e}")
+            return
+        elapsed = time.perf_counter() - start
+        print(f"Cursos cargados en {elapsed:.1f}s: {counts['inserted']} nuevos, "
+              f"{counts['updated']} actualizados, {counts['skipped']} omitidos.")
 
 if __name__ == '__main__':
-    load_courses_from_json()
+    parser = argparse.ArgumentParser(description='Cargar o actualizar el catálogo de cursos.')
+    parser.add_argument('path', nargs='?', default=COURSES_PATH, help='Arreglo JSON o archivo JSONL')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Cursos por lote')
+    args = parser.parse_args()
+    load_courses_from_json(args.path, chunk_size=args.chunk_size)
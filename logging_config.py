@@ -1,19 +1,50 @@
 """
 Configuración de logging para EduRecom
 """
+import atexit
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+_listeners = []
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler que no formatea en el hilo de la petición: el registro se
+    encola tal cual y el formateo ocurre en el hilo del QueueListener
+    """
+    def prepare(self, record):
+        return record
+
+def queued(*handlers):
+    """
+    Envuelve los handlers en un QueueHandler atendido por un QueueListener,
+    de modo que la escritura a disco/consola sale del hilo de la petición
+    """
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    _listeners.append(listener)
+    return DeferredQueueHandler(log_queue)
+
+def stop_queued_logging():
+    """
+    Vacía las colas y detiene los listeners (se ejecuta al salir)
+    """
+    while _listeners:
+        _listeners.pop().stop()
+
+atexit.register(stop_queued_logging)
 
 def setup_logging(app):
     """
     Configura el sistema de logging para la aplicación
     """
+    # Crear directorio de logs si no existe
+    os.makedirs('logs', exist_ok=True)
+
     if not app.debug:
-        # Crear directorio de logs si no existe
-        if not os.path.exists('logs'):
-            os.mkdir('logs')
-        
         # Handler para archivo
         file_handler = RotatingFileHandler(
             'logs/edurecom.log', 
@@ -24,7 +55,6 @@ def setup_logging(app):
             '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
         ))
         file_handler.setLevel(logging.INFO)
-        app.logger.addHandler(file_handler)
         
         # Handler para consola
         console_handler = logging.StreamHandler()
@@ -32,14 +62,18 @@ def setup_logging(app):
         console_handler.setFormatter(logging.Formatter(
             '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
         ))
-        app.logger.addHandler(console_handler)
+        app.logger.addHandler(queued(file_handler, console_handler))
         
         app.logger.setLevel(logging.INFO)
         app.logger.info('EduRecom startup')
     
-    # Logging específico para errores de clustering
+    # Logging específico para clustering: eventos estructurados y muestreados
+    # (ver clustering.events); DEBUG habilita los eventos de detalle por petición
+    from clustering.events import set_sample_rates
+    set_sample_rates(app.config.get('LOG_EVENT_SAMPLE_RATES'))
+
     clustering_logger = logging.getLogger('clustering')
-    clustering_logger.setLevel(logging.DEBUG)
+    clustering_logger.setLevel(app.config.get('CLUSTERING_LOG_LEVEL', logging.INFO))
     
     # Handler para archivo de clustering
     clustering_handler = RotatingFileHandler(
@@ -50,7 +84,6 @@ def setup_logging(app):
     clustering_handler.setFormatter(logging.Formatter(
         '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     ))
-    clustering_logger.addHandler(clustering_handler)
+    clustering_logger.addHandler(queued(clustering_handler))
     
     return app.logger
-
@@ -51,6 +51,9 @@ class CourseView(db.Model):
     course_id = db.Column(db.Integer, db.ForeignKey('course.id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     viewed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Momento del INSERT (los clics reintentados conservan su viewed_at original);
+    # los agregadores incrementales lo usan para no adelantarse a lotes sin confirmar
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relaciones
     course = db.relationship('Course', backref='views')
@@ -64,5 +67,84 @@ class Course(db.Model):
     group = db.Column(db.String(100), nullable=False)  # Group this course belongs to
     duration = db.Column(db.String(50), nullable=True)
     format = db.Column(db.String(50), nullable=True)
-    views_count = db.Column(db.Integer, default=0)  # Contador de visualizaciones
+    views_count = db.Column(db.Integer, default=0, index=True)  # Contador de visualizaciones
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# Configuración del algoritmo de asignación editable desde /admin/config (una sola fila)
+class AlgorithmConfig(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    n_clusters = db.Column(db.Integer, nullable=False, default=4)
+    confidence_threshold = db.Column(db.Float, nullable=False, default=0.7)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+# Reentrenamiento del modelo de clustering ejecutado en segundo plano
+class TrainingJob(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    n_clusters = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, running, done, failed
+    stage = db.Column(db.String(50), nullable=True)
+    processed = db.Column(db.Integer, default=0)
+    total = db.Column(db.Integer, default=0)
+    message = db.Column(db.Text, nullable=True)
+    model_version = db.Column(db.String(20), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Último latido del proceso que lo tiene; sin latidos recientes el trabajo se da por perdido
+    heartbeat_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+# Versión de datos compartida entre workers para invalidar cachés en memoria
+class CacheVersion(db.Model):
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+# Usuarios cuyo caché de sesión (user_cache.py) deben descartar todos los workers.
+# Sin clave foránea: un usuario borrado también se invalida.
+class UserCacheInvalidation(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+# Co-visualizaciones: usuarios distintos que abrieron ambos cursos (la diagonal
+# guarda los usuarios distintos de cada curso). Se actualiza de forma incremental.
+class CourseCoView(db.Model):
+    course_id = db.Column(db.Integer, db.ForeignKey('course.id'), primary_key=True)
+    other_course_id = db.Column(db.Integer, db.ForeignKey('course.id'), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    # Marca de agua 'coview' con que se modificó la fila por última vez
+    watermark = db.Column(db.Integer, nullable=False, default=0, index=True)
+
+# Instantánea de las estadísticas del dashboard (una sola fila), mantenida por
+# las rutas de escritura y reconciliada periódicamente
+class DashboardStats(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    num_users = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    reconciled_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# Contadores del dashboard por grupo: perfiles asignados y vistas de sus cursos.
+# Cada delta es un upsert atómico sobre la fila de su grupo.
+class DashboardGroupStats(db.Model):
+    group = db.Column(db.String(100), primary_key=True)
+    profiles = db.Column(db.Integer, nullable=False, default=0)
+    views = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# Resúmenes de CourseView por hora y por día (bucket = inicio del período)
+class CourseViewHourly(db.Model):
+    course_id = db.Column(db.Integer, db.ForeignKey('course.id'), primary_key=True)
+    bucket = db.Column(db.DateTime, primary_key=True)
+    group = db.Column(db.String(100), nullable=False, index=True)
+    views = db.Column(db.Integer, nullable=False, default=0)
+
+class CourseViewDaily(db.Model):
+    course_id = db.Column(db.Integer, db.ForeignKey('course.id'), primary_key=True)
+    bucket = db.Column(db.Date, primary_key=True)
+    group = db.Column(db.String(100), nullable=False, index=True)
+    views = db.Column(db.Integer, nullable=False, default=0)
+
+# Sketch HyperLogLog de los usuarios distintos que vieron un curso en un día
+class CourseViewerSketch(db.Model):
+    course_id = db.Column(db.Integer, db.ForeignKey('course.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    group = db.Column(db.String(100), nullable=False, index=True)
+    registers = db.Column(db.LargeBinary(1024), nullable=False)
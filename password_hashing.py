@@ -0,0 +1,150 @@
+"""
+Hash de contraseñas en un pool de hilos acotado.
+
+generate_password_hash/check_password_hash son deliberadamente costosos
+(scrypt/pbkdf2). hashlib libera el GIL durante el cálculo, así que un pool
+de hilos los reparte entre núcleos sin crear procesos: un pool de procesos
+con 'spawn' (o 'forkserver') reimporta el __main__ del padre en cada hijo y,
+con `python app.py`, eso crea la aplicación, la base de datos y los
+listeners de logs en cada proceso del pool.
+
+El hilo de la petición sigue esperando el resultado: el pool no lo libera,
+solo acota cuántos hashes corren a la vez. Si hay más de `max_pending`
+trabajos en curso o en espera se lanza PasswordHashingBusy (la ruta
+responde 503) en lugar de encolar sin fin y saturar la CPU del worker.
+
+Al verificar una contraseña correcta cuyo hash usa parámetros distintos
+de PASSWORD_HASH_METHOD, el mismo trabajo devuelve un hash nuevo para
+guardarlo (rehash transparente).
+
+Cada proceso web crea su propio pool, así que la cantidad de hilos de hash
+por defecto es pequeña y fija (PASSWORD_HASH_WORKERS) en lugar de uno por
+núcleo: con varios workers de gunicorn, un pool por núcleo en cada uno
+multiplicaría los hilos por la cantidad de workers.
+"""
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from functools import lru_cache
+from werkzeug.security import check_password_hash, generate_password_hash
+
+DEFAULT_METHOD = 'scrypt'
+DEFAULT_WORKERS = 2
+
+
+class PasswordHashingBusy(Exception):
+    """
+    El pool de hash está saturado o no respondió a tiempo
+    """
+
+
+@lru_cache(maxsize=8)
+def _method_prefix(method):
+    """
+    Prefijo normalizado que werkzeug guarda en el hash (p. ej.
+    'scrypt:32768:8:1'); se calcula una vez por proceso
+    """
+    return generate_password_hash('', method).split('$', 1)[0]
+
+
+def needs_rehash(pwhash, method):
+    return pwhash.split('$', 1)[0] != _method_prefix(method)
+
+
+def _hash(password, method):
+    return generate_password_hash(password, method)
+
+
+def _verify(pwhash, password, method):
+    """
+    Devuelve (válida, hash_nuevo_o_None)
+    """
+    if not check_password_hash(pwhash, password):
+        return False, None
+    if needs_rehash(pwhash, method):
+        return True, generate_password_hash(password, method)
+    return True, None
+
+
+class PasswordHasher:
+    """
+    Pool de `workers` hilos con a lo sumo `max_pending` trabajos en
+    curso o en espera. Con workers=0 el hash se calcula en el hilo actual.
+    """
+
+    def __init__(self, method=DEFAULT_METHOD, workers=None, max_pending=None, timeout=10.0):
+        self.method = method
+        self.workers = DEFAULT_WORKERS if workers is None else workers
+        self.max_pending = max_pending or max(self.workers * 4, 1)
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='password-hash')
+        return self._executor
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHashingBusy(f"{self.max_pending} hashes pendientes")
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            raise PasswordHashingBusy(f"sin respuesta en {self.timeout}s")
+
+    def hash(self, password):
+        return self._run(_hash, password, self.method)
+
+    def hash_many(self, passwords):
+        """
+        Hashes de una lista de contraseñas repartidos entre los hilos, para
+        cargas masivas (no pasa por el límite de pendientes de las peticiones)
+        """
+        if not self.workers:
+            return [_hash(password, self.method) for password in passwords]
+        return list(self._get_executor().map(_hash, passwords, itertools.repeat(self.method)))
+
+    def verify(self, pwhash, password):
+        """
+        Devuelve (válida, hash_nuevo_o_None); hay hash nuevo solo si la
+        contraseña es correcta y el hash guardado usa otros parámetros
+        """
+        return self._run(_verify, pwhash, password, self.method)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_hasher = None
+_hasher_lock = threading.Lock()
+
+
+def get_password_hasher(app):
+    """
+    Obtiene (o crea) el hasher del proceso, configurado desde app.config
+    """
+    global _hasher
+    if _hasher is None:
+        with _hasher_lock:
+            if _hasher is None:
+                config = app.config
+                _hasher = PasswordHasher(
+                    method=config.get('PASSWORD_HASH_METHOD', DEFAULT_METHOD),
+                    workers=config.get('PASSWORD_HASH_WORKERS', DEFAULT_WORKERS),
+                    max_pending=config.get('PASSWORD_HASH_MAX_PENDING'),
+                    timeout=config.get('PASSWORD_HASH_TIMEOUT', 10.0),
+                )
+    return _hasher
@@ -0,0 +1,184 @@
+"""
+Esquema compilado del formulario de perfil dinámico.
+
+Las preguntas de questions_admin.json se compilan una sola vez en una clase
+de formulario, sus opciones y una tabla de conversión por campo. El caché
+se invalida con la versión 'questions' de CacheVersion, que admin_questions
+incrementa al guardar, o cuando cambian la fecha de modificación o el tamaño
+del archivo (ediciones manuales o en un despliegue). Cada worker revisa
+ambas cosas como máximo una vez cada CHECK_INTERVAL segundos y solo
+recompila si cambió el contenido del archivo.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from flask_wtf import FlaskForm
+from wtforms import SelectField, StringField, BooleanField, SubmitField
+from wtforms.validators import DataRequired
+from __init__ import db
+from cache_versions import VersionWatch, bump_version
+
+QUESTIONS_PATH = 'questions_admin.json'
+VERSION_NAME = 'questions'
+CHECK_INTERVAL = 2.0
+
+# Preguntas por defecto para el editor cuando aún no existe el archivo
+DEFAULT_QUESTIONS = [
+    {"name": "role", "type": "select", "label": "¿Cuál es tu rol en el establecimiento educativo?", "choices": ["profesor", "director", "asistente"]},
+    {"name": "age_range", "type": "select", "label": "¿En qué rango de edad te encuentras?", "choices": ["20-30", "31-40", "41-50", "51+"]},
+    {"name": "digital_tools_skill", "type": "select", "label": "Herramientas TI básicas", "choices": ["1", "2", "3", "4", "5"]}
+]
+
+# Campos de selección guardados como entero (3 si llega vacío)
+NUMERIC_FIELDS = {'digital_tools_skill', 'advanced_tic_skill', 'digital_citizenship_skill',
+                  'teaching_tech_skill', 'leadership_support', 'resource_support'}
+# Valor por defecto de los campos de selección de texto
+SELECT_DEFAULTS = {'role': 'profesor', 'school_type': 'urbana', 'dependency': 'municipal',
+                   'age_range': '31-40', 'learning_format': 'en-linea'}
+
+
+def _coerce_numeric(value):
+    return int(value) if value else 3
+
+def _coerce_boolean(value):
+    return value if value is not None else False
+
+def _identity(value):
+    return value
+
+def _coerce_default(default):
+    return lambda value: value or default
+
+
+class CompiledSchema:
+    """
+    Preguntas, clase de formulario y conversión por campo listas para usar
+    """
+
+    def __init__(self, questions, digest):
+        self.questions = questions
+        self.digest = digest
+        self.form_class = self._build_form_class(questions)
+        self.coercions = {q['name']: self._coercion(q) for q in questions}
+
+    @staticmethod
+    def _choices(question):
+        choices_data = question.get('choices', [])
+        if choices_data and isinstance(choices_data[0], dict):
+            return tuple((c['value'], c['label']) for c in choices_data)
+        return tuple((c, c) for c in choices_data)
+
+    def _build_form_class(self, questions):
+        fields = {}
+        for q in questions:
+            if q['type'] == 'select':
+                fields[q['name']] = SelectField(q['label'], choices=self._choices(q), validators=[DataRequired()])
+            elif q['type'] == 'text':
+                fields[q['name']] = StringField(q['label'], validators=[DataRequired()])
+            elif q['type'] == 'boolean':
+                fields[q['name']] = BooleanField(q['label'])
+        fields['submit'] = SubmitField('Obtener recomendaciones')
+        return type('DynamicProfileForm', (FlaskForm,), fields)
+
+    @staticmethod
+    def _coercion(question):
+        name = question['name']
+        if question['type'] == 'select':
+            if name in NUMERIC_FIELDS:
+                return _coerce_numeric
+            if name in SELECT_DEFAULTS:
+                return _coerce_default(SELECT_DEFAULTS[name])
+        elif question['type'] == 'boolean':
+            return _coerce_boolean
+        return _identity
+
+    def coerce(self, name, value):
+        return self.coercions.get(name, _identity)(value)
+
+
+def _stat_key(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _read_questions(path):
+    """
+    Devuelve (preguntas, hash del contenido); ([], None) si no hay archivo
+    """
+    if not os.path.exists(path):
+        return [], None
+    with open(path, 'rb') as f:
+        data = f.read()
+    return json.loads(data.decode('utf-8')), hashlib.sha256(data).hexdigest()
+
+
+_lock = threading.Lock()
+_watch = VersionWatch(VERSION_NAME, CHECK_INTERVAL)
+_schema = None
+# (mtime, tamaño) del archivo compilado y última vez que se revisó
+_file_stat = None
+_last_stat_check = float('-inf')
+
+
+def get_profile_form_schema(path=QUESTIONS_PATH):
+    """
+    Esquema vigente. Tras el calentamiento no lee el archivo: cada
+    CHECK_INTERVAL segundos revisa la versión en la base de datos y la
+    fecha de modificación y el tamaño del archivo.
+    """
+    global _schema, _file_stat, _last_stat_check
+    try:
+        version, previous = _watch.poll()
+        changed = version != previous
+    except Exception:
+        # Sin tabla o sin base de datos: se revisa solo el contenido del archivo
+        db.session.rollback()
+        changed = True
+    now = time.monotonic()
+    if not changed and now - _last_stat_check >= CHECK_INTERVAL:
+        _last_stat_check = now
+        changed = _stat_key(path) != _file_stat
+    if _schema is not None and not changed:
+        return _schema
+    with _lock:
+        # Antes de leer: si el archivo cambia durante la lectura se vuelve a revisar
+        _file_stat = _stat_key(path)
+        questions, digest = _read_questions(path)
+        if _schema is None or digest != _schema.digest:
+            _schema = CompiledSchema(questions, digest)
+    return _schema
+
+
+def load_questions(path=QUESTIONS_PATH):
+    """
+    Preguntas para el editor de administración (las por defecto si no hay archivo)
+    """
+    questions, digest = _read_questions(path)
+    return questions if digest is not None else [dict(q) for q in DEFAULT_QUESTIONS]
+
+
+def save_questions(questions, path=QUESTIONS_PATH):
+    """
+    Escribe las preguntas de forma atómica (temporal + rename) e incrementa
+    la versión para que cada worker recompile el formulario una sola vez
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.questions-', suffix='.json', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(questions, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    bump_version(VERSION_NAME)
+    db.session.commit()
+    # Este worker recompila en su próxima lectura
+    _watch.expire()
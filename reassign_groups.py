@@ -0,0 +1,63 @@
+import argparse
+import time
+from collections import Counter
+from sqlalchemy import update
+from __init__ import create_app, db
+from models import UserProfile
+from utils import assign_groups, iter_profile_chunks
+from stats_snapshot import record_group_change
+from user_cache import invalidate_users
+
+def reassign_all_groups(chunk_size=2000, confidence_threshold=None, dry_run=False):
+    """Reasigna el grupo de todos los perfiles usando el modelo por lotes.
+    Sin umbral explícito se usa el configurado en /admin/config."""
+    app = create_app()
+    with app.app_context():
+        print("Reasignando grupos de formación...")
+        start = time.perf_counter()
+        total = changed = 0
+
+        try:
+            for chunk in iter_profile_chunks(chunk_size):
+                result = assign_groups(chunk, confidence_threshold=confidence_threshold)
+
+                # Solo se escriben las filas cuyo grupo cambió
+                moved = [
+                    (profile, group) for profile, group in zip(chunk, result['groups'])
+                    if profile.assigned_group != group
+                ]
+                updates = [{'id': profile.id, 'assigned_group': group} for profile, group in moved]
+                total += len(chunk)
+                changed += len(updates)
+
+                if updates and not dry_run:
+                    # Antes del UPDATE: el UPDATE por clave primaria sincroniza los
+                    # perfiles de la sesión y el grupo anterior se perdería
+                    moves = Counter((profile.assigned_group, group) for profile, group in moved)
+                    user_ids = [profile.user_id for profile, _ in moved]
+                    db.session.execute(update(UserProfile), updates)
+                    # Conteos por grupo del dashboard en la misma transacción
+                    for (old_group, new_group), count in moves.items():
+                        record_group_change(old_group, new_group, count)
+                    # Los workers descartan los perfiles cacheados con el grupo anterior
+                    invalidate_users(user_ids)
+                    db.session.commit()
+
+                print(f"  {total} perfiles procesados, {changed} con grupo nuevo")
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error reasignando grupos: {e}")
+            return
+
+        elapsed = time.perf_counter() - start
+        print(f"Reasignación completada: {total} perfiles, {changed} actualizados en {elapsed:.1f}s.")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Reasignar el grupo de formación de todos los perfiles.')
+    parser.add_argument('--chunk-size', type=int, default=2000, help='Perfiles por bloque')
+    parser.add_argument('--threshold', type=float, default=None,
+                        help='Umbral de confianza para la asignación automática (por defecto, el de /admin/config)')
+    parser.add_argument('--dry-run', action='store_true', help='Calcular sin escribir en la base de datos')
+    args = parser.parse_args()
+
+    reassign_all_groups(args.chunk_size, args.threshold, args.dry_run)
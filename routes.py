@@ -1,16 +1,28 @@
-from flask import render_template, request, redirect, url_for, flash
+from flask import render_template, request, redirect, url_for, flash, jsonify, current_app, abort
 from flask_login import login_user, logout_user, login_required, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
 from __init__ import db
-from models import User, UserProfile, Course, CourseView
+from models import User, UserProfile, Course, CourseView, TrainingJob
 from forms import RegistrationForm, LoginForm, ProfileForm, AdminConfigForm, CourseForm
-from utils import assign_group
+from utils import assign_group, _manual_assign_group, keyset_page
+from assignment_queue import get_assignment_batcher, profile_snapshot
+from algorithm_config import get_algorithm_config, save_algorithm_config
+from jobs import enqueue_retraining, schedule_stats_reconcile
+from stats_snapshot import get_stats_snapshot, needs_reconcile, record_user_registered, record_group_change
+from course_cache import get_course, get_fallback_courses, invalidate_catalog
+from click_buffer import get_click_buffer
+from view_rollups import TREND_DAYS, group_trends, sparkline_points
+from viewer_sketches import unique_viewers_by_group
+from profile_form_schema import get_profile_form_schema, load_questions, save_questions
+from password_hashing import PasswordHashingBusy, get_password_hasher
+from course_coviews import get_blended_courses
+from user_cache import invalidate_user
 from functools import wraps
-from flask_wtf import FlaskForm
-from wtforms import SelectField, StringField, BooleanField, SubmitField
-from wtforms.validators import DataRequired
-import json
-import os
+from datetime import datetime
+from sqlalchemy import func
+from sqlalchemy.orm import selectinload
+
+# Filas por página en los listados de administración
+ADMIN_PAGE_SIZE = 50
 
 def admin_required(f):
     @wraps(f)
@@ -49,6 +61,12 @@ def non_admin_required(f):
     return decorated_function
 
 def register_routes(app):
+    @app.errorhandler(PasswordHashingBusy)
+    def password_hashing_busy(e):
+        # Fallo rápido: el pool de hash está saturado, el cliente reintenta
+        app.logger.warning(f"Hash de contraseñas saturado: {e}")
+        return 'El servicio está ocupado. Intenta nuevamente en unos segundos.', 503, {'Retry-After': '2'}
+
     @app.route('/')
     def index():
         if current_user.is_authenticated:
@@ -82,9 +100,10 @@ def register_routes(app):
             user = User(
                 username=form.username.data,
                 email=form.email.data,
-                password_hash=generate_password_hash(form.password.data)
+                password_hash=get_password_hasher(current_app).hash(form.password.data)
             )
             db.session.add(user)
+            record_user_registered()
             db.session.commit()
             
             flash('Registro exitoso. Ahora puedes iniciar sesión.', 'success')
@@ -100,7 +119,13 @@ def register_routes(app):
         form = LoginForm()
         if form.validate_on_submit():
             user = User.query.filter_by(username=form.username.data).first()
-            if user and check_password_hash(user.password_hash, form.password.data):
+            valid, new_hash = (get_password_hasher(current_app).verify(user.password_hash, form.password.data)
+                               if user else (False, None))
+            if valid:
+                if new_hash:
+                    # Parámetros de hash cambiados: se guarda el hash actualizado
+                    user.password_hash = new_hash
+                    db.session.commit()
                 login_user(user)
                 flash(f'¡Bienvenido/a, {user.username}!', 'success')
                 next_page = request.args.get('next')
@@ -130,30 +155,10 @@ def register_routes(app):
             flash('Los administradores no pueden acceder a esta página.', 'warning')
             return redirect(url_for('admin_dashboard'))
         
-        # Cargar preguntas dinámicas
-        questions_path = 'questions_admin.json'
-        if os.path.exists(questions_path):
-            with open(questions_path, 'r', encoding='utf-8') as f:
-                questions = json.load(f)
-        else:
-            questions = []
-        # Crear formulario dinámico
-        class DynamicProfileForm(FlaskForm):
-            pass
-        for q in questions:
-            if q['type'] == 'select':
-                choices_data = q.get('choices', [])
-                if choices_data and isinstance(choices_data[0], dict):
-                    choices = [(c['value'], c['label']) for c in choices_data]
-                else:
-                    choices = [(c, c) for c in choices_data]
-                setattr(DynamicProfileForm, q['name'], SelectField(q['label'], choices=choices, validators=[DataRequired()]))
-            elif q['type'] == 'text':
-                setattr(DynamicProfileForm, q['name'], StringField(q['label'], validators=[DataRequired()]))
-            elif q['type'] == 'boolean':
-                setattr(DynamicProfileForm, q['name'], BooleanField(q['label']))
-        setattr(DynamicProfileForm, 'submit', SubmitField('Obtener recomendaciones'))
-        form = DynamicProfileForm()
+        # Esquema compilado y cacheado (sin leer el archivo en cada petición)
+        schema = get_profile_form_schema()
+        questions = schema.questions
+        form = schema.form_class()
         # Si el usuario ya tiene perfil, poblar el formulario
         if current_user.profile and request.method == 'GET':
             profile = current_user.profile
@@ -173,33 +178,28 @@ def register_routes(app):
                     if current_user.profile and hasattr(current_user.profile, 'role') and current_user.profile.role == 'admin' and q['name'] == 'role':
                         continue
 
-                    field_value = getattr(form, q['name']).data
-                    
-                    # Convertir valores según el tipo de campo
-                    if q['type'] == 'select':
-                        if q['name'] in ['digital_tools_skill', 'advanced_tic_skill', 'digital_citizenship_skill', 
-                                       'teaching_tech_skill', 'leadership_support', 'resource_support']:
-                            # Convertir a entero para campos numéricos
-                            field_value = int(field_value) if field_value else 3
-                        else:
-                            # Para campos de texto, usar valor por defecto si está vacío
-                            field_value = field_value or 'profesor' if q['name'] == 'role' else \
-                                        field_value or 'urbana' if q['name'] == 'school_type' else \
-                                        field_value or 'municipal' if q['name'] == 'dependency' else \
-                                        field_value or '31-40' if q['name'] == 'age_range' else \
-                                        field_value or 'en-linea' if q['name'] == 'learning_format' else field_value
-                    elif q['type'] == 'boolean':
-                        # Para campos booleanos, usar False si es None
-                        field_value = field_value if field_value is not None else False
+                    # Conversión y valor por defecto según la tabla del esquema
+                    field_value = schema.coerce(q['name'], getattr(form, q['name']).data)
                     
                     setattr(profile, q['name'], field_value)
             
             # Asignar grupo y guardar
             try:
-                profile.assigned_group = assign_group(profile)
+                previous_group = profile.assigned_group if current_user.profile else None
+                async_assignment = current_app.config.get('ASYNC_ASSIGNMENT')
+                if async_assignment:
+                    # Grupo provisional por reglas; el modelo lo ajusta en segundo plano
+                    profile.assigned_group = _manual_assign_group(profile)
+                else:
+                    profile.assigned_group = assign_group(profile)
                 if not current_user.profile:
                     db.session.add(profile)
+                record_group_change(previous_group, profile.assigned_group)
+                invalidate_user(current_user.id)
                 db.session.commit()
+                if async_assignment:
+                    get_assignment_batcher(current_app._get_current_object()).submit(
+                        profile.id, profile_snapshot(profile), profile.assigned_group)
                 
                 # Verificar que el perfil se haya guardado correctamente
                 if profile.assigned_group:
@@ -237,12 +237,13 @@ def register_routes(app):
             
             # Get courses for the user's assigned group
             try:
-                courses = Course.query.filter_by(group=current_user.profile.assigned_group).all()
+                # Cursos del grupo ordenados por relevancia, con vecinos por co-visualización
+                courses = get_blended_courses(current_user.id, current_user.profile, current_user.profile.assigned_group)
                 
                 if not courses:
                     flash(f'No se encontraron cursos para el grupo "{current_user.profile.assigned_group}". Contacta al administrador.', 'warning')
                     # Fallback: mostrar cursos de todos los grupos
-                    courses = Course.query.limit(10).all()
+                    courses = get_fallback_courses()
                     
             except Exception as e:
                 print(f"Error al consultar cursos: {e}")
@@ -263,75 +264,90 @@ def register_routes(app):
     @non_admin_required
     def track_course_view(course_id):
         """Rastrea cuando un usuario hace clic en un curso"""
+        # El curso sale del catálogo en caché y el clic va al buffer: la
+        # redirección no espera a la base de datos
+        course = get_course(course_id)
+        if course is None:
+            abort(404)
         try:
-            course = Course.query.get_or_404(course_id)
-            
-            # Incrementar contador de visualizaciones
-            course.views_count += 1
-            
-            # Registrar la visualización en CourseView
-            course_view = CourseView(
-                course_id=course.id,
-                user_id=current_user.id
-            )
-            
-            db.session.add(course_view)
-            db.session.commit()
-            
-            # Redirigir al enlace del curso
-            return redirect(course.link)
-            
+            get_click_buffer(current_app._get_current_object()).record(course.id, current_user.id)
         except Exception as e:
             print(f"Error rastreando visualización del curso: {e}")
-            # Si hay error, solo redirigir al curso
-            try:
-                course = Course.query.get_or_404(course_id)
-                return redirect(course.link)
-            except:
-                flash('Error al acceder al curso. Por favor, intenta nuevamente.', 'danger')
-                return redirect(url_for('recommendations'))
+        return redirect(course.link)
 
     @app.route('/admin/dashboard')
     @login_required
     @admin_required
     def admin_dashboard():
-        # Métricas: número de usuarios, clusters activos, recomendaciones más vistas
-        num_usuarios = User.query.count()
-        num_clusters = db.session.query(UserProfile.assigned_group).distinct().count()
-        
-        # Top recomendaciones (cursos más vistos por grupo) - ESTADÍSTICAS REALES
+        # Métricas desde la instantánea (contadores globales y por grupo), mantenida por las rutas de escritura
         try:
-            # Cursos más vistos por grupo
-            top_recomendaciones = db.session.query(
-                Course.group, 
-                db.func.sum(Course.views_count).label('total_views')
-            ).group_by(Course.group).order_by(db.func.sum(Course.views_count).desc()).all()
-            
-            # Top 5 cursos individuales más vistos
-            top_cursos = Course.query.order_by(Course.views_count.desc()).limit(5).all()
-            
-            # Total de visualizaciones en el sistema
-            total_views = db.session.query(db.func.sum(Course.views_count)).scalar() or 0
-            
+            stats = get_stats_snapshot()
+            if needs_reconcile(stats):
+                schedule_stats_reconcile(current_app._get_current_object())
+            num_usuarios = stats.num_users
+            num_clusters = sum(1 for count in stats.group_profiles.values() if count > 0)
+            top_recomendaciones = sorted(stats.group_views.items(), key=lambda item: -item[1])
+            top_cursos = stats.top_courses
+            total_views = stats.total_views
+            stats_age = (datetime.utcnow() - stats.updated_at).total_seconds()
+            reconciled_at = stats.reconciled_at
         except Exception as e:
             print(f"Error obteniendo estadísticas: {e}")
+            db.session.rollback()
+            num_usuarios = num_clusters = total_views = 0
             top_recomendaciones = []
             top_cursos = []
-            total_views = 0
+            stats_age = reconciled_at = None
+        
+        # Tendencia de 90 días por grupo desde el resumen diario (pocas filas)
+        try:
+            trends = [
+                {'group': group, 'total': sum(values), 'points': sparkline_points(values)}
+                for group, values in sorted(group_trends().items())
+            ]
+        except Exception as e:
+            print(f"Error obteniendo tendencias: {e}")
+            db.session.rollback()
+            trends = []
+        
+        # Docentes distintos por grupo en 30 días (unión de sketches HyperLogLog)
+        try:
+            unique_viewers = unique_viewers_by_group(days=30)
+        except Exception as e:
+            print(f"Error obteniendo visitantes únicos: {e}")
+            db.session.rollback()
+            unique_viewers = {}
         
         return render_template('admin_dashboard.html', 
                              num_usuarios=num_usuarios, 
                              num_clusters=num_clusters, 
                              top_recomendaciones=top_recomendaciones,
                              top_cursos=top_cursos,
-                             total_views=total_views)
+                             total_views=total_views,
+                             stats_age=stats_age,
+                             reconciled_at=reconciled_at,
+                             trends=trends,
+                             unique_viewers=unique_viewers,
+                             trend_days=TREND_DAYS)
 
     @app.route('/admin/users')
     @login_required
     @admin_required
     def admin_users():
-        users = User.query.all()
-        return render_template('admin_users.html', users=users)
+        # Paginación por cursor: ?after=<último id de la página anterior>
+        after = request.args.get('after', type=int)
+        users, next_cursor = keyset_page(
+            db.select(User).options(selectinload(User.profile)),
+            User.id, cursor=after, per_page=ADMIN_PAGE_SIZE
+        )
+        # Visualizaciones por usuario en una sola consulta agrupada
+        view_counts = dict(db.session.execute(
+            db.select(CourseView.user_id, func.count(CourseView.id))
+            .where(CourseView.user_id.in_([user.id for user in users]))
+            .group_by(CourseView.user_id)
+        ).all()) if users else {}
+        return render_template('admin_users.html', users=users, view_counts=view_counts,
+                               next_cursor=next_cursor, is_first_page=after is None)
 
     @app.route('/admin/users/<int:user_id>/make_admin', methods=['POST'])
     @login_required
@@ -340,6 +356,7 @@ def register_routes(app):
         user = User.query.get_or_404(user_id)
         if user.profile:
             user.profile.role = 'admin'
+            invalidate_user(user.id)
             db.session.commit()
             flash('Rol de administrador asignado correctamente.', 'success')
         else:
@@ -369,6 +386,7 @@ def register_routes(app):
             
             # Borrar el usuario
             db.session.delete(user)
+            invalidate_user(user.id)
             db.session.commit()
             
             flash(f'Usuario "{user.username}" borrado exitosamente.', 'success')
@@ -383,33 +401,50 @@ def register_routes(app):
     @login_required
     @admin_required
     def admin_config():
-        # Configuración simplificada sin archivos externos
-        default_config = {'n_clusters': 4, 'confidence_threshold': 0.7}
-        form = AdminConfigForm(data=default_config)
+        config = get_algorithm_config()
+        form = AdminConfigForm(data=config)
         
         if form.validate_on_submit():
-            # Aquí podrías implementar la lógica para guardar en base de datos
+            previous = save_algorithm_config(form.n_clusters.data, form.confidence_threshold.data)
             flash('Configuración actualizada correctamente.', 'success')
+            
+            # Cambiar K requiere reentrenar; el umbral se aplica de inmediato
+            if previous['n_clusters'] != form.n_clusters.data:
+                job, created = enqueue_retraining(current_app._get_current_object(), form.n_clusters.data)
+                if created:
+                    flash('Reentrenamiento del modelo encolado en segundo plano.', 'info')
+                else:
+                    flash(f'Se actualizó el reentrenamiento pendiente #{job.id}.', 'info')
             return redirect(url_for('admin_config'))
             
-        return render_template('admin_config.html', form=form, config=default_config)
+        job = TrainingJob.query.order_by(TrainingJob.id.desc()).first()
+        return render_template('admin_config.html', form=form, config=config, job=job)
+
+    @app.route('/admin/config/job')
+    @login_required
+    @admin_required
+    def admin_config_job():
+        # Estado del último reentrenamiento, para consultar el progreso
+        job = TrainingJob.query.order_by(TrainingJob.id.desc()).first()
+        if job is None:
+            return jsonify({'job': None})
+        return jsonify({'job': {
+            'id': job.id,
+            'n_clusters': job.n_clusters,
+            'status': job.status,
+            'stage': job.stage,
+            'processed': job.processed,
+            'total': job.total,
+            'message': job.message,
+            'model_version': job.model_version,
+        }})
 
     @app.route('/admin/questions', methods=['GET', 'POST'])
     @login_required
     @admin_required
     def admin_questions():
-        questions_path = 'questions_admin.json'
         # Estructura: lista de preguntas, cada una con tipo, label, opciones (si aplica)
-        if os.path.exists(questions_path):
-            with open(questions_path, 'r', encoding='utf-8') as f:
-                questions = json.load(f)
-        else:
-            # Preguntas por defecto (ejemplo)
-            questions = [
-                {"name": "role", "type": "select", "label": "¿Cuál es tu rol en el establecimiento educativo?", "choices": ["profesor", "director", "asistente"]},
-                {"name": "age_range", "type": "select", "label": "¿En qué rango de edad te encuentras?", "choices": ["20-30", "31-40", "41-50", "51+"]},
-                {"name": "digital_tools_skill", "type": "select", "label": "Herramientas TI básicas", "choices": ["1", "2", "3", "4", "5"]}
-            ]
+        questions = load_questions()
         if request.method == 'POST':
             # Recibir cambios desde el formulario (agregar, editar, eliminar preguntas)
             action = request.form.get('action')
@@ -421,8 +456,8 @@ def register_routes(app):
             elif action == 'delete':
                 idx = int(request.form['idx'])
                 questions.pop(idx)
-            with open(questions_path, 'w', encoding='utf-8') as f:
-                json.dump(questions, f, ensure_ascii=False, indent=2)
+            # Escritura atómica y nueva versión para que los workers recompilen
+            save_questions(questions)
             flash('Preguntas actualizadas correctamente.', 'success')
             return redirect(url_for('admin_questions'))
         return render_template('admin_questions.html', questions=questions)
@@ -432,8 +467,13 @@ def register_routes(app):
     @login_required
     @admin_required
     def admin_courses():
-        courses = Course.query.order_by(Course.created_at.desc()).all()
-        return render_template('admin_courses.html', courses=courses)
+        # Más recientes primero; ?before=<último id de la página anterior>
+        before = request.args.get('before', type=int)
+        courses, next_cursor = keyset_page(
+            db.select(Course), Course.id, cursor=before, per_page=ADMIN_PAGE_SIZE, descending=True
+        )
+        return render_template('admin_courses.html', courses=courses,
+                               next_cursor=next_cursor, is_first_page=before is None)
 
     @app.route('/admin/courses/new', methods=['GET', 'POST'])
     @login_required
@@ -451,6 +491,7 @@ def register_routes(app):
                     format=form.format.data
                 )
                 db.session.add(course)
+                invalidate_catalog()
                 db.session.commit()
                 flash('Curso creado correctamente.', 'success')
                 return redirect(url_for('admin_courses'))
@@ -474,6 +515,7 @@ def register_routes(app):
                 course.group = form.group.data
                 course.duration = form.duration.data
                 course.format = form.format.data
+                invalidate_catalog()
                 db.session.commit()
                 flash('Curso actualizado correctamente.', 'success')
                 return redirect(url_for('admin_courses'))
@@ -490,6 +532,7 @@ def register_routes(app):
         course = Course.query.get_or_404(course_id)
         try:
             db.session.delete(course)
+            invalidate_catalog()
             db.session.commit()
             flash('Curso eliminado correctamente.', 'success')
         except Exception as e:
@@ -0,0 +1,132 @@
+"""
+Instantánea de las estadísticas del dashboard de administración.
+
+Las rutas de escritura (registro, guardado de perfil, visita a un curso)
+aplican su delta con un UPDATE atómico (x = x + n) al final de su propia
+transacción, sin leer ni bloquear la fila antes: el registro toca la fila
+única de DashboardStats y los perfiles y visitas tocan solo la fila de su
+grupo en DashboardGroupStats. Una reconciliación periódica recalcula todo
+desde las tablas para corregir lo que los deltas no cubren (borrados,
+ediciones de cursos).
+"""
+from collections import namedtuple
+from datetime import datetime
+from sqlalchemy import delete, func, insert, update
+from __init__ import db
+from models import User, UserProfile, Course, DashboardStats, DashboardGroupStats
+from utils import upsert_increments
+
+TOP_COURSES = 5
+# Antigüedad máxima de la última reconciliación antes de encolar otra
+RECONCILE_INTERVAL = 15 * 60
+
+# Lectura del dashboard: contadores globales, conteos por grupo y top de cursos
+StatsSnapshot = namedtuple('StatsSnapshot', ['num_users', 'total_views', 'group_profiles', 'group_views',
+                                             'top_courses', 'updated_at', 'reconciled_at'])
+
+def record_user_registered(count=1):
+    # Sin fila (nunca reconciliado) no hace nada: la primera lectura lo calcula todo
+    db.session.execute(
+        update(DashboardStats)
+        .where(DashboardStats.id == 1)
+        .values(num_users=DashboardStats.num_users + count, updated_at=datetime.utcnow())
+    )
+
+def _add_to_groups(counter_column, deltas):
+    """
+    Suma deltas {grupo: n} a una columna de DashboardGroupStats. Las filas se
+    ordenan por grupo para que las transacciones concurrentes tomen los
+    bloqueos en el mismo orden.
+    """
+    now = datetime.utcnow()
+    rows = [{'group': group, counter_column: n, 'updated_at': now}
+            for group, n in deltas.items() if group and n]
+    rows.sort(key=lambda row: row['group'])
+    upsert_increments(DashboardGroupStats, ['group'], counter_column, rows, replace_columns=['updated_at'])
+
+def record_group_change(old_group, new_group, count=1):
+    """
+    Mueve `count` perfiles de grupo (old_group es None para perfiles nuevos)
+    """
+    if old_group == new_group:
+        return
+    _add_to_groups('profiles', {old_group: -count, new_group: count})
+
+def record_group_views(views_by_group):
+    """
+    Suma visitas por grupo {grupo: n}
+    """
+    _add_to_groups('views', views_by_group)
+
+def record_course_views(course, views=1):
+    record_group_views({course.group: views})
+
+def _top_courses():
+    return [
+        {'id': c.id, 'title': c.title, 'group': c.group, 'views_count': c.views_count or 0}
+        for c in db.session.execute(
+            db.select(Course.id, Course.title, Course.group, Course.views_count)
+            .order_by(Course.views_count.desc(), Course.id)
+            .limit(TOP_COURSES)
+        )
+    ]
+
+def _read_snapshot(stats):
+    groups = db.session.execute(db.select(DashboardGroupStats)).scalars().all()
+    group_views = {g.group: g.views for g in groups if g.views > 0}
+    updated_at = max([stats.updated_at] + [g.updated_at for g in groups if g.updated_at])
+    return StatsSnapshot(
+        num_users=stats.num_users,
+        total_views=sum(group_views.values()),
+        group_profiles={g.group: g.profiles for g in groups if g.profiles > 0},
+        group_views=group_views,
+        top_courses=_top_courses(),
+        updated_at=updated_at,
+        reconciled_at=stats.reconciled_at,
+    )
+
+def reconcile_stats():
+    """
+    Recalcula la instantánea completa desde las tablas y la guarda
+    """
+    group_profiles = dict(db.session.execute(
+        db.select(UserProfile.assigned_group, func.count(UserProfile.id))
+        .where(UserProfile.assigned_group.isnot(None))
+        .group_by(UserProfile.assigned_group)
+    ).all())
+    group_views = {group: int(views or 0) for group, views in db.session.execute(
+        db.select(Course.group, func.sum(Course.views_count)).group_by(Course.group)
+    ).all()}
+    num_users = db.session.execute(db.select(func.count(User.id))).scalar()
+
+    now = datetime.utcnow()
+    db.session.execute(delete(DashboardGroupStats))
+    groups = sorted(set(group_profiles) | set(group_views))
+    if groups:
+        db.session.execute(insert(DashboardGroupStats), [
+            {'group': group, 'profiles': group_profiles.get(group, 0),
+             'views': group_views.get(group, 0), 'updated_at': now}
+            for group in groups
+        ])
+    stats = db.session.get(DashboardStats, 1)
+    if stats is None:
+        stats = DashboardStats(id=1)
+        db.session.add(stats)
+    stats.num_users = num_users
+    stats.updated_at = now
+    stats.reconciled_at = now
+    db.session.commit()
+    return _read_snapshot(stats)
+
+def get_stats_snapshot():
+    """
+    Lee la instantánea (una fila global, una por grupo y el top de cursos
+    por índice). La primera vez se calcula en el momento.
+    """
+    stats = db.session.get(DashboardStats, 1)
+    if stats is None:
+        return reconcile_stats()
+    return _read_snapshot(stats)
+
+def needs_reconcile(snapshot):
+    return (datetime.utcnow() - snapshot.reconciled_at).total_seconds() > RECONCILE_INTERVAL
@@ -0,0 +1,71 @@
+import pytest
+from sqlalchemy import event
+from __init__ import create_app, db
+from models import User, UserProfile, Course, CourseView
+
+def complete_profile(user, role):
+    return UserProfile(user=user, role=role, school_type='urbana', dependency='municipal', age_range='31-40',
+                       digital_tools_skill=3, advanced_tic_skill=3, digital_citizenship_skill=3,
+                       teaching_tech_skill=3, leadership_support=3, resource_support=3,
+                       learning_format='en-linea')
+
+@pytest.fixture
+def app():
+    app = create_app({
+        'TESTING': True,
+        'WTF_CSRF_ENABLED': False,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'SQLALCHEMY_ENGINE_OPTIONS': {},
+    })
+    with app.app_context():
+        db.create_all()
+        admin = User(username='admin', email='admin@example.com', password_hash='x')
+        db.session.add(complete_profile(admin, 'admin'))
+        db.session.commit()
+        app.admin_id = admin.id
+        yield app
+
+def add_teachers(n, start=0):
+    course = Course(title='Curso', description='Descripción', link='https://example.com', group='G')
+    db.session.add(course)
+    for i in range(start, start + n):
+        user = User(username=f'docente{i}', email=f'docente{i}@example.com', password_hash='x')
+        db.session.add(complete_profile(user, 'profesor'))
+        db.session.add(CourseView(course=course, user=user))
+    db.session.commit()
+
+def count_queries(app, client, path):
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        response = client.get(path)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    assert response.status_code == 200
+    return len(statements)
+
+@pytest.fixture
+def client(app):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(app.admin_id)
+        session['_fresh'] = True
+    return client
+
+@pytest.mark.parametrize('path', ['/admin/users', '/admin/courses'])
+def test_admin_listings_query_count_does_not_grow_with_rows(app, client, path):
+    """Guardia contra N+1: la cantidad de consultas no depende de las filas mostradas."""
+    add_teachers(3)
+    few = count_queries(app, client, path)
+    add_teachers(30, start=3)
+    many = count_queries(app, client, path)
+    assert many == few
+
+def test_admin_users_keyset_pagination(app, client):
+    add_teachers(60)
+    first = client.get('/admin/users').get_data(as_text=True)
+    assert 'docente48' in first and 'docente49' not in first
+    assert 'after=' in first
+    second = client.get('/admin/users?after=50').get_data(as_text=True)
+    assert 'docente49' in second and 'docente48' not in second
@@ -0,0 +1,63 @@
+import os
+import numpy as np
+import pytest
+from sklearn.cluster import KMeans
+from sklearn.preprocessing import StandardScaler
+from clustering.artifact import load_bundle, save_bundle
+from clustering.auto_assignment import AutoAssignment
+from clustering.encoder import NUMERIC_FEATURES
+from clustering.feature_engineering import FeatureEngineer
+
+def trained_assignment(seed):
+    rng = np.random.default_rng(seed)
+    X = rng.integers(1, 6, size=(300, len(NUMERIC_FEATURES))).astype(float)
+    scaler = StandardScaler().fit(X)
+    assignment = AutoAssignment(model_path='no-existe.pkl')
+    assignment.feature_engineer = FeatureEngineer(scaler=scaler, categories={})
+    assignment.clustering_model = KMeans(n_clusters=4, n_init=1, random_state=seed).fit(scaler.transform(X))
+    assignment.cluster_mapping = {0: 'A', 1: 'B', 2: 'C', 3: 'D'}
+    assignment.is_trained = True
+    return assignment, scaler, X
+
+def test_bundle_round_trip_matches_sklearn(tmp_path):
+    assignment, scaler, X = trained_assignment(0)
+    manifest = save_bundle(assignment, str(tmp_path))
+
+    bundle = load_bundle(str(tmp_path))
+    assert bundle['version'] == manifest['version']
+    assert isinstance(bundle['clustering_model'].cluster_centers_, np.memmap)
+    assert isinstance(bundle['scaler'].mean_, np.memmap)
+    assert bundle['cluster_mapping'] == assignment.cluster_mapping
+
+    Z = scaler.transform(X)
+    np.testing.assert_allclose(bundle['scaler'].transform(X), Z)
+    np.testing.assert_array_equal(bundle['clustering_model'].predict(Z), assignment.clustering_model.predict(Z))
+    np.testing.assert_allclose(bundle['clustering_model'].transform(Z),
+                               assignment.clustering_model.transform(Z), rtol=1e-4, atol=1e-4)
+
+def test_export_keeps_previous_version_files(tmp_path):
+    first = save_bundle(trained_assignment(0)[0], str(tmp_path))
+    second = save_bundle(trained_assignment(1)[0], str(tmp_path))
+    files = set(os.listdir(tmp_path))
+    # Un worker que leyó el manifest anterior todavía puede abrir sus arreglos
+    assert set(first['files'].values()) <= files
+    assert set(second['files'].values()) <= files
+
+    third = save_bundle(trained_assignment(2)[0], str(tmp_path))
+    files = set(os.listdir(tmp_path))
+    assert not set(first['files'].values()) & files
+    assert set(second['files'].values()) | set(third['files'].values()) <= files
+
+def test_reexport_does_not_rewrite_mapped_arrays(tmp_path):
+    assignment = trained_assignment(0)[0]
+    manifest = save_bundle(assignment, str(tmp_path))
+    bundle = load_bundle(str(tmp_path))
+    paths = [os.path.join(tmp_path, name) for name in manifest['files'].values()]
+    stats = [(os.stat(p).st_ino, os.stat(p).st_mtime_ns) for p in paths]
+
+    # Misma versión: los archivos que un worker tiene mapeados quedan intactos
+    assert save_bundle(assignment, str(tmp_path))['version'] == manifest['version']
+    assert [(os.stat(p).st_ino, os.stat(p).st_mtime_ns) for p in paths] == stats
+    np.testing.assert_array_equal(bundle['clustering_model'].cluster_centers_,
+                                  np.asarray(assignment.clustering_model.cluster_centers_, dtype=np.float32))
+    assert not [name for name in os.listdir(tmp_path) if '.tmp-' in name]
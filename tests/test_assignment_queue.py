@@ -0,0 +1,100 @@
+import threading
+import time
+import numpy as np
+from assignment_queue import AssignmentBatcher
+
+def fake_predict(calls):
+    def predict(profiles):
+        calls.append(len(profiles))
+        return {'groups': [f'grupo-{p}' for p in profiles], 'fallback': np.zeros(len(profiles), dtype=bool)}
+    return predict
+
+def collecting_writer():
+    rows, done = [], threading.Event()
+    def write(batch):
+        rows.extend(batch)
+        done.set()
+    return rows, done, write
+
+def test_requests_within_window_share_one_prediction():
+    calls = []
+    rows, done, write = collecting_writer()
+    batcher = AssignmentBatcher(fake_predict(calls), write, batch_window=0.2)
+    for i in range(5):
+        assert batcher.submit(i, i, 'manual')
+    assert done.wait(2)
+    batcher.stop()
+    assert calls == [5]
+    assert [r['group'] for r in rows] == [f'grupo-{i}' for i in range(5)]
+    assert all(r['provisional'] == 'manual' for r in rows)
+
+def test_full_queue_rejects_and_stale_requests_keep_manual_group():
+    calls = []
+    rows, done, write = collecting_writer()
+    gate = threading.Event()
+    def blocked_predict(profiles):
+        gate.wait(2)
+        return fake_predict(calls)(profiles)
+    batcher = AssignmentBatcher(blocked_predict, write, max_queue=1, batch_window=0, timeout=0.05)
+    assert batcher.submit(1, 1, 'manual')
+    time.sleep(0.05)  # el hilo toma la primera y queda bloqueado en predict
+    assert batcher.submit(2, 2, 'manual')
+    assert not batcher.submit(3, 3, 'manual')
+    time.sleep(0.1)  # la segunda supera el timeout mientras espera
+    gate.set()
+    batcher.stop()
+    assert calls == [1]
+    # La primera se predijo, pero la predicción terminó fuera de plazo: no se escribe
+    assert rows == []
+
+def test_slow_prediction_drops_only_expired_requests():
+    calls = []
+    rows, done, write = collecting_writer()
+    def slow_predict(profiles):
+        time.sleep(0.1)
+        return fake_predict(calls)(profiles)
+    batcher = AssignmentBatcher(slow_predict, write, batch_window=0, timeout=0.05)
+    assert batcher.submit(1, 1, 'manual')
+    time.sleep(0.2)
+    batcher.timeout = 1.0
+    assert batcher.submit(2, 2, 'manual')
+    assert done.wait(2)
+    batcher.stop()
+    assert calls == [1, 1]
+    assert [r['profile_id'] for r in rows] == [2]
+
+def test_write_groups_moves_dashboard_counts_only_for_applied_rows():
+    from __init__ import create_app, db
+    from models import User, UserProfile
+    from assignment_queue import _write_groups
+    from stats_snapshot import get_stats_snapshot, reconcile_stats
+
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'SQLALCHEMY_ENGINE_OPTIONS': {},
+    })
+    with app.app_context():
+        db.create_all()
+        profiles = []
+        for i in range(3):
+            user = User(username=f'docente{i}', email=f'docente{i}@example.com', password_hash='x')
+            profiles.append(UserProfile(
+                user=user, role='profesor', school_type='urbana', dependency='municipal', age_range='31-40',
+                digital_tools_skill=3, advanced_tic_skill=3, digital_citizenship_skill=3,
+                teaching_tech_skill=3, leadership_support=3, resource_support=3,
+                learning_format='en-linea', assigned_group='A'))
+        db.session.add_all(profiles)
+        db.session.commit()
+        get_stats_snapshot()
+        ids = [profile.id for profile in profiles]
+        db.session.remove()
+
+        _write_groups(app, [
+            {'profile_id': ids[0], 'provisional': 'A', 'group': 'B'},
+            {'profile_id': ids[1], 'provisional': 'A', 'group': 'B'},
+            # Editado después de encolarse: no se pisa ni se cuenta
+            {'profile_id': ids[2], 'provisional': 'C', 'group': 'B'},
+        ])
+        assert dict(get_stats_snapshot().group_profiles) == {'A': 1, 'B': 2}
+        assert dict(reconcile_stats().group_profiles) == {'A': 1, 'B': 2}
@@ -0,0 +1,55 @@
+import threading
+from sqlalchemy.exc import IntegrityError
+from click_buffer import ClickBuffer
+
+def test_flushes_on_size_and_drops_repeat_clicks():
+    batches, flushed = [], threading.Event()
+    def flush(events):
+        batches.append([(course, user) for course, user, _ in events])
+        flushed.set()
+    buffer = ClickBuffer(flush, max_events=3, flush_interval=60, dedupe_window=60)
+    assert buffer.record(1, 10)
+    assert not buffer.record(1, 10)  # repetido dentro de la ventana
+    assert buffer.record(2, 10)
+    assert buffer.record(1, 11)
+    assert flushed.wait(2)
+    buffer.stop()
+    assert batches == [[(1, 10), (2, 10), (1, 11)]]
+
+def test_failed_flush_is_retried():
+    attempts, available = [], []
+    def flush(events):
+        attempts.append(len(events))
+        if not available:
+            raise RuntimeError('base de datos no disponible')
+    buffer = ClickBuffer(flush, max_events=100, flush_interval=60, dedupe_window=0)
+    buffer.record(1, 10)
+    buffer.record(2, 10)
+    assert buffer.flush_now() == 0
+    available.append(True)
+    buffer.record(3, 10)
+    assert buffer.flush_now() == 3
+    buffer.stop()
+    # Lote fallido, una fila de prueba, y el reintento completo
+    assert attempts == [2, 1, 3]
+
+def test_invalid_rows_are_dropped_and_retries_are_bounded():
+    written, failing = [], []
+    def flush(events):
+        if any(course == 99 for course, _, _ in events):
+            raise IntegrityError('INSERT', {}, Exception('curso inexistente'))
+        if any(course == 98 for course, _, _ in events):
+            failing.append(len(events))
+            raise RuntimeError('falla persistente')
+        written.extend(course for course, _, _ in events)
+    buffer = ClickBuffer(flush, max_events=100, flush_interval=60, dedupe_window=0, max_attempts=3)
+    for course in (1, 99, 98, 2):
+        buffer.record(course, 10)
+    # El lote falla; de a uno se escriben 1 y 2, 99 se descarta y 98 queda pendiente
+    assert buffer.flush_now() == 2
+    assert buffer.flush_now() == 0
+    assert buffer.flush_now() == 0
+    buffer.stop()
+    # 98 se descartó al tercer intento: stop() ya no lo escribe
+    assert written == [1, 2]
+    assert failing == [1, 1, 1]
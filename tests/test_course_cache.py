@@ -0,0 +1,39 @@
+import pytest
+from __init__ import create_app, db
+from models import Course
+import cache_versions
+import course_cache
+
+@pytest.fixture
+def app(monkeypatch):
+    # Host recién arrancado: monotonic() menor que el intervalo de revisión
+    monkeypatch.setattr(cache_versions.time, 'monotonic', lambda: 0.5)
+    monkeypatch.setattr(course_cache, '_watch', cache_versions.VersionWatch(course_cache.CATALOG))
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'SQLALCHEMY_ENGINE_OPTIONS': {},
+    })
+    with app.app_context():
+        db.create_all()
+        yield app
+
+def add_course(title):
+    db.session.add(Course(title=title, description='-', link='https://example.com', group='G'))
+    course_cache.invalidate_catalog()
+    db.session.commit()
+
+def test_local_invalidation_is_seen_immediately(app):
+    add_course('Uno')
+    assert [c.title for c in course_cache.get_courses_for_group('G')] == ['Uno']
+    add_course('Dos')
+    assert [c.title for c in course_cache.get_courses_for_group('G')] == ['Uno', 'Dos']
+
+def test_other_workers_wait_for_the_check_interval(app):
+    add_course('Uno')
+    assert len(course_cache.get_courses_for_group('G')) == 1
+    # Cambio hecho por otro proceso: sin expire() se sirve el caché hasta la próxima revisión
+    db.session.add(Course(title='Dos', description='-', link='https://example.com', group='G'))
+    cache_versions.bump_version(course_cache.CATALOG)
+    db.session.commit()
+    assert len(course_cache.get_courses_for_group('G')) == 1
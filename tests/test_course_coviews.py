@@ -0,0 +1,61 @@
+from types import SimpleNamespace
+from course_coviews import blend, top_neighbours
+
+def test_top_neighbours_uses_cosine_over_distinct_users():
+    # Curso 1 visto por 4 usuarios, 2 por 2 y 3 por 1; 1-2 comparten 2 usuarios, 1-3 uno
+    triples = [(1, 1, 4), (2, 2, 2), (3, 3, 1), (1, 2, 2), (2, 1, 2), (1, 3, 1), (3, 1, 1)]
+    neighbours = top_neighbours(triples, n=1)
+    assert [course for course, _ in neighbours[1]] == [2]
+    assert neighbours[2][0][0] == 1
+    assert abs(neighbours[3][0][1] - 1 / 2) < 1e-9
+
+def test_blend_interleaves_neighbours_without_duplicates():
+    course = lambda i: SimpleNamespace(id=i)
+    group = [course(i) for i in (1, 2, 3, 4)]
+    neighbours = [course(2), course(10), course(11)]
+    assert [c.id for c in blend(group, neighbours, every=3)] == [1, 2, 10, 3, 4, 11]
+
+def test_incremental_refresh_matches_full_recomputation():
+    from course_coviews import CoViewNeighbours
+    before = [(1, 1, 4), (2, 2, 2), (3, 3, 1), (4, 4, 3),
+              (1, 2, 2), (2, 1, 2), (1, 3, 1), (3, 1, 1), (2, 4, 1), (4, 2, 1)]
+    # Solo cambian la diagonal del curso 4 y el par 3-4 (nuevo)
+    changed = [(4, 4, 6), (3, 4, 1), (4, 3, 1), (3, 3, 2)]
+    neighbours = CoViewNeighbours(n=2)
+    neighbours._apply(before)
+    neighbours._apply(changed)
+
+    final = {(a, b): c for a, b, c in before}
+    final.update({(a, b): c for a, b, c in changed})
+    expected = top_neighbours([(a, b, c) for (a, b), c in final.items()], n=2)
+    assert neighbours._neighbours == expected
+
+def test_update_coviews_waits_for_late_commits(monkeypatch):
+    from datetime import datetime, timedelta
+    from __init__ import create_app, db
+    from models import User, Course, CourseView, CourseCoView
+    import course_coviews
+    app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+                      'SQLALCHEMY_ENGINE_OPTIONS': {}})
+    with app.app_context():
+        db.create_all()
+        courses = [Course(title=f'Curso {i}', description='-', link='https://example.com', group='A')
+                   for i in range(3)]
+        user = User(username='docente', email='docente@example.com', password_hash='x')
+        db.session.add_all(courses + [user])
+        db.session.flush()
+        now = datetime.utcnow()
+        view = lambda id, course, age: CourseView(id=id, course_id=course.id, user_id=user.id,
+                                                  viewed_at=now, created_at=now - timedelta(seconds=age))
+        # La fila 3 es reciente; la 2 pertenece a un lote que aún no confirma
+        db.session.add_all([view(1, courses[0], 600), view(3, courses[2], 1)])
+        db.session.commit()
+        assert course_coviews.update_coviews() == 1
+
+        db.session.add(view(2, courses[1], 5))
+        db.session.commit()
+        monkeypatch.setattr(course_coviews, 'SAFETY_LAG', 0.0)
+        assert course_coviews.update_coviews() == 2
+        diagonal = {c.course_id: c.count for c in CourseCoView.query.filter(
+            CourseCoView.course_id == CourseCoView.other_course_id)}
+        assert diagonal == {course.id: 1 for course in courses}
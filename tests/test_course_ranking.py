@@ -0,0 +1,40 @@
+from types import SimpleNamespace
+from course_ranking import CourseIndex, tokenize
+
+def course(id, title, description, group='G', format=None, views_count=0):
+    return SimpleNamespace(id=id, title=title, description=description, group=group,
+                           format=format, views_count=views_count)
+
+CATALOG = [
+    course(1, 'Liderazgo directivo', 'Gestión institucional para equipos directivos'),
+    course(2, 'Ciudadanía digital', 'Seguridad y ética en internet para la convivencia escolar'),
+    course(3, 'Programación en el aula', 'TIC avanzadas y plataformas de datos', format='talleres'),
+    course(4, 'Otro grupo', 'Liderazgo y gestión', group='H'),
+]
+
+def test_tokenize_strips_accents_and_stopwords():
+    assert tokenize('Enseñanza de la Ciudadanía Digital') == ['ensenanza', 'ciudadania', 'digital']
+
+def test_rank_follows_profile_interests_within_group():
+    index = CourseIndex(popularity_weight=0.0)
+    index.sync(CATALOG)
+    leader = SimpleNamespace(interest_leadership=True)
+    ranking = index.rank(leader, 'G')
+    assert ranking[0] == 1
+    assert sorted(ranking) == [1, 2, 3]
+    weak_citizenship = SimpleNamespace(digital_citizenship_skill=1)
+    assert index.rank(weak_citizenship, 'G', k=1) == [2]
+
+def test_incremental_updates_match_full_rebuild():
+    index = CourseIndex()
+    index.sync(CATALOG[:2])
+    index.upsert(CATALOG[2])
+    index.upsert(course(2, 'Ciudadanía digital', 'Convivencia y ética digital'))
+    index.remove(1)
+    rebuilt = CourseIndex()
+    rebuilt.sync([CATALOG[2], course(2, 'Ciudadanía digital', 'Convivencia y ética digital')])
+    profile = SimpleNamespace(digital_citizenship_skill=2, advanced_tic_skill=1, learning_format='talleres')
+    assert index.rank(profile, 'G') == rebuilt.rank(profile, 'G')
+    live = {term: int(index.df[col]) for term, col in index.vocabulary.items() if index.df[col]}
+    fresh = {term: int(rebuilt.df[col]) for term, col in rebuilt.vocabulary.items() if rebuilt.df[col]}
+    assert live == fresh
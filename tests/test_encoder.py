@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+from types import SimpleNamespace
+from sklearn.preprocessing import StandardScaler
+from clustering.auto_assignment import AutoAssignment
+from clustering.encoder import NUMERIC_FEATURES, ProfileEncoder
+
+def make_profile(**overrides):
+    data = {
+        'digital_tools_skill': 2, 'advanced_tic_skill': 4, 'digital_citizenship_skill': 3,
+        'teaching_tech_skill': 5, 'leadership_support': 1, 'resource_support': 4,
+        'role': 'profesor', 'school_type': 'rural', 'dependency': 'municipal',
+        'age_range': '41-50', 'learning_format': 'talleres',
+        'interest_digital_literacy': True, 'interest_educational_innovation': False,
+        'interest_leadership': True,
+    }
+    data.update(overrides)
+    return SimpleNamespace(**data)
+
+@pytest.fixture
+def fitted_assignment():
+    rng = np.random.default_rng(0)
+    assignment = AutoAssignment(model_path='no-existe.pkl')
+    assignment.scaler = StandardScaler().fit(rng.integers(1, 6, size=(200, len(NUMERIC_FEATURES))))
+    return assignment
+
+@pytest.mark.parametrize('overrides', [
+    {},
+    {'digital_tools_skill': None, 'resource_support': None},
+    {'interest_leadership': None, 'interest_digital_literacy': False},
+])
+def test_encoder_matches_dataframe_path(fitted_assignment, overrides):
+    """El codificador compacto produce la misma fila que prepare_user_profile."""
+    profile = make_profile(**overrides)
+    expected = fitted_assignment.prepare_user_profile(profile).to_numpy(dtype=float)
+    encoded = ProfileEncoder.from_assignment(fitted_assignment).encode(profile)
+    np.testing.assert_allclose(encoded, expected, rtol=1e-5, atol=1e-6)
+
+def test_encoder_matches_dataframe_path_without_fitted_scaler():
+    assignment = AutoAssignment(model_path='no-existe.pkl')
+    profile = make_profile()
+    expected = assignment.prepare_user_profile(profile).to_numpy(dtype=float)
+    encoded = ProfileEncoder.from_assignment(assignment).encode(profile)
+    np.testing.assert_allclose(encoded, expected, atol=1e-6)
+
+def test_batch_matches_single_rows(fitted_assignment):
+    encoder = ProfileEncoder.from_assignment(fitted_assignment)
+    profiles = [make_profile(digital_tools_skill=s, interest_leadership=s % 2 == 0) for s in range(1, 6)]
+    batch = encoder.encode_batch(profiles)
+    assert batch.dtype == np.float32
+    for i, profile in enumerate(profiles):
+        np.testing.assert_array_equal(batch[i], encoder.encode(profile)[0])
+
+def test_one_hot_columns_from_artifact_categories():
+    encoder = ProfileEncoder(categories={'learning_format': ['en-linea', 'talleres', 'autoaprendizaje']})
+    row = encoder.encode(make_profile(learning_format='talleres'))[0]
+    assert encoder.n_features == 12
+    assert row[encoder.feature_names.index('learning_format_talleres')] == 1.0
+    assert row[encoder.feature_names.index('learning_format_en-linea')] == 0.0
+
+def test_encoder_matches_feature_engineer_path(fitted_assignment):
+    """Con un FeatureEngineer entrenado ambos caminos usan el mismo layout one-hot."""
+    from clustering.feature_engineering import FeatureEngineer
+    fitted_assignment.feature_engineer = FeatureEngineer(
+        scaler=fitted_assignment.scaler,
+        categories={'role': ['director', 'profesor'], 'learning_format': ['en-linea', 'talleres']}
+    )
+    profile = make_profile(role=None)
+    expected = fitted_assignment.prepare_user_profile(profile).to_numpy(dtype=float)
+    encoded = ProfileEncoder.from_assignment(fitted_assignment).encode(profile)
+    np.testing.assert_allclose(encoded, expected, rtol=1e-5, atol=1e-6)
@@ -0,0 +1,23 @@
+import numpy as np
+from types import SimpleNamespace
+from clustering.encoder import NUMERIC_FEATURES
+from clustering.evaluation import MANUAL_GROUPS, manual_group_codes, rows_to_columns
+from utils import _manual_assign_group
+
+def test_vectorized_manual_rules_match_manual_assign_group():
+    """Las máscaras NumPy reproducen _manual_assign_group, incluidos los None."""
+    rng = np.random.default_rng(3)
+    profiles = []
+    for _ in range(500):
+        skills = {col: (None if rng.random() < 0.15 else int(rng.integers(1, 6))) for col in NUMERIC_FEATURES}
+        profiles.append(SimpleNamespace(
+            **skills,
+            interest_digital_literacy=bool(rng.integers(0, 2)),
+            interest_educational_innovation=[True, False, None][int(rng.integers(0, 3))],
+            interest_leadership=[True, False, None][int(rng.integers(0, 3))],
+            role='profesor', school_type='urbana', dependency='municipal',
+            age_range='31-40', learning_format='en-linea',
+        ))
+
+    codes = manual_group_codes(rows_to_columns(profiles))
+    assert [MANUAL_GROUPS[c] for c in codes] == [_manual_assign_group(p) for p in profiles]
@@ -0,0 +1,19 @@
+import pytest
+from hyperloglog import HyperLogLog, union
+
+@pytest.mark.parametrize('n', [10, 1000, 50000])
+def test_count_within_error_bound(n):
+    sketch = HyperLogLog().update(range(n))
+    # Cuatro desviaciones estándar del error relativo
+    assert abs(sketch.count() - n) <= max(4 * sketch.relative_error * n, 2)
+
+def test_repeated_values_do_not_inflate_count():
+    sketch = HyperLogLog().update([7] * 1000)
+    assert sketch.count() == 1
+
+def test_union_matches_sketch_of_union_and_roundtrips_bytes():
+    a = HyperLogLog().update(range(0, 3000))
+    b = HyperLogLog().update(range(2000, 5000))
+    merged = union([a.to_bytes(), b.to_bytes()])
+    assert merged.to_bytes() == HyperLogLog().update(range(5000)).to_bytes()
+    assert len(a.to_bytes()) == 1024
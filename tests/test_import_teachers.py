@@ -0,0 +1,83 @@
+import pytest
+from __init__ import create_app, db
+from models import CacheVersion, User, UserProfile
+from cache_versions import get_version
+from import_teachers import checkpoint_name, import_teachers, teacher_values
+from password_hashing import PasswordHasher
+
+def teacher(i, **answers):
+    return {'username': f'docente{i}', 'email': f'docente{i}@example.com', 'password': 'secreta',
+            'digital_tools_skill': '2', 'interest_leadership': 'si', **answers}
+
+@pytest.fixture
+def app():
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'SQLALCHEMY_ENGINE_OPTIONS': {},
+    })
+    with app.app_context():
+        db.create_all()
+        yield app
+
+@pytest.fixture
+def hasher():
+    return PasswordHasher(method='pbkdf2:sha256:1000', workers=0)
+
+class FailingHasher:
+    def __init__(self, hasher, fail_on_call):
+        self.hasher = hasher
+        self.calls = 0
+        self.fail_on_call = fail_on_call
+
+    def hash_many(self, passwords):
+        self.calls += 1
+        if self.calls == self.fail_on_call:
+            raise RuntimeError('interrumpido')
+        return self.hasher.hash_many(passwords)
+
+def test_teacher_values_defaults_and_no_admin():
+    user, profile = teacher_values(teacher(1, role='admin'))
+    assert user['email'] == 'docente1@example.com'
+    assert profile['role'] == 'profesor'
+    assert profile['digital_tools_skill'] == 2 and profile['resource_support'] == 3
+    assert profile['interest_leadership'] is True and profile['interest_digital_literacy'] is False
+    assert teacher_values({'username': 'x', 'email': 'x@example.com'}) is None
+    assert teacher_values(teacher(2, advanced_tic_skill='mucho')) is None
+
+def test_import_skips_duplicates_and_assigns_groups(app, hasher):
+    records = [teacher(1), teacher(2), teacher(1), {'username': 'sin-clave'}]
+    counts = import_teachers(records, hasher, 'import:test', chunk_size=2)
+    assert counts['imported'] == 2 and counts['skipped'] == 2
+    profiles = db.session.execute(db.select(UserProfile)).scalars().all()
+    assert len(profiles) == 2 and all(profile.assigned_group for profile in profiles)
+    # Importación completa: la marca de agua se elimina
+    assert db.session.get(CacheVersion, 'import:test') is None
+
+    # Volver a ejecutar desde cero no duplica usuarios
+    counts = import_teachers(records, hasher, 'import:otra', chunk_size=10)
+    assert counts['imported'] == 0
+    assert db.session.execute(db.select(db.func.count(User.id))).scalar() == 2
+
+def test_interrupted_import_resumes_from_last_committed_chunk(app, hasher):
+    records = [teacher(i) for i in range(5)]
+    with pytest.raises(RuntimeError):
+        import_teachers(records, FailingHasher(hasher, fail_on_call=2), 'import:test', chunk_size=2)
+    assert get_version('import:test') == 2
+    assert db.session.execute(db.select(db.func.count(User.id))).scalar() == 2
+
+    counts = import_teachers(records, hasher, 'import:test', chunk_size=2)
+    assert counts['resumed_at'] == 2 and counts['imported'] == 3
+    assert get_version('import:test') == 0
+    assert db.session.execute(db.select(db.func.count(UserProfile.id))).scalar() == 5
+    valid, _ = hasher.verify(db.session.execute(
+        db.select(User.password_hash).where(User.username == 'docente4')).scalar(), 'secreta')
+    assert valid
+
+def test_checkpoint_changes_when_the_file_is_replaced(tmp_path):
+    path = tmp_path / 'docentes.csv'
+    path.write_text('username,email,password\nuno,uno@example.com,x\n', encoding='utf-8')
+    first = checkpoint_name(str(path))
+    assert first == checkpoint_name(str(path)) and len(first) <= 50
+    path.write_text('username,email,password\ndos,dos@example.com,x\ntres,tres@example.com,x\n', encoding='utf-8')
+    assert checkpoint_name(str(path)) != first
@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+import pytest
+from __init__ import create_app, db
+from models import TrainingJob
+import jobs
+
+@pytest.fixture
+def app():
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'SQLALCHEMY_ENGINE_OPTIONS': {},
+    })
+    with app.app_context():
+        db.create_all()
+        yield app
+
+@pytest.fixture
+def submitted(monkeypatch):
+    calls = []
+    monkeypatch.setattr(jobs._executor, 'submit', lambda fn, *args: calls.append(args))
+    return calls
+
+def test_orphaned_jobs_do_not_block_retraining(app, submitted):
+    old = datetime.utcnow() - timedelta(seconds=jobs.JOB_LEASE + 60)
+    db.session.add_all([
+        TrainingJob(n_clusters=3, status='running', heartbeat_at=old),
+        TrainingJob(n_clusters=4, status='pending', heartbeat_at=old),
+    ])
+    db.session.commit()
+
+    job, created = jobs.enqueue_retraining(app, 5)
+    assert created and job.n_clusters == 5
+    assert len(submitted) == 1
+    statuses = [j.status for j in TrainingJob.query.order_by(TrainingJob.id)]
+    assert statuses == ['failed', 'failed', 'pending']
+
+def test_pending_job_waiting_behind_live_one_is_reused(app, submitted):
+    old = datetime.utcnow() - timedelta(seconds=jobs.JOB_LEASE + 60)
+    db.session.add_all([
+        TrainingJob(n_clusters=3, status='running', heartbeat_at=datetime.utcnow()),
+        TrainingJob(n_clusters=4, status='pending', heartbeat_at=old),
+    ])
+    db.session.commit()
+
+    job, created = jobs.enqueue_retraining(app, 6)
+    assert not created and job.n_clusters == 6
+    assert submitted == []
+
+def test_expired_job_is_not_run(app):
+    job = TrainingJob(n_clusters=3, status='failed')
+    db.session.add(job)
+    db.session.commit()
+    assert not jobs._claim_job(job.id)
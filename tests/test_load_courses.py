@@ -0,0 +1,57 @@
+import io
+import json
+import pytest
+from __init__ import create_app, db
+from models import Course
+from load_courses import iter_json_records, upsert_courses
+
+CATALOG = [
+    {'titulo': 'Curso A', 'descripcion': 'Uno', 'enlace': 'https://a', 'grupo_formacion': 'G1'},
+    {'title': 'Curso B', 'description': 'Dos', 'link': 'https://b', 'group': 'G2', 'format': 'en-linea'},
+    {'titulo': 'Sin enlace', 'descripcion': 'Tres', 'grupo_formacion': 'G1'},
+]
+
+@pytest.fixture
+def app():
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'SQLALCHEMY_ENGINE_OPTIONS': {},
+    })
+    with app.app_context():
+        db.create_all()
+        yield app
+
+@pytest.mark.parametrize('read_size', [1, 7, 1 << 16])
+def test_streams_json_array_and_jsonl(read_size):
+    array = json.dumps(CATALOG, indent=2, ensure_ascii=False)
+    lines = '\n'.join(json.dumps(record) for record in CATALOG) + '\n'
+    assert list(iter_json_records(io.StringIO(array), read_size)) == CATALOG
+    assert list(iter_json_records(io.StringIO(lines), read_size)) == CATALOG
+    assert list(iter_json_records(io.StringIO('  []'), read_size)) == []
+
+def test_upsert_inserts_updates_and_skips(app):
+    counts = upsert_courses(CATALOG, chunk_size=1)
+    assert counts == {'inserted': 2, 'updated': 0, 'skipped': 1}
+
+    changed = [dict(CATALOG[0], descripcion='Uno, actualizado'), CATALOG[1], CATALOG[1]]
+    counts = upsert_courses(changed)
+    assert counts == {'inserted': 0, 'updated': 1, 'skipped': 2}
+    db.session.expire_all()
+    assert db.session.execute(db.select(Course.title, Course.description).order_by(Course.title)).all() == [
+        ('Curso A', 'Uno, actualizado'), ('Curso B', 'Dos')]
+
+def test_update_keeps_optional_columns_missing_from_the_catalog(app):
+    upsert_courses(CATALOG)
+    course = db.session.execute(db.select(Course).where(Course.title == 'Curso A')).scalar()
+    course.duration, course.format = '20 horas', 'presencial'
+    db.session.commit()
+
+    # La entrada no trae duration ni format: se actualiza lo demás y se conservan
+    counts = upsert_courses([dict(CATALOG[0], descripcion='Nueva'), dict(CATALOG[1], format='mixto')])
+    assert counts == {'inserted': 0, 'updated': 2, 'skipped': 0}
+    db.session.expire_all()
+    assert db.session.execute(
+        db.select(Course.title, Course.description, Course.duration, Course.format).order_by(Course.title)
+    ).all() == [('Curso A', 'Nueva', '20 horas', 'presencial'), ('Curso B', 'Dos', None, 'mixto')]
+    assert upsert_courses([CATALOG[0]] + [dict(CATALOG[1], format='mixto')])['skipped'] == 1
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+from types import SimpleNamespace
+from sklearn.cluster import KMeans
+from sklearn.preprocessing import StandardScaler
+from clustering.auto_assignment import AutoAssignment
+from clustering.encoder import NUMERIC_FEATURES
+from clustering.feature_engineering import FeatureEngineer
+
+def random_profiles(rng, n):
+    return [SimpleNamespace(
+        **{col: int(rng.integers(1, 6)) for col in NUMERIC_FEATURES},
+        interest_digital_literacy=bool(rng.integers(0, 2)),
+        interest_educational_innovation=bool(rng.integers(0, 2)),
+        interest_leadership=bool(rng.integers(0, 2)),
+        role=None, school_type='urbana', dependency='municipal', age_range='31-40',
+        learning_format=['en-linea', 'talleres', 'otro'][int(rng.integers(0, 3))],
+    ) for _ in range(n)]
+
+@pytest.fixture
+def trained_assignment():
+    rng = np.random.default_rng(1)
+    scaler = StandardScaler().fit(rng.integers(1, 6, size=(300, len(NUMERIC_FEATURES))))
+    assignment = AutoAssignment(model_path='no-existe.pkl')
+    assignment.feature_engineer = FeatureEngineer(scaler=scaler, categories={'learning_format': ['en-linea', 'talleres']})
+    encoder = assignment._get_encoder()
+    assignment.clustering_model = KMeans(n_clusters=4, n_init=1, random_state=0).fit(
+        encoder.encode_batch(random_profiles(rng, 300)))
+    assignment.cluster_mapping = {0: 'A', 1: 'B', 2: 'C'}
+    assignment.is_trained = True
+    assignment._prepare_centroids()
+    return assignment
+
+@pytest.mark.parametrize('budget', [64 * 1024 * 1024, 0])
+def test_lookup_matches_direct_prediction(trained_assignment, budget):
+    """La tabla (o el memo LRU) devuelve lo mismo que la predicción directa."""
+    lookup = trained_assignment.enable_lookup_table(memory_budget_bytes=budget)
+    assert lookup.is_table == (budget > 0)
+    for profile in random_profiles(np.random.default_rng(2), 200):
+        cluster, group, confidence, margin = trained_assignment.predict_with_confidence(profile)
+        expected = trained_assignment._predict_direct(profile)
+        assert (cluster, group) == expected[:2]
+        assert confidence == pytest.approx(expected[2], abs=1e-5)
+        assert margin == pytest.approx(expected[3], abs=1e-5)
@@ -0,0 +1,34 @@
+import pytest
+from werkzeug.security import generate_password_hash
+from password_hashing import PasswordHasher, PasswordHashingBusy
+
+FAST = 'pbkdf2:sha256:1000'
+
+def test_verify_rehashes_only_when_parameters_change():
+    hasher = PasswordHasher(method=FAST, workers=0)
+    current = hasher.hash('secreta')
+    assert hasher.verify(current, 'secreta') == (True, None)
+    assert hasher.verify(current, 'otra') == (False, None)
+
+    legacy = generate_password_hash('secreta', 'pbkdf2:sha256:500')
+    valid, upgraded = hasher.verify(legacy, 'secreta')
+    assert valid and upgraded.startswith('pbkdf2:sha256:1000$')
+    assert hasher.verify(upgraded, 'secreta') == (True, None)
+
+def test_full_queue_fails_fast():
+    hasher = PasswordHasher(method=FAST, workers=1, max_pending=1)
+    assert hasher._slots.acquire(blocking=False)
+    with pytest.raises(PasswordHashingBusy):
+        hasher.hash('secreta')
+    hasher._slots.release()
+    assert hasher.verify(hasher.hash('secreta'), 'secreta') == (True, None)
+    hasher.shutdown()
+
+def test_pool_does_not_start_child_processes():
+    import multiprocessing
+    hasher = PasswordHasher(method=FAST, workers=2)
+    hashes = hasher.hash_many(['uno', 'dos', 'tres'])
+    assert [hasher.verify(h, p)[0] for h, p in zip(hashes, ['uno', 'dos', 'tres'])] == [True] * 3
+    # Sin hijos que reimporten el __main__ de la aplicación
+    assert multiprocessing.active_children() == []
+    hasher.shutdown()
@@ -0,0 +1,64 @@
+import json
+import pytest
+from __init__ import create_app, db
+import profile_form_schema
+from cache_versions import VersionWatch
+from profile_form_schema import CompiledSchema, get_profile_form_schema, save_questions
+
+QUESTIONS = [
+    {"name": "role", "type": "select", "label": "Rol", "choices": ["profesor", "director"]},
+    {"name": "digital_tools_skill", "type": "select", "label": "TI", "choices": ["1", "2", "3"]},
+    {"name": "interest_leadership", "type": "boolean", "label": "Liderazgo"},
+    {"name": "comuna", "type": "text", "label": "Comuna"},
+]
+
+@pytest.fixture
+def app():
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'SQLALCHEMY_ENGINE_OPTIONS': {},
+    })
+    with app.app_context():
+        db.create_all()
+        yield app
+
+def test_coercion_table_matches_legacy_defaults():
+    schema = CompiledSchema(QUESTIONS, digest=None)
+    assert schema.coerce('role', '') == 'profesor'
+    assert schema.coerce('role', 'director') == 'director'
+    assert schema.coerce('digital_tools_skill', '') == 3
+    assert schema.coerce('digital_tools_skill', '2') == 2
+    assert schema.coerce('interest_leadership', None) is False
+    assert schema.coerce('comuna', '') == ''
+    assert set(schema.form_class.__dict__) >= {'role', 'digital_tools_skill', 'interest_leadership', 'comuna', 'submit'}
+
+def test_schema_is_compiled_once_per_version(app, tmp_path, monkeypatch):
+    path = str(tmp_path / 'questions.json')
+    monkeypatch.setattr(profile_form_schema, '_schema', None)
+    monkeypatch.setattr(profile_form_schema, '_watch', VersionWatch(profile_form_schema.VERSION_NAME, 3600))
+    save_questions(QUESTIONS[:2], path)
+    first = get_profile_form_schema(path)
+    assert [q['name'] for q in first.questions] == ['role', 'digital_tools_skill']
+    assert get_profile_form_schema(path) is first
+
+    save_questions(QUESTIONS, path)
+    second = get_profile_form_schema(path)
+    assert second is not first and len(second.questions) == 4
+    assert get_profile_form_schema(path) is second
+    assert list(tmp_path.iterdir()) == [tmp_path / 'questions.json']
+
+def test_manual_file_edit_is_picked_up_without_a_version_bump(app, tmp_path, monkeypatch):
+    path = tmp_path / 'questions.json'
+    monkeypatch.setattr(profile_form_schema, '_schema', None)
+    monkeypatch.setattr(profile_form_schema, '_watch', VersionWatch(profile_form_schema.VERSION_NAME, 3600))
+    monkeypatch.setattr(profile_form_schema, 'CHECK_INTERVAL', 0.0)
+    save_questions(QUESTIONS[:2], str(path))
+    first = get_profile_form_schema(str(path))
+    assert get_profile_form_schema(str(path)) is first
+
+    # Edición directa del archivo (p. ej. en un despliegue), sin pasar por save_questions
+    path.write_text(json.dumps(QUESTIONS), encoding='utf-8')
+    second = get_profile_form_schema(str(path))
+    assert second is not first and len(second.questions) == 4
+    assert get_profile_form_schema(str(path)) is second
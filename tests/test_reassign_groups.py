@@ -0,0 +1,73 @@
+import pytest
+from __init__ import create_app, db
+from models import User, UserProfile
+from algorithm_config import invalidate_algorithm_config, save_algorithm_config
+import reassign_groups
+import utils
+
+def complete_profile(user, group):
+    return UserProfile(user=user, role='profesor', school_type='urbana', dependency='municipal', age_range='31-40',
+                       digital_tools_skill=3, advanced_tic_skill=3, digital_citizenship_skill=3,
+                       teaching_tech_skill=3, leadership_support=3, resource_support=3,
+                       learning_format='en-linea', assigned_group=group)
+
+class RecordingModel:
+    def __init__(self):
+        self.thresholds = []
+
+    def assign_groups(self, profiles, confidence_threshold=None):
+        self.thresholds.append(confidence_threshold)
+        return {'groups': ['B'] * len(profiles)}
+
+class FixedRegistry:
+    def __init__(self, model):
+        self.model = model
+
+    def get(self):
+        return self.model
+
+@pytest.fixture
+def app(monkeypatch):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'SQLALCHEMY_ENGINE_OPTIONS': {},
+    })
+    monkeypatch.setattr(reassign_groups, 'create_app', lambda: app)
+    with app.app_context():
+        db.create_all()
+        for i in range(3):
+            user = User(username=f'docente{i}', email=f'docente{i}@example.com', password_hash='x')
+            db.session.add(complete_profile(user, 'A'))
+        db.session.commit()
+        invalidate_algorithm_config()
+        yield app
+    invalidate_algorithm_config()
+
+def test_reassignment_uses_the_stored_threshold(app, monkeypatch):
+    model = RecordingModel()
+    monkeypatch.setattr(utils, 'get_model_registry', lambda: FixedRegistry(model))
+    save_algorithm_config(4, 0.9)
+
+    reassign_groups.reassign_all_groups(chunk_size=2)
+    assert model.thresholds == [0.9, 0.9]
+    groups = db.session.execute(db.select(UserProfile.assigned_group)).scalars().all()
+    assert groups == ['B', 'B', 'B']
+
+def test_reassignment_invalidates_moved_users_and_moves_dashboard_counts(app, monkeypatch):
+    import user_cache
+    from models import UserCacheInvalidation
+    from stats_snapshot import get_stats_snapshot, reconcile_stats
+    monkeypatch.setattr(utils, 'get_model_registry', lambda: FixedRegistry(RecordingModel()))
+    get_stats_snapshot()
+    user_ids = db.session.execute(db.select(User.id).order_by(User.id)).scalars().all()
+    user_cache._entries.clear()
+    user_cache.load_user(user_ids[0])
+    db.session.remove()
+
+    reassign_groups.reassign_all_groups(chunk_size=2)
+    assert user_ids[0] not in user_cache._entries
+    invalidated = db.session.execute(db.select(UserCacheInvalidation.user_id)).scalars().all()
+    assert sorted(invalidated) == user_ids
+    assert dict(get_stats_snapshot().group_profiles) == {'B': 3}
+    assert dict(reconcile_stats().group_profiles) == {'B': 3}
@@ -0,0 +1,54 @@
+import pytest
+from __init__ import create_app, db
+from models import User, UserProfile, Course
+from stats_snapshot import (get_stats_snapshot, reconcile_stats, record_course_views,
+                            record_group_change, record_user_registered)
+
+@pytest.fixture
+def app():
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'SQLALCHEMY_ENGINE_OPTIONS': {},
+    })
+    with app.app_context():
+        db.create_all()
+        yield app
+
+def as_dict(snapshot):
+    return {
+        'num_users': snapshot.num_users,
+        'total_views': snapshot.total_views,
+        'group_profiles': dict(snapshot.group_profiles),
+        'group_views': dict(snapshot.group_views),
+        'top_courses': [c['id'] for c in snapshot.top_courses],
+    }
+
+def test_incremental_deltas_match_reconciliation(app):
+    courses = [Course(title=f'Curso {i}', description='-', link='https://example.com',
+                      group='A' if i % 2 else 'B', views_count=i) for i in range(7)]
+    db.session.add_all(courses)
+    db.session.commit()
+    get_stats_snapshot()
+
+    user = User(username='docente', email='docente@example.com', password_hash='x')
+    db.session.add(user)
+    record_user_registered()
+    profile = UserProfile(user=user, role='docente', school_type='urbana', dependency='municipal',
+                          age_range='31-40', digital_tools_skill=3, advanced_tic_skill=3,
+                          digital_citizenship_skill=3, teaching_tech_skill=3, leadership_support=3,
+                          resource_support=3, learning_format='en-linea', assigned_group='A')
+    db.session.add(profile)
+    record_group_change(None, 'A')
+    db.session.commit()
+
+    record_group_change('A', 'B')
+    profile.assigned_group = 'B'
+    for course, clicks in ((courses[0], 10), (courses[3], 10), (courses[0], 1)):
+        course.views_count += clicks
+        record_course_views(course, clicks)
+    db.session.commit()
+
+    incremental = as_dict(get_stats_snapshot())
+    assert incremental == as_dict(reconcile_stats())
+    assert incremental['top_courses'][:2] == [courses[3].id, courses[0].id]
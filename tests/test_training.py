@@ -0,0 +1,54 @@
+from types import SimpleNamespace
+import numpy as np
+from clustering.encoder import NUMERIC_FEATURES
+from clustering.model_registry import ModelRegistry
+from clustering.training import IncrementalTrainer, train_and_save
+
+GROUPS = ["Alfabetización Digital Básica", "Fortalecimiento Institucional",
+          "Innovación Educativa", "Habilidades Digitales Avanzadas"]
+
+def profile(digital, support, innovation=False):
+    values = dict.fromkeys(NUMERIC_FEATURES[:4], digital)
+    values.update(leadership_support=support, resource_support=support)
+    return SimpleNamespace(**values, interest_digital_literacy=False, interest_leadership=False,
+                           interest_educational_innovation=innovation)
+
+def synthetic_profiles():
+    # Cuatro grupos bien separados, uno por regla manual
+    profiles = []
+    for i in range(25):
+        jitter = i % 2
+        profiles += [profile(1 + jitter, 3), profile(5 - jitter, 1 + jitter),
+                     profile(5 - jitter, 5 - jitter, innovation=True), profile(4 + jitter, 4 + jitter)]
+    return profiles
+
+def chunked(profiles):
+    # Primer bloque menor que n_clusters (queda pendiente) y último bloque parcial
+    def source():
+        yield profiles[:2]
+        for start in range(2, len(profiles), 7):
+            yield profiles[start:start + 7]
+    return source
+
+def test_partial_fit_over_chunks_maps_every_cluster():
+    profiles = synthetic_profiles()
+    stages = []
+    engine = IncrementalTrainer(chunked(profiles), n_clusters=4,
+                                progress=lambda stage, processed: stages.append((stage, processed))).train()
+
+    raw = np.array([[getattr(p, f) for f in NUMERIC_FEATURES] for p in profiles], dtype=float)
+    np.testing.assert_allclose(engine.scaler.mean_, raw.mean(axis=0))
+    assert engine.n_samples == len(profiles)
+    assert sorted(engine.cluster_mapping) == [0, 1, 2, 3]
+    assert set(engine.cluster_mapping.values()) == set(GROUPS)
+    assert ('kmeans', len(profiles)) in stages and ('mapping', len(profiles)) in stages
+
+def test_saved_model_round_trips_through_registry(tmp_path):
+    profiles = synthetic_profiles()
+    path = str(tmp_path / 'clustering_model.pkl')
+    trained, engine = train_and_save(chunked(profiles), model_path=path, n_clusters=4)
+
+    loaded = ModelRegistry(model_path=path).get()
+    assert loaded is not None and loaded.cluster_mapping == engine.cluster_mapping
+    for p in profiles[:8]:
+        assert loaded.predict_with_confidence(p)[:2] == trained.predict_with_confidence(p)[:2]
@@ -0,0 +1,98 @@
+import pytest
+from sqlalchemy import event
+from __init__ import create_app, db
+from models import User, UserProfile, UserCacheInvalidation
+import user_cache
+
+@pytest.fixture
+def app():
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'SQLALCHEMY_ENGINE_OPTIONS': {},
+    })
+    with app.app_context():
+        db.create_all()
+        user = User(username='docente', email='docente@example.com', password_hash='x')
+        db.session.add(UserProfile(user=user, role='profesor', school_type='urbana', dependency='municipal',
+                                   age_range='31-40', digital_tools_skill=3, advanced_tic_skill=3,
+                                   digital_citizenship_skill=3, teaching_tech_skill=3,
+                                   leadership_support=3, resource_support=3, learning_format='en-linea',
+                                   assigned_group='G'))
+        db.session.commit()
+        app.user_id = user.id
+        db.session.remove()
+        user_cache._entries.clear()
+        user_cache._watch = user_cache.VersionWatch(user_cache.VERSION_NAME, user_cache.CHECK_INTERVAL,
+                                                    read=user_cache._last_invalidation)
+        yield app
+
+def load_counting(user_id):
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        user = user_cache.load_user(user_id)
+        group = user.profile.assigned_group
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    return user, group, statements
+
+def test_user_and_profile_load_in_one_query_then_from_cache(app):
+    user, group, statements = load_counting(app.user_id)
+    assert group == 'G'
+    # Último id del registro de invalidaciones y el JOIN usuario-perfil
+    assert len(statements) == 2
+    db.session.remove()
+
+    user, group, statements = load_counting(app.user_id)
+    assert user.username == 'docente' and group == 'G'
+    assert statements == []
+
+def test_cached_user_stays_editable_and_invalidation_reloads(app):
+    user_cache.load_user(app.user_id)
+    db.session.remove()
+
+    user = user_cache.load_user(app.user_id)
+    profile_id = user.profile.id
+    user.profile.role = 'admin'
+    user_cache.invalidate_user(app.user_id)
+    db.session.commit()
+    db.session.remove()
+
+    assert db.session.get(UserProfile, profile_id).role == 'admin'
+    db.session.remove()
+    user, group, statements = load_counting(app.user_id)
+    assert user.profile.role == 'admin'
+    assert len(statements) >= 1
+
+def test_missing_user(app):
+    assert user_cache.load_user(12345) is None
+
+def test_invalidation_from_another_worker_only_evicts_that_user(app):
+    other = User(username='otro', email='otro@example.com', password_hash='x')
+    db.session.add(other)
+    db.session.commit()
+    other_id = other.id
+    db.session.remove()
+    user_cache.load_user(app.user_id)
+    user_cache.load_user(other_id)
+    db.session.remove()
+
+    # Otro worker registra la invalidación sin tocar el caché de este
+    db.session.add(UserCacheInvalidation(user_id=app.user_id))
+    db.session.commit()
+    db.session.remove()
+    user_cache._watch.expire()
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        # Último id y usuarios invalidados; el otro usuario sigue en caché
+        assert user_cache.load_user(other_id).username == 'otro'
+        assert len(statements) == 2
+        assert user_cache.load_user(app.user_id).username == 'docente'
+        assert len(statements) == 3
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
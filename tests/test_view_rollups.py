@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+import pytest
+from __init__ import create_app, db
+from models import User, Course, CourseView, CourseViewDaily, CourseViewHourly
+from course_coviews import update_coviews
+from view_rollups import compact_raw_views, group_trends, update_rollups
+
+@pytest.fixture
+def app():
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'SQLALCHEMY_ENGINE_OPTIONS': {},
+    })
+    with app.app_context():
+        db.create_all()
+        yield app
+
+def seed(now):
+    course = Course(title='Curso', description='-', link='https://example.com', group='A')
+    user = User(username='docente', email='docente@example.com', password_hash='x')
+    db.session.add_all([course, user])
+    db.session.flush()
+    times = [now - timedelta(days=400, hours=1), now - timedelta(days=400), now - timedelta(hours=2), now]
+    # Insertadas hace más del margen de seguridad de los agregadores
+    inserted = datetime.utcnow() - timedelta(minutes=10)
+    db.session.add_all([CourseView(course_id=course.id, user_id=user.id, viewed_at=t, created_at=inserted)
+                        for t in times])
+    db.session.commit()
+    return course
+
+def test_rollups_are_incremental_and_compaction_keeps_first_visit(app):
+    now = datetime.utcnow().replace(minute=30)
+    course = seed(now)
+    assert update_rollups(batch_size=3) == 4
+    assert update_rollups() == 0
+    assert sum(r.views for r in CourseViewDaily.query.all()) == 4
+    assert group_trends()['A'][-1] == (2 if (now - timedelta(hours=2)).date() == now.date() else 1)
+
+    update_coviews()
+    removed, pruned = compact_raw_views(max_age_days=180, hourly_max_age_days=365)
+    assert removed == 1
+    remaining = {v.viewed_at for v in CourseView.query.filter_by(course_id=course.id)}
+    assert now - timedelta(days=400, hours=1) in remaining
+    assert now - timedelta(days=400) not in remaining
+    # Los dos buckets horarios de hace 400 días superan la retención; los diarios se conservan
+    assert pruned == 2
+    assert sum(r.views for r in CourseViewHourly.query.all()) == 2
+    assert sum(r.views for r in CourseViewDaily.query.all()) == 4
+
+def test_late_committed_view_is_rolled_up_before_compaction(app, monkeypatch):
+    import course_coviews
+    course = Course(title='Curso', description='-', link='https://example.com', group='A')
+    user = User(username='docente', email='docente@example.com', password_hash='x')
+    db.session.add_all([course, user])
+    db.session.flush()
+    now = datetime.utcnow()
+    view = lambda id, age: CourseView(id=id, course_id=course.id, user_id=user.id,
+                                      viewed_at=now - timedelta(days=400), created_at=now - timedelta(seconds=age))
+    # La fila 3 es reciente: los agregadores se detienen antes y la compactación no la toca
+    db.session.add_all([view(1, 600), view(3, 1)])
+    db.session.commit()
+    assert update_rollups() == 1 and update_coviews() == 1
+    assert compact_raw_views(max_age_days=180, hourly_max_age_days=3650) == (0, 0)
+
+    # La 2, con id menor que una ya visible, se confirma tarde
+    db.session.add(view(2, 5))
+    db.session.commit()
+    monkeypatch.setattr(course_coviews, 'SAFETY_LAG', 0.0)
+    assert update_rollups() == 2 and update_coviews() == 2
+    assert sum(r.views for r in CourseViewHourly.query.all()) == 3
+    assert sum(r.views for r in CourseViewDaily.query.all()) == 3
+    # Ya resumidas, las visitas repetidas del par se compactan
+    assert compact_raw_views(max_age_days=180, hourly_max_age_days=3650) == (2, 0)
@@ -0,0 +1,44 @@
+from datetime import datetime
+import pytest
+from sqlalchemy import event, insert
+from sqlalchemy.sql.dml import Insert
+from __init__ import create_app, db
+from models import Course, CourseViewerSketch
+from hyperloglog import HyperLogLog
+from viewer_sketches import record_viewers, unique_viewers
+
+@pytest.fixture
+def app():
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'SQLALCHEMY_ENGINE_OPTIONS': {},
+    })
+    with app.app_context():
+        db.create_all()
+        db.session.add(Course(id=1, title='Curso', description='-', link='https://example.com', group='A'))
+        db.session.commit()
+        yield app
+
+def test_first_clicks_of_the_day_merge_with_a_concurrent_insert(app):
+    now = datetime.utcnow()
+    other_worker = HyperLogLog().update(range(100, 150)).to_bytes()
+    raced = []
+
+    # Otro worker inserta la fila del día justo antes que este
+    def concurrent_insert(conn, clauseelement, *args):
+        if isinstance(clauseelement, Insert) and clauseelement.table.name == 'course_viewer_sketch' and not raced:
+            raced.append(True)
+            conn.execute(insert(CourseViewerSketch).values(course_id=1, day=now.date(), group='A',
+                                                           registers=other_worker))
+    event.listen(db.engine, 'before_execute', concurrent_insert)
+    try:
+        record_viewers([(1, user_id, now) for user_id in range(50)], {1: 'A'})
+        db.session.commit()
+    finally:
+        event.remove(db.engine, 'before_execute', concurrent_insert)
+
+    assert raced
+    assert db.session.query(CourseViewerSketch).count() == 1
+    # Se combinan los usuarios de ambos workers
+    assert 90 <= unique_viewers(course_id=1) <= 110
@@ -0,0 +1,54 @@
+import argparse
+import time
+from __init__ import create_app
+from clustering.artifact import save_bundle
+from clustering.training import train_and_save
+from utils import iter_profile_chunks
+
+def train_clustering_model(model_path='clustering_model.pkl', n_clusters=4, chunk_size=5000,
+                           epochs=1, categorical_columns=(), bundle_dir=None):
+    """Entrena el modelo de clustering recorriendo los perfiles por bloques."""
+    app = create_app()
+    with app.app_context():
+        print("Entrenando modelo de clustering...")
+        start = time.perf_counter()
+
+        def report(stage, processed):
+            print(f"  [{stage}] {processed} perfiles procesados")
+
+        try:
+            assignment, engine = train_and_save(
+                lambda: iter_profile_chunks(chunk_size),
+                model_path=model_path,
+                n_clusters=n_clusters,
+                epochs=epochs,
+                categorical_columns=categorical_columns,
+                progress=report
+            )
+        except Exception as e:
+            print(f"Error entrenando el modelo: {e}")
+            return None
+
+        elapsed = time.perf_counter() - start
+        print(f"Modelo entrenado con {engine.n_samples} perfiles en {elapsed:.1f}s.")
+        for cluster_id, group in sorted(engine.cluster_mapping.items()):
+            print(f"  Cluster {cluster_id} → {group}")
+
+        if bundle_dir:
+            manifest = save_bundle(assignment, bundle_dir)
+            print(f"Bundle versión {manifest['version']} exportado en {bundle_dir}.")
+        return assignment
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Entrenar el modelo de clustering de perfiles.')
+    parser.add_argument('--model-path', default='clustering_model.pkl', help='Ruta del artefacto a generar')
+    parser.add_argument('--clusters', type=int, default=4, help='Número de clusters (K)')
+    parser.add_argument('--chunk-size', type=int, default=5000, help='Perfiles por bloque')
+    parser.add_argument('--epochs', type=int, default=1, help='Pasadas de partial_fit sobre los datos')
+    parser.add_argument('--categorical', nargs='*', default=[],
+                        help='Variables categóricas a incluir como one-hot (p. ej. role learning_format)')
+    parser.add_argument('--bundle', default=None, help='Exportar además un bundle .npy en este directorio')
+    args = parser.parse_args()
+
+    train_clustering_model(args.model_path, args.clusters, args.chunk_size, args.epochs,
+                           args.categorical, args.bundle)
@@ -0,0 +1,25 @@
+import argparse
+import time
+from __init__ import create_app
+from course_coviews import update_coviews
+
+def run_update(batch_size=10000):
+    """Actualiza la matriz de co-visualizaciones con las visitas nuevas."""
+    app = create_app()
+    with app.app_context():
+        print("Actualizando co-visualizaciones de cursos...")
+        start = time.perf_counter()
+        try:
+            processed = update_coviews(batch_size)
+        except Exception as e:
+            print(f"Error actualizando co-visualizaciones: {e}")
+            return
+        elapsed = time.perf_counter() - start
+        print(f"Co-visualizaciones actualizadas: {processed} visitas nuevas en {elapsed:.1f}s.")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Actualizar de forma incremental la matriz de co-visualizaciones (ejecutar periódicamente).')
+    parser.add_argument('--batch-size', type=int, default=10000, help='Visitas por lote')
+    args = parser.parse_args()
+
+    run_update(args.batch_size)
@@ -0,0 +1,32 @@
+import argparse
+import time
+from __init__ import create_app
+from view_rollups import compact_raw_views, update_rollups
+
+def run_rollups(batch_size=10000, compact=False, max_age_days=180, hourly_max_age_days=30):
+    """Actualiza los resúmenes de visualizaciones y aplica la retención."""
+    app = create_app()
+    with app.app_context():
+        print("Actualizando resúmenes de visualizaciones...")
+        start = time.perf_counter()
+        try:
+            processed = update_rollups(batch_size)
+            print(f"  {processed} visitas nuevas resumidas")
+            if compact:
+                removed, hourly_removed = compact_raw_views(max_age_days, hourly_max_age_days, batch_size)
+                print(f"  {removed} visitas antiguas compactadas, {hourly_removed} resúmenes horarios eliminados")
+        except Exception as e:
+            print(f"Error actualizando resúmenes: {e}")
+            return
+        elapsed = time.perf_counter() - start
+        print(f"Resúmenes actualizados en {elapsed:.1f}s.")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Resumir CourseView por hora y por día (ejecutar periódicamente).')
+    parser.add_argument('--batch-size', type=int, default=10000, help='Visitas por lote')
+    parser.add_argument('--compact', action='store_true', help='Aplicar la política de retención')
+    parser.add_argument('--max-age-days', type=int, default=180, help='Antigüedad a partir de la cual se compactan las visitas crudas')
+    parser.add_argument('--hourly-max-age-days', type=int, default=30, help='Antigüedad máxima de los resúmenes horarios')
+    args = parser.parse_args()
+
+    run_rollups(args.batch_size, args.compact, args.max_age_days, args.hourly_max_age_days)
@@ -0,0 +1,151 @@
+"""
+Carga del usuario autenticado para el user_loader de Flask-Login.
+
+El usuario y su perfil se leen en una sola consulta (JOIN). Las columnas de
+ambos quedan en un caché en memoria por id de usuario durante CACHE_TTL
+segundos; en un acierto los objetos se reconstruyen y se adjuntan a la
+sesión sin consultar la base de datos, así que siguen siendo editables.
+
+Guardar el perfil, cambiar el rol o borrar el usuario llama a
+invalidate_user, que descarta la entrada en este worker y agrega una fila a
+UserCacheInvalidation en la transacción del llamador. Los demás workers
+revisan el último id de ese registro como máximo una vez cada
+CHECK_INTERVAL segundos y descartan solo los usuarios de las filas nuevas:
+una reasignación masiva no vacía el caché de todos los demás. Las filas de
+más de LOG_RETENTION segundos se borran de vez en cuando; como las entradas
+vencen a los CACHE_TTL segundos, un worker que no revisó el registro en ese
+tiempo ya no tiene entradas que invalidar.
+"""
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import delete, func, insert, inspect
+from sqlalchemy.orm import joinedload, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from __init__ import db
+from models import User, UserProfile, UserCacheInvalidation
+from cache_versions import VersionWatch
+
+VERSION_NAME = 'users'
+CACHE_TTL = 30.0
+CHECK_INTERVAL = 2.0
+MAX_ENTRIES = 10000
+LOG_RETENTION = 3600
+PRUNE_PROBABILITY = 0.01
+
+_lock = threading.Lock()
+_entries = {}
+
+
+def _last_invalidation():
+    return db.session.execute(db.select(func.max(UserCacheInvalidation.id))).scalar() or 0
+
+
+_watch = VersionWatch(VERSION_NAME, CHECK_INTERVAL, read=_last_invalidation)
+
+
+def _current_version():
+    """
+    Último id del registro de invalidaciones; si cambió, descarta las
+    entradas de los usuarios de las filas nuevas
+    """
+    version, previous = _watch.poll()
+    if version == previous or previous is None:
+        return version
+    if version < previous:
+        # Registro vaciado: no se sabe qué usuarios cambiaron
+        with _lock:
+            _entries.clear()
+        return version
+    user_ids = db.session.execute(
+        db.select(UserCacheInvalidation.user_id).distinct()
+        .where(UserCacheInvalidation.id > previous, UserCacheInvalidation.id <= version)
+    ).scalars().all()
+    with _lock:
+        for user_id in user_ids:
+            _entries.pop(user_id, None)
+    return version
+
+
+def _columns(instance):
+    return {attr.key: getattr(instance, attr.key) for attr in inspect(instance).mapper.column_attrs}
+
+
+def _attach(model, columns):
+    """
+    Instancia persistente en la sesión actual a partir de columnas cacheadas,
+    sin consulta; si la sesión ya tiene ese objeto se usa el existente
+    """
+    key = inspect(model).identity_key_from_primary_key([columns['id']])
+    existing = db.session.identity_map.get(key)
+    if existing is not None:
+        return existing, False
+    instance = model(**columns)
+    make_transient_to_detached(instance)
+    return instance, True
+
+
+def _from_entry(user_columns, profile_columns):
+    user, new_user = _attach(User, user_columns)
+    if not new_user:
+        return user
+    profile = None
+    if profile_columns is not None:
+        profile, _ = _attach(UserProfile, profile_columns)
+        set_committed_value(profile, 'user', user)
+    # Relación ya "cargada": acceder a user.profile no dispara otra consulta
+    set_committed_value(user, 'profile', profile)
+    db.session.add(user)
+    return user
+
+
+def load_user(user_id):
+    """
+    Usuario con su perfil ya cargado, o None si no existe
+    """
+    version = _current_version()
+    now = time.monotonic()
+    hit = _entries.get(user_id)
+    if hit is not None and hit[0] > now:
+        return _from_entry(hit[1], hit[2])
+
+    user = db.session.execute(
+        db.select(User).options(joinedload(User.profile)).where(User.id == user_id)
+    ).scalar()
+    if user is None:
+        return None
+    with _lock:
+        # Si otro hilo vio invalidaciones nuevas durante la consulta, esta lectura puede ser vieja
+        if _watch.version != version:
+            return user
+        if len(_entries) >= MAX_ENTRIES:
+            # Se descarta la entrada más antigua (orden de inserción)
+            _entries.pop(next(iter(_entries)), None)
+        _entries[user_id] = (now + CACHE_TTL, _columns(user),
+                             _columns(user.profile) if user.profile is not None else None)
+    return user
+
+
+def invalidate_users(user_ids):
+    """
+    Descarta los usuarios de este worker y los registra para los demás
+    dentro de la transacción actual; el llamador hace commit
+    """
+    user_ids = sorted(set(user_ids))
+    if not user_ids:
+        return
+    with _lock:
+        for user_id in user_ids:
+            _entries.pop(user_id, None)
+    db.session.execute(insert(UserCacheInvalidation), [{'user_id': user_id} for user_id in user_ids])
+    if _watch.version and random.random() < PRUNE_PROBABILITY:
+        # Se conserva la última fila ya leída para que el último id no retroceda
+        db.session.execute(delete(UserCacheInvalidation).where(
+            UserCacheInvalidation.created_at < datetime.utcnow() - timedelta(seconds=LOG_RETENTION),
+            UserCacheInvalidation.id < _watch.version,
+        ))
+
+
+def invalidate_user(user_id):
+    invalidate_users([user_id])
@@ -1,4 +1,8 @@
+import logging
 from clustering.auto_assignment import AutoAssignment
+from clustering.events import log_event
+from clustering.model_registry import get_model_registry
+from algorithm_config import get_algorithm_config
 
 def assign_group(profile):
     """
@@ -7,7 +11,7 @@ def assign_group(profile):
     try:
         # Validar que el perfil tenga los datos necesarios
         if not profile:
-            print("❌ Error: Perfil de usuario es None")
+            log_event('assignment.profile_missing', logging.WARNING)
             return "Alfabetización Digital Básica"  # Grupo por defecto
         
         # Verificar campos críticos
@@ -15,37 +19,38 @@ def assign_group(profile):
         missing_fields = [field for field in required_fields if getattr(profile, field) is None]
         
         if missing_fields:
-            print(f"⚠️  Campos faltantes en el perfil: {missing_fields}")
-            print("🔄 Usando asignación manual")
+            log_event('assignment.missing_fields', logging.INFO, fields=missing_fields)
             return _manual_assign_group(profile)
         
-        # Intentar usar el sistema de clustering automático
-        auto_assignment = AutoAssignment()
+        # Intentar usar el sistema de clustering automático (cargado una vez por proceso)
+        auto_assignment = get_model_registry().get()
         
         # Si el modelo está entrenado, usar asignación automática
-        if auto_assignment.load_model():
+        if auto_assignment is not None:
             try:
-                assigned_group = auto_assignment.assign_group(profile)
-                confidence = auto_assignment.get_assignment_confidence(profile)
+                # Una sola preparación del perfil y un solo cálculo de distancias
+                _, assigned_group, confidence, margin = auto_assignment.predict_with_confidence(profile)
                 
                 # Si la confianza es alta, usar asignación automática
-                if confidence > 0.7:
-                    print(f"🤖 Asignación automática (confianza: {confidence:.2f})")
+                if assigned_group is None:
+                    log_event('assignment.unmapped_cluster', logging.WARNING, model=auto_assignment.model_version)
+                elif confidence > get_algorithm_config()['confidence_threshold']:
+                    log_event('assignment.auto', logging.INFO, group=assigned_group,
+                              confidence=round(confidence, 3), margin=round(margin, 3),
+                              model=auto_assignment.model_version)
                     return assigned_group
                 else:
-                    print(f"⚠️  Baja confianza automática ({confidence:.2f}), usando manual")
+                    log_event('assignment.low_confidence', logging.INFO,
+                              confidence=round(confidence, 3), model=auto_assignment.model_version)
             except Exception as e:
-                print(f"❌ Error en asignación automática: {e}")
-                print("🔄 Usando asignación manual como fallback")
+                log_event('assignment.auto_error', logging.ERROR, error=e)
         else:
-            print("📂 No se pudo cargar el modelo de clustering")
+            log_event('assignment.model_unavailable', logging.WARNING)
     
     except Exception as e:
-        print(f"❌ Error general en assign_group: {e}")
-        print("🔄 Usando asignación manual como fallback")
+        log_event('assignment.error', logging.ERROR, error=e)
     
     # Fallback a asignación manual
-    print("🔄 Usando asignación manual")
     return _manual_assign_group(profile)
 
 def _manual_assign_group(profile):
@@ -54,7 +59,7 @@ def _manual_assign_group(profile):
     """
     try:
         if not profile:
-            print("❌ Error: Perfil es None en asignación manual")
+            log_event('assignment.profile_missing', logging.WARNING, path='manual')
             return "Alfabetización Digital Básica"
         
         # Calcular promedio de habilidades digitales manejando valores None
@@ -69,10 +74,8 @@ def _manual_assign_group(profile):
         valid_digital_skills = [skill for skill in digital_skills if skill is not None]
         if not valid_digital_skills:
             avg_digital_skills = 3  # Valor por defecto
-            print("⚠️  No se encontraron habilidades digitales válidas, usando valor por defecto: 3")
         else:
             avg_digital_skills = sum(valid_digital_skills) / len(valid_digital_skills)
-            print(f"📊 Habilidades digitales promedio: {avg_digital_skills:.2f}")
         
         # Calcular promedio de apoyo institucional manejando valores None
         institutional_support = [
@@ -84,10 +87,9 @@ def _manual_assign_group(profile):
         valid_institutional_support = [support for support in institutional_support if support is not None]
         if not valid_institutional_support:
             avg_institutional_support = 3  # Valor por defecto
-            print("⚠️  No se encontró apoyo institucional válido, usando valor por defecto: 3")
         else:
             avg_institutional_support = sum(valid_institutional_support) / len(valid_institutional_support)
-            print(f"📊 Apoyo institucional promedio: {avg_institutional_support:.2f}")
+        log_event('assignment.manual_averages', digital=avg_digital_skills, support=avg_institutional_support)
         
         # Lógica de asignación de grupo
         if avg_digital_skills < 3:
@@ -99,24 +101,149 @@ def _manual_assign_group(profile):
         else:
             assigned_group = "Habilidades Digitales Avanzadas"
         
-        print(f"🎯 Grupo asignado manualmente: {assigned_group}")
+        log_event('assignment.manual', logging.INFO, group=assigned_group)
         return assigned_group
         
     except Exception as e:
-        print(f"❌ Error en asignación manual: {e}")
-        print("🔄 Usando grupo por defecto")
+        log_event('assignment.manual_error', logging.ERROR, error=e)
         return "Alfabetización Digital Básica"
 
 def get_clustering_info():
     """
     Obtiene información sobre el sistema de clustering
     """
-    auto_assignment = AutoAssignment()
+    auto_assignment = get_model_registry().get()
+    if auto_assignment is None:
+        return AutoAssignment().get_model_info()
     return auto_assignment.get_model_info()
 
 def compare_assignments(profile):
     """
     Compara asignación automática vs manual
     """
-    auto_assignment = AutoAssignment()
+    auto_assignment = get_model_registry().get() or AutoAssignment()
     return auto_assignment.compare_assignments(profile)
+
+def assign_groups(profiles, confidence_threshold=None):
+    """
+    Versión por lotes de assign_group: una sola predicción para todos los perfiles.
+    Sin umbral explícito se usa el configurado en /admin/config.
+    """
+    if confidence_threshold is None:
+        confidence_threshold = get_algorithm_config()['confidence_threshold']
+    auto_assignment = get_model_registry().get() or AutoAssignment()
+    return auto_assignment.assign_groups(profiles, confidence_threshold=confidence_threshold)
+
+def iter_profile_chunks(chunk_size=1000):
+    """
+    Recorre la tabla UserProfile en bloques ordenados por id (paginación por
+    cursor), liberando la sesión entre bloques para mantener la memoria acotada
+    """
+    from __init__ import db
+    from models import UserProfile
+
+    last_id = 0
+    while True:
+        chunk = db.session.execute(
+            db.select(UserProfile)
+            .where(UserProfile.id > last_id)
+            .order_by(UserProfile.id)
+            .limit(chunk_size)
+        ).scalars().all()
+        if not chunk:
+            break
+        last_id = chunk[-1].id
+        yield chunk
+        db.session.expunge_all()
+
+def iter_profile_rows(columns, chunk_size=50000):
+    """
+    Como iter_profile_chunks, pero devuelve solo las columnas pedidas como
+    filas livianas (sin objetos ORM), para recorridos analíticos masivos
+    """
+    from __init__ import db
+    from models import UserProfile
+
+    selected = [UserProfile.id] + [getattr(UserProfile, col) for col in columns]
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            db.select(*selected)
+            .where(UserProfile.id > last_id)
+            .order_by(UserProfile.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        yield rows
+
+def keyset_page(statement, key_column, cursor=None, per_page=50, descending=False):
+    """
+    Paginación por cursor sobre una columna única y ordenada (normalmente el id).
+    Devuelve (filas, cursor_siguiente); el cursor es None en la última página.
+    """
+    from __init__ import db
+
+    if cursor is not None:
+        statement = statement.where(key_column < cursor if descending else key_column > cursor)
+    statement = statement.order_by(key_column.desc() if descending else key_column).limit(per_page + 1)
+    rows = db.session.execute(statement).scalars().all()
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = getattr(rows[-1], key_column.key)
+    return rows, next_cursor
+
+def upsert_increments(model, key_columns, counter_column, rows, replace_columns=()):
+    """
+    Suma contadores con un upsert por lote: inserta las claves nuevas y
+    suma `counter_column` en las existentes, según el dialecto de la base.
+    Las columnas de `replace_columns` toman el valor entrante.
+    """
+    from __init__ import db
+
+    if not rows:
+        return
+    dialect = db.engine.dialect.name
+    counter = getattr(model, counter_column)
+    if dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert
+        statement = insert(model)
+        values = {column: statement.inserted[column] for column in replace_columns}
+        values[counter_column] = counter + statement.inserted[counter_column]
+        statement = statement.on_duplicate_key_update(values)
+    else:
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        statement = insert(model)
+        values = {column: statement.excluded[column] for column in replace_columns}
+        values[counter_column] = counter + statement.excluded[counter_column]
+        statement = statement.on_conflict_do_update(index_elements=key_columns, set_=values)
+    db.session.execute(statement, rows)
+
+def insert_missing(model, key_columns, rows):
+    """
+    Inserta las filas cuya clave no existe y deja intactas las existentes
+    (insert-on-conflict-do-nothing según el dialecto), sin error si otra
+    transacción las insertó al mismo tiempo
+    """
+    from __init__ import db
+
+    if not rows:
+        return
+    dialect = db.engine.dialect.name
+    if dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert
+        statement = insert(model)
+        # Asignar la clave a sí misma no cambia la fila (a diferencia de INSERT IGNORE, no oculta otros errores)
+        statement = statement.on_duplicate_key_update({key_columns[0]: statement.inserted[key_columns[0]]})
+    else:
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        statement = insert(model).on_conflict_do_nothing(index_elements=key_columns)
+    db.session.execute(statement, rows)
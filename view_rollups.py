@@ -0,0 +1,138 @@
+"""
+Resúmenes por hora y por día de CourseView para consultas de tendencia.
+
+El agregador procesa solo las filas posteriores a la marca de agua
+'rollup' (CacheVersion), y de ellas solo las insertadas hace más de
+course_coviews.SAFETY_LAG segundos: una fila con id menor confirmada tarde
+sigue por encima de la marca de agua. La retención compacta los eventos crudos
+antiguos ya resumidos: conserva la primera visita de cada par
+(usuario, curso), que es la que usan las co-visualizaciones.
+"""
+from collections import Counter
+from datetime import date, datetime, timedelta
+from sqlalchemy import delete, func
+from __init__ import db
+from models import Course, CourseView, CourseViewDaily, CourseViewHourly
+from cache_versions import get_version, set_version
+from course_coviews import WATERMARK as COVIEW_WATERMARK, settled_rows
+from utils import upsert_increments
+
+WATERMARK = 'rollup'
+TREND_DAYS = 90
+
+def update_rollups(batch_size=10000):
+    """
+    Suma las visitas nuevas a los resúmenes horarios y diarios, en la misma
+    transacción que avanza la marca de agua. Devuelve las filas procesadas.
+    """
+    processed = 0
+    while True:
+        watermark = get_version(WATERMARK)
+        fetched = db.session.execute(
+            db.select(CourseView.id, CourseView.course_id, CourseView.viewed_at, CourseView.created_at,
+                      Course.group)
+            .join(Course, Course.id == CourseView.course_id)
+            .where(CourseView.id > watermark)
+            .order_by(CourseView.id)
+            .limit(batch_size)
+        ).all()
+        rows = settled_rows(fetched)
+        if not rows:
+            break
+
+        hourly, daily = Counter(), Counter()
+        for row in rows:
+            viewed_at = row.viewed_at or datetime.utcnow()
+            hourly[(row.course_id, row.group, viewed_at.replace(minute=0, second=0, microsecond=0))] += 1
+            daily[(row.course_id, row.group, viewed_at.date())] += 1
+
+        try:
+            upsert_increments(CourseViewHourly, ['course_id', 'bucket'], 'views', [
+                {'course_id': course_id, 'group': group, 'bucket': bucket, 'views': views}
+                for (course_id, group, bucket), views in hourly.items()
+            ])
+            upsert_increments(CourseViewDaily, ['course_id', 'bucket'], 'views', [
+                {'course_id': course_id, 'group': group, 'bucket': bucket, 'views': views}
+                for (course_id, group, bucket), views in daily.items()
+            ])
+            set_version(WATERMARK, rows[-1].id)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        processed += len(rows)
+        if len(fetched) < batch_size or len(rows) < len(fetched):
+            break
+    return processed
+
+def compact_raw_views(max_age_days=180, hourly_max_age_days=30, batch_size=10000):
+    """
+    Política de retención:
+    - CourseView anteriores a `max_age_days` y ya procesados por los
+      resúmenes y las co-visualizaciones se compactan a una fila por par
+      (usuario, curso).
+    - Los resúmenes horarios anteriores a `hourly_max_age_days` se eliminan
+      (los diarios se conservan).
+    Devuelve (eventos eliminados, resúmenes horarios eliminados).
+    """
+    cutoff = datetime.utcnow() - timedelta(days=max_age_days)
+    # Solo eventos que ya consumieron ambos agregadores incrementales
+    safe_id = min(get_version(WATERMARK), get_version(COVIEW_WATERMARK))
+    removed = 0
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            db.select(CourseView.id, CourseView.user_id, CourseView.course_id)
+            .where(CourseView.id > last_id, CourseView.id <= safe_id, CourseView.viewed_at < cutoff)
+            .order_by(CourseView.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        # Primera visita de cada par del bloque (una consulta agrupada)
+        users = {row.user_id for row in rows}
+        first_visit = {
+            (user_id, course_id): first_id
+            for user_id, course_id, first_id in db.session.execute(
+                db.select(CourseView.user_id, CourseView.course_id, func.min(CourseView.id))
+                .where(CourseView.user_id.in_(users))
+                .group_by(CourseView.user_id, CourseView.course_id)
+            )
+        }
+        duplicates = [row.id for row in rows if first_visit.get((row.user_id, row.course_id)) != row.id]
+        if duplicates:
+            db.session.execute(delete(CourseView).where(CourseView.id.in_(duplicates)))
+        db.session.commit()
+        removed += len(duplicates)
+
+    hourly_cutoff = datetime.utcnow() - timedelta(days=hourly_max_age_days)
+    result = db.session.execute(delete(CourseViewHourly).where(CourseViewHourly.bucket < hourly_cutoff))
+    db.session.commit()
+    return removed, result.rowcount
+
+def group_trends(days=TREND_DAYS):
+    """
+    Vistas diarias por grupo de los últimos `days` días desde el resumen
+    diario: {grupo: [vistas por día, del más antiguo a hoy]}
+    """
+    start = date.today() - timedelta(days=days - 1)
+    series = {}
+    for bucket, group, views in db.session.execute(
+        db.select(CourseViewDaily.bucket, CourseViewDaily.group, func.sum(CourseViewDaily.views))
+        .where(CourseViewDaily.bucket >= start)
+        .group_by(CourseViewDaily.bucket, CourseViewDaily.group)
+    ):
+        offset = (bucket - start).days
+        if 0 <= offset < days:
+            series.setdefault(group, [0] * days)[offset] = int(views)
+    return series
+
+def sparkline_points(values, width=300, height=40):
+    """
+    Puntos de un polyline SVG para una serie
+    """
+    peak = max(values) or 1
+    step = width / max(len(values) - 1, 1)
+    return ' '.join(f'{i * step:.1f},{height - value / peak * height:.1f}' for i, value in enumerate(values))
@@ -0,0 +1,68 @@
+"""
+Visitantes únicos aproximados por curso y por grupo con sketches
+HyperLogLog diarios guardados en CourseViewerSketch
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+from __init__ import db
+from models import CourseViewerSketch
+from hyperloglog import HyperLogLog, union
+from utils import insert_missing
+
+def record_viewers(events, groups):
+    """
+    Agrega a los sketches diarios los usuarios de un lote de clics
+    (course_id, user_id, viewed_at). `groups` da el grupo de cada curso.
+    Participa en la transacción del llamador.
+    """
+    batches = defaultdict(set)
+    for course_id, user_id, viewed_at in events:
+        batches[(course_id, viewed_at.date())].add(user_id)
+
+    # Las filas del día se crean vacías antes de bloquearlas: SELECT ... FOR
+    # UPDATE sobre una fila inexistente no bloquea nada, y dos workers con los
+    # primeros clics del día insertarían la misma clave
+    keys = sorted(batches)
+    empty = HyperLogLog().to_bytes()
+    insert_missing(CourseViewerSketch, ['course_id', 'day'], [
+        {'course_id': course_id, 'day': day, 'group': groups.get(course_id, ''), 'registers': empty}
+        for course_id, day in keys
+    ])
+    # En orden de clave para que los lotes concurrentes bloqueen en el mismo orden
+    for course_id, day in keys:
+        row = db.session.execute(
+            db.select(CourseViewerSketch)
+            .where(CourseViewerSketch.course_id == course_id, CourseViewerSketch.day == day)
+            .with_for_update()
+        ).scalar()
+        sketch = HyperLogLog().update(batches[(course_id, day)])
+        row.registers = sketch.merge(HyperLogLog.from_bytes(row.registers)).to_bytes()
+
+def unique_viewers(course_id=None, group=None, days=30):
+    """
+    Usuarios distintos aproximados en los últimos `days` días para un
+    curso, un grupo o todo el catálogo
+    """
+    query = db.select(CourseViewerSketch.registers).where(
+        CourseViewerSketch.day >= date.today() - timedelta(days=days - 1))
+    if course_id is not None:
+        query = query.where(CourseViewerSketch.course_id == course_id)
+    if group is not None:
+        query = query.where(CourseViewerSketch.group == group)
+    return union(db.session.execute(query).scalars()).count()
+
+def unique_viewers_by_group(days=30):
+    """
+    {grupo: usuarios distintos aproximados} en los últimos `days` días
+    """
+    sketches = {}
+    for group, registers in db.session.execute(
+        db.select(CourseViewerSketch.group, CourseViewerSketch.registers)
+        .where(CourseViewerSketch.day >= date.today() - timedelta(days=days - 1))
+    ):
+        sketch = sketches.get(group)
+        if sketch is None:
+            sketches[group] = HyperLogLog.from_bytes(registers)
+        else:
+            sketch.merge(HyperLogLog.from_bytes(registers))
+    return {group: sketch.count() for group, sketch in sketches.items()}